@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aleksameter Reflectance Calculation Tool
+Headless command line entry point, no Qt or matplotlib needed
+
+Usage:
+    python -m aleksameter batch --black black.csv --white white.csv -o results.xlsx "measurements/*.csv"
+    acquire_spectra | python -m aleksameter stream --input ndjson --wavelengths 380:780:5 > results.ndjson
+    python -m aleksameter serve --port 8765 --wavelengths 380:780:5
+    python -m aleksameter coordinator --listen 0.0.0.0:9876 --token secret -o results.parquet /shared/measurements
+    python -m aleksameter worker coordinator-host:9876 --token secret
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+
+def export_format(file_path, format_name=None):
+    """
+    Export format of an output path
+
+    Parameters:
+        file_path: Output path
+        format_name: Explicit format name, overrides the extension
+
+    Returns:
+        Format name of export_tables.export_data_file
+
+    Raises:
+        ValueError: If the extension is not an export format
+    """
+    from export_tables import EXPORT_FORMATS
+    if format_name:
+        return format_name
+    ext = os.path.splitext(file_path)[1].lower()
+    for name, format_ext, _ in EXPORT_FORMATS:
+        if ext == format_ext:
+            return name
+    raise ValueError(f"Unknown export format of {file_path}, use one of "
+                     f"{', '.join(format_ext for _, format_ext, _ in EXPORT_FORMATS)} or --format")
+
+
+def load_references(black_path, white_path, verbose=False):
+    """
+    Load the black and white reference files, the white reference on the black reference grid
+
+    Returns:
+        (wavelengths, black values, white values)
+
+    Raises:
+        ValueError: If a reference file cannot be loaded
+    """
+    from measurement_files import load_measurement_file
+    black_ref = load_measurement_file(black_path, verbose)
+    white_ref = load_measurement_file(white_path, verbose)
+    if black_ref is None or white_ref is None:
+        raise ValueError("Cannot load reference files.")
+
+    wavelengths = black_ref['wavelengths']
+    white_values = white_ref['values']
+    if not np.array_equal(white_ref['wavelengths'], wavelengths):
+        white_values = np.interp(wavelengths, white_ref['wavelengths'], white_values)
+    return wavelengths, black_ref['values'], white_values
+
+
+def calculation_settings(args):
+    """Settings dictionary of the exports, from the command line options"""
+    return {
+        'general': {
+            'illuminant': args.illuminant,
+            'rho_lambda': args.rho_lambda,
+            'gamut': 'None'
+        },
+        'export': {
+            'separator': args.decimal,
+            'include_header': not args.no_header,
+            'decimal_places': args.decimal_places
+        }
+    }
+
+
+def batch_references(args, calculator):
+    """
+    Check the batch options and load the references
+
+    Returns:
+        (reference grid or None, black values, white values)
+
+    Raises:
+        ValueError: If the options are invalid
+    """
+    if (args.black is None) != (args.white is None):
+        raise ValueError("Calibration needs both --black and --white")
+    if args.illuminant not in calculator.tables.illuminants:
+        raise ValueError(f"Unknown light source '{args.illuminant}', available: {', '.join(calculator.tables.illuminants)}")
+
+    if args.black is None:
+        print(f"Generic mode: No calibration used")
+        return None, None, None
+    print(f"Aleksameter mode: Using black and white reference calibration")
+    return load_references(args.black, args.white, args.verbose)
+
+
+def write_exports(args, formats, names, results):
+    """Write the batch results to every output of the command line"""
+    from batch_runner import batch_export_data
+    from export_tables import export_data_file
+
+    data = batch_export_data(names, results)
+    settings = calculation_settings(args)
+    export_rho = args.tables in ('both', 'rho')
+    export_color = args.tables in ('both', 'color')
+    for file_path, format_name in zip(args.output, formats):
+        for written_path in export_data_file(format_name, file_path, data, settings, export_rho, export_color,
+                                             args.layout):
+            print(f"Exported {written_path}")
+
+
+def run_batch_command(args):
+    """
+    Calculate all measurements and write the exports
+
+    Returns:
+        Process exit code
+    """
+    from color_calculator import ColorCalculator, CalculationConfig
+    from measurement_files import iter_measurements
+    from spectral_data import build_spectral_block
+    from batch_runner import run_batch
+
+    start_time = time.perf_counter()
+    formats = [export_format(path, args.format) for path in args.output]
+    calculator = ColorCalculator()
+    grid, black_values, white_values = batch_references(args, calculator)
+
+    names = []
+    wavelengths_list = []
+    values_list = []
+    for file_name, measurement in iter_measurements(args.measurements, args.verbose):
+        names.append(file_name)
+        wavelengths_list.append(measurement['wavelengths'])
+        values_list.append(measurement['values'])
+    if not names:
+        raise ValueError("No valid measurement files.")
+    load_seconds = time.perf_counter() - start_time
+    print(f"Loaded {len(names)} measurement files in {load_seconds:.2f} s")
+
+    # All samples on one grid: the reference grid, or the first measurement's grid without calibration
+    block = build_spectral_block(names, wavelengths_list, values_list, grid=grid)
+    config = CalculationConfig(illuminant=args.illuminant, rho_lambda=args.rho_lambda,
+                               black_reference=black_values, white_reference=white_values)
+    if not args.cache:
+        results = run_batch(block['reflectance'], block['wavelengths'], config, calculator.tables,
+                            max_workers=args.workers)
+    else:
+        from result_cache import ResultCache, run_batch_cached
+        cache = ResultCache(args.cache_file, int(args.cache_size_mb * 1024 * 1024))
+        try:
+            results = run_batch_cached(list(zip(values_list, wavelengths_list)), block, config, calculator.tables,
+                                       cache, max_workers=args.workers)
+        finally:
+            cache.close()
+
+    write_exports(args, formats, names, results)
+    print(f"Finished {len(names)} samples in {time.perf_counter() - start_time:.2f} s")
+    return 0
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    """
+    Parse 'host:port' or 'port'
+
+    Returns:
+        (host, port)
+    """
+    from sharded_batch import DEFAULT_PORT
+    host, _, port = text.rpartition(':')
+    try:
+        return host or default_host, int(port) if port else DEFAULT_PORT
+    except ValueError:
+        raise ValueError(f"Invalid address '{text}', use host:port") from None
+
+
+def run_coordinator_command(args):
+    """
+    Split the measurements into shards, hand them to workers and write the merged exports
+
+    Returns:
+        Process exit code
+    """
+    from color_calculator import ColorCalculator, CalculationConfig
+    from measurement_files import list_measurement_entries, load_measurement_entries
+    from sharded_batch import ShardCoordinator, run_shard_worker
+
+    start_time = time.perf_counter()
+    formats = [export_format(path, args.format) for path in args.output]
+    calculator = ColorCalculator()
+    grid, black_values, white_values = batch_references(args, calculator)
+
+    entries = list_measurement_entries(args.measurements)
+    if not entries:
+        raise ValueError("No valid measurement files.")
+    if grid is None:
+        # Without calibration all samples go on the grid of the first loadable measurement
+        first = next(load_measurement_entries(entries), None)
+        if first is None:
+            raise ValueError("No valid measurement files.")
+        grid = first[1]['wavelengths']
+    print(f"Listed {len(entries)} measurement files")
+
+    config = CalculationConfig(illuminant=args.illuminant, rho_lambda=args.rho_lambda,
+                               black_reference=black_values, white_reference=white_values)
+    host, port = parse_address(args.listen)
+    coordinator = ShardCoordinator(entries, config, grid, include_reflectance=args.tables != 'color',
+                                   token=args.token, host=host, port=port, shard_size=args.shard_size)
+
+    # Optional workers on this host, spawned so they start without the coordinator's state
+    context = multiprocessing.get_context('spawn')
+    connect_host, connect_port = coordinator.address
+    local_workers = [context.Process(target=run_shard_worker, args=(connect_host, connect_port, args.token, f"local{i + 1}"),
+                                     daemon=True)
+                     for i in range(args.local_workers)]
+    for process in local_workers:
+        process.start()
+    try:
+        names, results, skipped = coordinator.run(args.timeout)
+    except RuntimeError as e:
+        raise ValueError(str(e)) from None
+    finally:
+        for process in local_workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    if not names:
+        raise ValueError("No valid measurement files.")
+    if skipped:
+        print(f"Skipped {len(skipped)} files without measurement data")
+
+    write_exports(args, formats, names, results)
+    print(f"Finished {len(names)} samples in {time.perf_counter() - start_time:.2f} s")
+    return 0
+
+
+def run_worker_command(args):
+    """
+    Work on the shards of a coordinator until the run is done
+
+    Returns:
+        Process exit code
+    """
+    from sharded_batch import run_shard_worker
+
+    host, port = parse_address(args.coordinator)
+    try:
+        run_shard_worker(host, port, args.token, args.name, connect_timeout=args.connect_timeout)
+    except RuntimeError as e:
+        raise ValueError(str(e)) from None
+    return 0
+
+
+def run_stream_command(args):
+    """
+    Read spectra from stdin and write each sample's colour values to stdout right away
+
+    stdout carries only the results, all messages go to stderr.
+
+    Returns:
+        Process exit code
+    """
+    import contextlib
+    from color_calculator import ColorCalculator, CalculationConfig
+    from stream_mode import parse_wavelength_range, read_csv_spectra, read_ndjson_spectra, read_binary_spectra, stream_colors
+
+    results_output = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if (args.black is None) != (args.white is None):
+            raise ValueError("Calibration needs both --black and --white")
+        calculator = ColorCalculator()
+        if args.illuminant not in calculator.tables.illuminants:
+            raise ValueError(f"Unknown light source '{args.illuminant}', available: {', '.join(calculator.tables.illuminants)}")
+
+        # Wavelength grid of NDJSON records without wavelengths: --wavelengths, else the reference grid
+        wavelengths = parse_wavelength_range(args.wavelengths) if args.wavelengths else None
+        black_values = white_values = None
+        if args.black is not None:
+            reference_wavelengths, black_values, white_values = load_references(args.black, args.white)
+            if wavelengths is None:
+                wavelengths = reference_wavelengths
+        config = CalculationConfig(illuminant=args.illuminant, rho_lambda=args.rho_lambda,
+                                   black_reference=black_values, white_reference=white_values)
+
+        if args.input == 'binary':
+            spectra = read_binary_spectra(sys.stdin.buffer)
+        elif args.input == 'ndjson':
+            spectra = read_ndjson_spectra(sys.stdin, wavelengths)
+        else:
+            # Without --wavelengths the CSV header row gives the grid
+            spectra = read_csv_spectra(sys.stdin, parse_wavelength_range(args.wavelengths) if args.wavelengths else None)
+
+        start_time = time.perf_counter()
+        processed, failed = stream_colors(spectra, results_output, config, calculator.tables, args.output,
+                                          flush=not args.no_flush)
+        seconds = time.perf_counter() - start_time
+        per_sample = seconds / processed * 1e6 if processed else 0
+        print(f"Streamed {processed} samples ({failed} failed) in {seconds:.3f} s, {per_sample:.1f} us per sample")
+    return 0 if failed == 0 else 1
+
+
+def run_serve_command(args):
+    """
+    Run the local colour service until interrupted
+
+    Returns:
+        Process exit code
+    """
+    from color_calculator import ColorCalculator, CalculationConfig
+    from color_service import ColorService
+    from stream_mode import parse_wavelength_range
+
+    if (args.black is None) != (args.white is None):
+        raise ValueError("Calibration needs both --black and --white")
+    calculator = ColorCalculator()
+    wavelengths = parse_wavelength_range(args.wavelengths) if args.wavelengths else None
+    black_values = white_values = None
+    if args.black is not None:
+        reference_wavelengths, black_values, white_values = load_references(args.black, args.white)
+        if wavelengths is None:
+            wavelengths = reference_wavelengths
+    config = CalculationConfig(illuminant=args.illuminant, rho_lambda=args.rho_lambda,
+                               black_reference=black_values, white_reference=white_values)
+
+    service = ColorService(calculator.tables, config, wavelengths, args.host, args.port, args.workers,
+                           args.batch_window_ms / 1000)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping color service")
+    finally:
+        service.shutdown()
+    return 0
+
+
+def add_batch_arguments(parser):
+    """Measurement, calibration and export options shared by the batch and coordinator commands"""
+    from export_tables import EXPORT_FORMATS
+
+    parser.add_argument('measurements', nargs='+',
+                        help="Measurement files: glob patterns, directories or .zip/.tar archives of .csv files")
+    parser.add_argument('--black', help="Black reference file (Aleksameter mode, needs --white)")
+    parser.add_argument('--white', help="White reference file (Aleksameter mode, needs --black)")
+    parser.add_argument('--illuminant', default='D65', help="Light source: D65, D50, A or E (default: D65)")
+    parser.add_argument('--rho-lambda', type=float, default=0.989, help="Reflectance scaling factor (default: 0.989)")
+    parser.add_argument('-o', '--output', action='append', required=True,
+                        help="Export file, the format follows the extension; repeat for several exports")
+    parser.add_argument('--format', choices=[name for name, _, _ in EXPORT_FORMATS],
+                        help="Export format of every output, instead of the extension")
+    parser.add_argument('--tables', choices=['both', 'rho', 'color'], default='both',
+                        help="Export the reflectance data, the colour data or both (default: both)")
+    parser.add_argument('--layout', choices=['Wide', 'Long'], default='Wide',
+                        help="Reflectance table layout of Parquet and Arrow exports (default: Wide)")
+    parser.add_argument('--decimal', choices=['Point', 'Comma'], default='Point', help="Decimal mark of text exports")
+    parser.add_argument('--decimal-places', type=int, default=6, help="Decimal places of text exports (default: 6)")
+    parser.add_argument('--no-header', action='store_true', help="Write TXT exports without header line")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print the details of every loaded file")
+
+
+def build_parser():
+    """Command line parser with one sub-command per mode"""
+    from stream_mode import STREAM_INPUT_FORMATS, STREAM_OUTPUT_FORMATS
+
+    parser = argparse.ArgumentParser(prog='aleksameter', description="Aleksameter reflectance and colour calculation")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help="Calculate measurement files and export the results")
+    add_batch_arguments(batch)
+    batch.add_argument('--workers', type=int, help="Worker processes (default: CPU count for large batches)")
+    batch.add_argument('--cache', action='store_true',
+                       help="Take samples calculated before (also by the application) from the result cache "
+                            "and store the new ones")
+    batch.add_argument('--cache-file', help="Result cache file (default: result_cache.sqlite in the user data directory)")
+    batch.add_argument('--cache-size-mb', type=float, default=256, help="Size limit of the result cache (default: 256 MB)")
+    batch.set_defaults(handler=run_batch_command)
+
+    coordinator = commands.add_parser('coordinator', help="Run a batch sharded over worker processes on several hosts")
+    add_batch_arguments(coordinator)
+    coordinator.add_argument('--listen', default='127.0.0.1:9876',
+                             help="Address workers connect to, host:port (default: 127.0.0.1:9876; "
+                                  "use 0.0.0.0:9876 for workers on other hosts)")
+    coordinator.add_argument('--token', default='',
+                             help="Shared secret the workers must present, required unless --listen is a loopback address")
+    coordinator.add_argument('--shard-size', type=int, default=1000, help="Measurement files per shard (default: 1000)")
+    coordinator.add_argument('--local-workers', type=int, default=0,
+                             help="Worker processes to start on this host (default: 0, only remote workers)")
+    coordinator.add_argument('--timeout', type=float, help="Seconds to wait for all shards (default: no limit)")
+    coordinator.set_defaults(handler=run_coordinator_command)
+
+    worker = commands.add_parser('worker', help="Work on the shards of a coordinator")
+    worker.add_argument('coordinator', help="Coordinator address, host:port")
+    worker.add_argument('--token', default='', help="Shared secret of the coordinator")
+    worker.add_argument('--name', help="Worker name shown by the coordinator (default: host name and process id)")
+    worker.add_argument('--connect-timeout', type=float, default=30,
+                        help="Seconds to retry connecting while the coordinator starts (default: 30)")
+    worker.set_defaults(handler=run_worker_command)
+
+    stream = commands.add_parser('stream', help="Calculate spectra from stdin, one result line per sample on stdout")
+    stream.add_argument('--input', choices=STREAM_INPUT_FORMATS, default='csv',
+                        help="Input format: CSV rows (header row of wavelengths unless --wavelengths), "
+                             "NDJSON records {\"name\", \"values\", \"wavelengths\"} or a JSON header line "
+                             "{\"wavelengths\", \"dtype\"} followed by raw float records (default: csv)")
+    stream.add_argument('--output', choices=STREAM_OUTPUT_FORMATS, default='ndjson', help="Output format (default: ndjson)")
+    stream.add_argument('--wavelengths', help="Wavelength grid of CSV/NDJSON input, 'start:stop:step' or a list (e.g. 380:780:5)")
+    stream.add_argument('--black', help="Black reference file, on the input wavelength grid (needs --white)")
+    stream.add_argument('--white', help="White reference file, on the input wavelength grid (needs --black)")
+    stream.add_argument('--illuminant', default='D65', help="Light source: D65, D50, A or E (default: D65)")
+    stream.add_argument('--rho-lambda', type=float, default=0.989, help="Reflectance scaling factor (default: 0.989)")
+    stream.add_argument('--no-flush', action='store_true', help="Buffer the output instead of flushing every sample")
+    stream.set_defaults(handler=run_stream_command)
+
+    serve = commands.add_parser('serve', help="Run a local colour computation service (HTTP JSON)")
+    serve.add_argument('--host', default='127.0.0.1', help="Listening address (default: 127.0.0.1, local only)")
+    serve.add_argument('--port', type=int, default=8765, help="Listening port, 0 picks a free port (default: 8765)")
+    serve.add_argument('--workers', type=int, help="Worker processes, 0 computes in the service process (default: CPU count)")
+    serve.add_argument('--batch-window-ms', type=float, default=2.0,
+                       help="Time to gather concurrent requests into one batch (default: 2 ms)")
+    serve.add_argument('--wavelengths', help="Default wavelength grid of requests, 'start:stop:step' or a list")
+    serve.add_argument('--black', help="Default black reference file (needs --white)")
+    serve.add_argument('--white', help="Default white reference file (needs --black)")
+    serve.add_argument('--illuminant', default='D65', help="Default light source (default: D65)")
+    serve.add_argument('--rho-lambda', type=float, default=0.989, help="Default reflectance scaling factor (default: 0.989)")
+    serve.set_defaults(handler=run_serve_command)
+    return parser
+
+
+def main(argv=None):
+    """Run the command line, returns the process exit code"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    # Needed by the batch runner process pool in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
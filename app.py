@@ -6,12 +6,29 @@ Main Program Entry Point
 """
 
 import sys
-from PySide6.QtWidgets import QApplication
-from mainwindow import MainWindow
-import matplotlib.pyplot as plt
+import multiprocessing
 
 if __name__ == "__main__":
+    # Needed by the batch plot export process pool in frozen builds
+    multiprocessing.freeze_support()
+    
+    # Import the GUI only in the main process, spawned export workers re-import this module
+    from startup_timing import startup_timer
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    startup_timer.mark("Qt import")
+    
     app = QApplication(sys.argv)
+    startup_timer.mark("QApplication")
+    
+    from mainwindow import MainWindow
+    startup_timer.mark("MainWindow import")
+    
     window = MainWindow()
     window.show()
+    startup_timer.mark("Window shown")
+    
+    # Report once the first frame is painted, then load the remaining resources
+    QTimer.singleShot(0, startup_timer.report)
+    QTimer.singleShot(0, window.prewarm)
     sys.exit(app.exec())
@@ -0,0 +1,215 @@
+import os
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from color_calculator import reflectance_block, compute_color_block, color_weights, hex_colors
+
+
+# Colour values per sample in the shared output block: XYZ, xy, linear RGB, gamma RGB
+OUTPUT_COLUMNS = {'xyz': slice(0, 3), 'xy': slice(3, 5), 'rgb_linear': slice(5, 8), 'rgb_gamma': slice(8, 11)}
+OUTPUT_WIDTH = 11
+
+# Below this many spectra the pool start-up costs more than it saves
+POOL_THRESHOLD = 5000
+
+# Rows per worker task, large enough to keep the matrix products efficient
+CHUNK_ROWS = 4096
+
+# Worker process state, set once by the pool initializer
+_worker_state = {}
+
+
+def _attach_block(name, shape):
+    """Attach to a shared memory block created by the runner and view it as a float64 matrix"""
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+
+
+def _init_worker(spectra_name, output_name, shape, wavelengths, config, tables):
+    """Process pool initializer: attach the shared blocks and prepare the weight table once per worker"""
+    _worker_state['spectra_memory'], _worker_state['spectra'] = _attach_block(spectra_name, shape)
+    _worker_state['output_memory'], _worker_state['output'] = _attach_block(output_name, (shape[0], OUTPUT_WIDTH))
+    _worker_state['wavelengths'] = wavelengths
+    _worker_state['config'] = config
+    _worker_state['tables'] = tables
+    color_weights(wavelengths, config.illuminant, tables)
+
+
+def process_rows(spectra, output, start, stop, wavelengths, config, tables):
+    """
+    Calculate reflectance (in place) and colour values of rows start..stop of the blocks
+
+    Parameters:
+        spectra: (N, W) measurement matrix, rows start..stop are replaced by their reflectance
+        output: (N, OUTPUT_WIDTH) matrix receiving the colour values (see OUTPUT_COLUMNS)
+        start, stop: Row range
+        wavelengths, config, tables: See run_batch
+
+    Returns:
+        Number of processed rows
+    """
+    rows = spectra[start:stop]
+    reflectance_block(rows, config, out=rows)
+    values = compute_color_block(rows, wavelengths, config, tables)
+    for key, columns in OUTPUT_COLUMNS.items():
+        output[start:stop, columns] = values[key]
+    return stop - start
+
+
+def _run_chunk(chunk):
+    """Process one row range inside a worker process"""
+    start, stop = chunk
+    return process_rows(_worker_state['spectra'], _worker_state['output'], start, stop,
+                         _worker_state['wavelengths'], _worker_state['config'], _worker_state['tables'])
+
+
+def split_rows(count, chunk_rows=CHUNK_ROWS, workers=1):
+    """
+    Split count rows into contiguous (start, stop) ranges
+
+    Uses at least a few ranges per worker so a slow worker does not hold up the batch.
+
+    Parameters:
+        count: Number of rows
+        chunk_rows: Maximum rows per range
+        workers: Number of workers sharing the ranges
+
+    Returns:
+        List of (start, stop) tuples
+    """
+    if count == 0:
+        return []
+    chunk_rows = max(1, min(chunk_rows, -(-count // (4 * workers))))
+    return [(start, min(start + chunk_rows, count)) for start in range(0, count, chunk_rows)]
+
+
+def run_batch(measurements, wavelengths, config, tables, max_workers=None, chunk_rows=CHUNK_ROWS,
+              progress_callback=None):
+    """
+    Calculate reflectance and colour values of an (N, W) measurement block across a process pool
+
+    The measurements are copied once into a shared memory block; workers read their row
+    ranges from it, write the reflectance back in place and the colour values into a
+    second shared block, so no spectra are pickled between processes. Small batches and
+    max_workers=1 run in this process.
+
+    Parameters:
+        measurements: (N, W) measurement matrix, all samples on the same wavelength grid
+        wavelengths: Wavelength grid (W,)
+        config: CalculationConfig
+        tables: SpectralTables (ColorCalculator.tables)
+        max_workers: Number of worker processes (default: CPU count)
+        chunk_rows: Maximum rows per worker task
+        progress_callback: Optional callable(done, total), returning False cancels the rows
+            that have not started yet (raises RuntimeError)
+
+    Returns:
+        Dictionary with:
+            - wavelengths: wavelength grid (W,)
+            - reflectance: reflectance matrix (N, W)
+            - xyz, xy, rgb_linear, rgb_gamma: colour values, (N, 3) or (N, 2)
+            - hex_color: list of hexadecimal color codes
+            - stats: {'samples', 'workers', 'seconds', 'spectra_per_second'}
+    """
+    start_time = time.perf_counter()
+    wavelengths = np.array(wavelengths, dtype=np.float64)
+    measurements = np.asarray(measurements, dtype=np.float64)
+    if measurements.ndim != 2 or measurements.shape[1] != len(wavelengths):
+        raise ValueError(f"Measurement block shape {measurements.shape} does not match {len(wavelengths)} wavelengths")
+
+    count = len(measurements)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, count))
+    if count < POOL_THRESHOLD and max_workers is None:
+        workers = 1
+    chunks = split_rows(count, chunk_rows, workers)
+
+    if workers == 1:
+        reflectance = measurements.copy()
+        output = np.empty((count, OUTPUT_WIDTH), dtype=np.float64)
+        for start, stop in chunks:
+            process_rows(reflectance, output, start, stop, wavelengths, config, tables)
+            if progress_callback is not None and progress_callback(stop, count) is False:
+                raise RuntimeError(f"Batch cancelled after {stop}/{count} samples")
+    else:
+        reflectance, output = _run_pool(measurements, wavelengths, config, tables, workers, chunks, progress_callback)
+
+    seconds = time.perf_counter() - start_time
+    results = {key: output[:, columns].copy() for key, columns in OUTPUT_COLUMNS.items()}
+    results.update({
+        'wavelengths': wavelengths,
+        'reflectance': reflectance,
+        'hex_color': hex_colors(results['rgb_gamma']),
+        'stats': {
+            'samples': count,
+            'workers': workers,
+            'seconds': seconds,
+            'spectra_per_second': count / seconds if seconds > 0 else float('inf')
+        }
+    })
+    print(f"Batch processed {count} spectra with {workers} worker(s) in {seconds:.3f} s "
+          f"({results['stats']['spectra_per_second']:,.0f} spectra/s)")
+    return results
+
+
+def _run_pool(measurements, wavelengths, config, tables, workers, chunks, progress_callback):
+    """Run the row ranges on a process pool over shared memory, returns (reflectance, output) copies"""
+    spectra_memory = shared_memory.SharedMemory(create=True, size=max(measurements.nbytes, 1))
+    output_memory = shared_memory.SharedMemory(create=True, size=max(len(measurements) * OUTPUT_WIDTH * 8, 1))
+    try:
+        spectra = np.ndarray(measurements.shape, dtype=np.float64, buffer=spectra_memory.buf)
+        output = np.ndarray((len(measurements), OUTPUT_WIDTH), dtype=np.float64, buffer=output_memory.buf)
+        spectra[:] = measurements
+
+        # Use spawn so workers never inherit the Qt state of the GUI process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(spectra_memory.name, output_memory.name, measurements.shape,
+                                           wavelengths, config, tables)) as executor:
+            futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+            done = 0
+            for future in as_completed(futures):
+                done += future.result()
+                if progress_callback is not None and progress_callback(done, len(measurements)) is False:
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(f"Batch cancelled after {done}/{len(measurements)} samples")
+
+        return spectra.copy(), output.copy()
+    finally:
+        # Drop the array views before closing, the buffers must not be exported
+        spectra = output = None
+        spectra_memory.close()
+        spectra_memory.unlink()
+        output_memory.close()
+        output_memory.unlink()
+
+
+def batch_export_data(names, results):
+    """
+    Data dictionary of batch results in the main window layout, for export_tables.export_data_file
+
+    Parameters:
+        names: Sample file names, in block row order
+        results: Result of run_batch (reflectance may be None when only colours are exported)
+
+    Returns:
+        Data dictionary with results, reflectance and wavelengths
+    """
+    wavelengths = results['wavelengths']
+    rows = zip(names, results['xy'].tolist(), results['rgb_linear'], results['rgb_gamma'], results['hex_color'])
+    return {
+        'results': [
+            {'file_name': name, 'x': xy[0], 'y': xy[1], 'rgb_linear': rgb_linear, 'rgb_gamma': rgb_gamma, 'hex_color': hex_color}
+            for name, xy, rgb_linear, rgb_gamma, hex_color in rows
+        ],
+        'reflectance': {
+            name: {'wavelengths': wavelengths, 'reflectance': reflectance}
+            for name, reflectance in zip(names, results['reflectance'])
+        } if results['reflectance'] is not None else {},
+        'original_wavelengths': wavelengths,
+        'wavelengths': wavelengths
+    }
@@ -0,0 +1,62 @@
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QApplication, QMessageBox
+
+
+# Tables with more cells than this are serialized in a background thread
+LARGE_COPY_CELLS = 50000
+
+
+class ClipboardTextWorker(QThread):
+    """Build clipboard text off the UI thread"""
+    text_ready = Signal(str)
+    failed = Signal(str)
+
+    def __init__(self, build_text, parent=None):
+        """
+        Parameters:
+            build_text: Callable returning the text; it must only use data captured when it was created
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self.build_text = build_text
+
+    def run(self):
+        try:
+            self.text_ready.emit(self.build_text())
+        except Exception as e:
+            print(f"Error building clipboard text: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(str(e))
+
+
+def copy_text_to_clipboard(parent, build_text, cell_count, on_copied=None, on_failed=None):
+    """
+    Copy table text to the clipboard, serializing large tables in a background thread
+
+    Parameters:
+        parent: Widget owning the worker
+        build_text: Callable returning the text (see ClipboardTextWorker)
+        cell_count: Number of table cells, decides whether a background thread is used
+        on_copied: Optional callable run on the UI thread once the clipboard is set
+        on_failed: Optional callable(error message) run on the UI thread if building the text
+            in the background failed (default: a warning message box)
+    """
+    def set_text(text):
+        QApplication.clipboard().setText(text)
+        if on_copied is not None:
+            on_copied()
+
+    def show_failure(message):
+        QMessageBox.warning(parent, "Copy Failed", f"The table could not be copied to the clipboard: {message}")
+
+    if cell_count < LARGE_COPY_CELLS:
+        set_text(build_text())
+        return
+
+    print(f"Copying {cell_count} cells in the background...")
+    worker = ClipboardTextWorker(build_text, parent)
+    worker.text_ready.connect(set_text)
+    worker.failed.connect(on_failed if on_failed is not None else show_failure)
+    worker.finished.connect(worker.deleteLater)
+    worker.start()
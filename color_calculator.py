@@ -1,10 +1,670 @@
 import numpy as np
-import scipy.interpolate as interp
 import os
 import json
 import re
 import csv
 import sys
+import hashlib
+from dataclasses import dataclass, replace
+from functools import lru_cache, cached_property
+
+# Default wavelength range 380-780nm, 5nm step
+DEFAULT_WAVELENGTHS = np.arange(380, 781, 5)
+
+# Standard XYZ to linear sRGB conversion matrix
+SRGB_MATRIX = np.array([
+    [3.2406, -1.5372, -0.4986],
+    [-0.9689, 1.8758, 0.0415],
+    [0.0557, -0.2040, 1.0570]
+])
+
+# Version of the reflectance and colour calculation, part of the result cache keys;
+# increase it whenever a change alters calculated values
+CALCULATION_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CalculationConfig:
+    """
+    Settings of a colour calculation
+    
+    Immutable and picklable, so one configuration can be shared by threads and sent to
+    other processes; derive a changed configuration with dataclasses.replace.
+    
+    Parameters:
+        illuminant: Light source name ('D65', 'D50', 'A')
+        rho_lambda: Scaling factor for reflectance calculation, typically between 0.989-1.0
+        black_reference: Black reference values, None without calibration
+        white_reference: White reference values, None without calibration
+    """
+    illuminant: str = 'D65'
+    rho_lambda: float = 1.0
+    black_reference: tuple = None
+    white_reference: tuple = None
+    
+    def __post_init__(self):
+        if not isinstance(self.rho_lambda, (int, float)) or self.rho_lambda <= 0:
+            raise ValueError(f"Invalid rho_lambda value: {self.rho_lambda}")
+        object.__setattr__(self, 'rho_lambda', float(self.rho_lambda))
+        
+        # Reference values are kept as tuples so the configuration stays immutable and hashable
+        for name in ('black_reference', 'white_reference'):
+            values = getattr(self, name)
+            if values is not None:
+                object.__setattr__(self, name, tuple(np.asarray(values, dtype=np.float64).tolist()))
+    
+    @property
+    def calibrated(self):
+        """Whether reflectance is calibrated with black and white references"""
+        return self.black_reference is not None and self.white_reference is not None
+    
+    @cached_property
+    def reference_arrays(self):
+        """(black, white) references as read-only float64 arrays, converted once per configuration"""
+        return _read_only(self.black_reference), _read_only(self.white_reference)
+
+
+@dataclass(frozen=True, eq=False)
+class SpectralTables:
+    """
+    CIE 1931 colour matching functions and illuminants on the same wavelength grid
+    
+    Loaded once (see ColorCalculator.tables) and only read afterwards; the arrays are
+    flagged read-only.
+    
+    Parameters:
+        wavelengths: CIE wavelengths
+        x_bar, y_bar, z_bar: Colour matching functions
+        illuminants: {name: spectral power distribution on the CIE wavelengths}
+    """
+    wavelengths: np.ndarray
+    x_bar: np.ndarray
+    y_bar: np.ndarray
+    z_bar: np.ndarray
+    illuminants: dict
+    
+    @cached_property
+    def fingerprints(self):
+        """
+        Content hashes of the tables, computed once
+        
+        Returns:
+            {'observer': hash of the wavelengths and colour matching functions,
+             'illuminants': {name: hash of the spectral power distribution}}
+        """
+        observer = hashlib.sha256()
+        for values in (self.wavelengths, self.x_bar, self.y_bar, self.z_bar):
+            observer.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        illuminants = {name: hashlib.sha256(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
+                       for name, values in self.illuminants.items()}
+        return {'observer': observer.hexdigest(), 'illuminants': illuminants}
+    
+    @classmethod
+    def from_data(cls, cie_1931, illuminants):
+        """
+        Build the tables from loaded CIE data and illuminants
+        
+        Parameters:
+            cie_1931: {'wavelengths', 'x', 'y', 'z'}
+            illuminants: {name: spectral power distribution}
+        
+        Returns:
+            SpectralTables
+        """
+        cie_wavelengths = _read_only(cie_1931['wavelengths'])
+        
+        matched_illuminants = {}
+        for name, illuminant_data in illuminants.items():
+            illuminant_data = np.asarray(illuminant_data)
+            # Ensure light source data length consistent with CIE data
+            if len(illuminant_data) != len(cie_wavelengths):
+                print(f"Light source {name} data length({len(illuminant_data)}) inconsistent with CIE data length({len(cie_wavelengths)})")
+                # Assume this is due to different step length when using built-in light source data
+                if len(illuminant_data) == 81 and len(cie_wavelengths) == 401:
+                    # Interpolate 5nm step length light source data to 1nm step length
+                    original_wl = np.arange(380, 781, 5)  # Original 5nm step length wavelength
+                    illuminant_data = np.interp(cie_wavelengths, original_wl, illuminant_data, left=0, right=0)
+                else:
+                    print(f"Unable to determine how to match light source data, may result in calculation error")
+            matched_illuminants[name] = _read_only(illuminant_data)
+        
+        return cls(cie_wavelengths, _read_only(cie_1931['x']), _read_only(cie_1931['y']),
+                   _read_only(cie_1931['z']), matched_illuminants)
+
+
+def _read_only(values):
+    """Read-only copy of an array"""
+    values = np.array(values)
+    values.setflags(write=False)
+    return values
+
+
+def compute_reflectance(measurement, config, wavelengths=None):
+    """
+    Calculate reflectance completely following MATLAB's approach
+    
+    MATLAB code: app.dataRho = (app.data - app.black)./(app.white-app.black).*app.white./app.data*app.rho_Nlambda;
+    
+    Parameters:
+        measurement: Measurement data
+        config: CalculationConfig
+        wavelengths: Wavelength data, if None use default wavelength range
+    
+    Returns:
+        Reflectance data (the measurement itself without calibration references)
+    """
+    if wavelengths is None:
+        wavelengths = DEFAULT_WAVELENGTHS
+    
+    # Ensure input data is numpy array and use same double precision as MATLAB
+    wavelengths = np.array(wavelengths, dtype=np.float64)
+    measurement = np.array(measurement, dtype=np.float64)
+    
+    print(f"Calculating reflectance: Input wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, point count: {len(wavelengths)}")
+    
+    # Check if data is valid
+    if np.any(np.isnan(measurement)):
+        print("Warning: NaN values found in measurement data, these will be replaced with 0")
+        measurement = np.nan_to_num(measurement, nan=0.0)
+    
+    if not config.calibrated:
+        print("Calibration mode not set or reference data, return original measurement data")
+        return measurement
+    
+    black_ref = np.array(config.black_reference, dtype=np.float64)
+    white_ref = np.array(config.white_reference, dtype=np.float64)
+    
+    # Check length match
+    if len(measurement) != len(black_ref) or len(measurement) != len(white_ref):
+        error_msg = f"Length mismatch: Measurement={len(measurement)}, Black reference={len(black_ref)}, White reference={len(white_ref)}"
+        print(error_msg)
+        raise ValueError(error_msg)
+    
+    print("Using black and white reference for calibration...")
+    print(f"   Black reference range: {np.min(black_ref):.4f}-{np.max(black_ref):.4f}")
+    print(f"   White reference range: {np.min(white_ref):.4f}-{np.max(white_ref):.4f}")
+    print(f"   Measurement data range: {np.min(measurement):.4f}-{np.max(measurement):.4f}")
+    print(f"  rho_lambda value: {config.rho_lambda}")
+    
+    # Check measurement value less than black reference (just for warning, no calculation modification)
+    m_less_than_b = measurement < black_ref
+    count_m_less_than_b = np.sum(m_less_than_b)
+    if count_m_less_than_b > 0:
+        print(f"Warning: {count_m_less_than_b} measured values less than black reference, these may result in negative reflectance")
+        
+        # Output wavelength range of such points
+        problem_wavelengths = wavelengths[m_less_than_b]
+        if len(problem_wavelengths) > 0:
+            print(f"   Problem wavelength range: {np.min(problem_wavelengths):.1f}-{np.max(problem_wavelengths):.1f} nm")
+    
+    # Completely follow MATLAB's calculation approach, one step calculation of reflectance
+    # MATLAB: app.dataRho = (app.data - app.black)./(app.white-app.black).*app.white./app.data*app.rho_Nlambda;
+    with np.errstate(divide='ignore', invalid='ignore'):  # Ignore divide by zero warnings
+        # Step calculation to maintain exact precision consistent with MATLAB
+        numerator = (measurement - black_ref) * white_ref
+        denominator = (white_ref - black_ref) * measurement
+        reflectance = (numerator / denominator) * config.rho_lambda
+    
+    # Handle results NaN and Inf (consistent with MATLAB)
+    if np.any(np.isnan(reflectance)) or np.any(np.isinf(reflectance)):
+        invalid_count = np.sum(np.isnan(reflectance)) + np.sum(np.isinf(reflectance))
+        print(f"Warning: {invalid_count} invalid reflectance values (NaN/Inf)")
+        reflectance = np.nan_to_num(reflectance, nan=0.0, posinf=1.0, neginf=0.0)
+    
+    # Check negative reflectance (like MATLAB, set negative values to 0)
+    neg_count = np.sum(reflectance < 0)
+    if neg_count > 0:
+        print(f"Warning: {neg_count} negative reflectance values")
+        neg_min = np.min(reflectance[reflectance < 0])
+        print(f"   Minimum negative value: {neg_min:.4f}")
+        # Like MATLAB, set negative values to 0
+        reflectance[reflectance < 0] = 0
+    
+    # Check reflectance greater than 1 (just for information, keep consistent with MATLAB)
+    over_count = np.sum(reflectance > 1.0)
+    if over_count > 0:
+        print(f"Warning: {over_count} reflectance values greater than 1.0")
+        over_max = np.max(reflectance[reflectance > 1.0])
+        print(f"   Maximum value: {over_max:.4f}")
+        # Keep values greater than 1 unchanged, consistent with MATLAB
+    
+    print(f"Reflectance calculation completed: Range {np.min(reflectance):.4f}-{np.max(reflectance):.4f}")
+    
+    return reflectance
+
+
+def compute_xyz(reflectance, wavelengths, config, tables):
+    """
+    Calculate CIE XYZ values using method completely compatible with MATLAB
+    This function completely replicates MATLAB's xyXYZ function implementation:
+    
+    function [x,y,X,Y,Z] = xyXYZ(app,S,data)
+        phi = S.*data;
+        k = 100./(sum(S.*app.xyzBar(:,2)));
+        X = k.*sum(phi.*app.xyzBar(:,1));
+        Y = k.*sum(phi.*app.xyzBar(:,2));
+        Z = k.*sum(phi.*app.xyzBar(:,3));
+        
+    Parameters:
+        reflectance: Reflectance data (MATLAB's data)
+        wavelengths: Wavelength corresponding to reflectance data
+        config: CalculationConfig, provides the light source (MATLAB's S)
+        tables: SpectralTables, provides MATLAB's xyzBar
+        
+    Returns:
+        CIE XYZ three values
+    """
+    try:
+        # Check input data
+        if reflectance is None or wavelengths is None:
+            print("Warning: Reflectance or wavelength data is empty")
+            return np.array([np.nan, np.nan, np.nan])
+            
+        # Ensure input data is numpy array
+        reflectance = np.array(reflectance)
+        wavelengths = np.array(wavelengths)
+        
+        if len(reflectance) == 0 or len(wavelengths) == 0:
+            print("Warning: Reflectance or wavelength data length is 0")
+            return np.array([np.nan, np.nan, np.nan])
+        
+        print(f"Calculating XYZ using light source: {config.illuminant}")
+        if config.illuminant not in tables.illuminants:
+            raise ValueError(f"Unknown light source '{config.illuminant}'")
+        illuminant_data = tables.illuminants[config.illuminant]
+        
+        # Ensure reflectance data, light source data, and CIE data wavelength step consistency
+        # If needed, interpolate to same wavelength points
+        if not np.array_equal(wavelengths, tables.wavelengths):
+            print(f"Reflectance data wavelength and CIE data wavelength inconsistent, perform matching")
+            # Use linear interpolation to match different step length data
+            # Note: In MATLAB equivalent to interp1 function
+            matched_reflectance = np.interp(
+                tables.wavelengths,
+                wavelengths,
+                reflectance,
+                left=0,  # Out of bounds left value set to 0
+                right=0  # Out of bounds right value set to 0
+            )
+        else:
+            matched_reflectance = reflectance
+        
+        # Completely follow MATLAB's xyXYZ function calculation
+        # MATLAB: phi = S.*data;
+        phi = illuminant_data * matched_reflectance
+        
+        # MATLAB: k = 100./(sum(S.*app.xyzBar(:,2)));
+        k = 100.0 / np.sum(illuminant_data * tables.y_bar)
+        
+        # MATLAB: X = k.*sum(phi.*app.xyzBar(:,1));
+        X = k * np.sum(phi * tables.x_bar)
+        Y = k * np.sum(phi * tables.y_bar)
+        Z = k * np.sum(phi * tables.z_bar)
+        
+        print(f"MATLAB compatible calculation: X={X:.6f}, Y={Y:.6f}, Z={Z:.6f}")
+        
+        return np.array([X, Y, Z])
+    
+    except Exception as e:
+        print(f"Error calculating XYZ: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return np.array([np.nan, np.nan, np.nan])
+
+
+def xyz_to_xy(XYZ):
+    """
+    Calculate xy chromaticity coordinates from XYZ values (completely following MATLAB's implementation)
+    
+    Parameters:
+        XYZ: XYZ values [X, Y, Z]
+    
+    Returns:
+        xy values [x, y]
+    """
+    # MATLAB implementation:
+    # x = X./(X + Y + Z);
+    # y = Y./(X + Y + Z);
+    denominator = XYZ[0] + XYZ[1] + XYZ[2]
+    if denominator == 0:
+        return np.array([0, 0])
+    
+    x = XYZ[0] / denominator
+    y = XYZ[1] / denominator
+    
+    return np.array([x, y])
+
+
+def xyz_to_linear_rgb(XYZ):
+    """
+    Calculate linear RGB values from XYZ values
+    
+    Parameters:
+        XYZ: XYZ values [X, Y, Z]
+    
+    Returns:
+        Linear RGB values [R, G, B]
+    """
+    # Standardize XYZ values (divide by 100)
+    XYZ_normalized = np.array([XYZ[0]/100, XYZ[1]/100, XYZ[2]/100])
+    
+    # Apply transformation matrix
+    rgb_linear = np.dot(SRGB_MATRIX, XYZ_normalized)
+    
+    # Check negative values and print warning
+    if np.any(rgb_linear < 0):
+        print(f"Warning: Linear RGB has negative values {rgb_linear}, this may result in out-of-gamut color")
+    
+    return rgb_linear
+
+
+def linear_to_gamma_rgb(rgb_linear):
+    """
+    Calculate gamma corrected sRGB values from linear RGB values
+    
+    Parameters:
+        rgb_linear: Linear RGB values [R, G, B]
+    
+    Returns:
+        Gamma corrected sRGB values [R', G', B']
+    """
+    rgb_gamma = np.zeros_like(rgb_linear)
+    
+    # Apply sRGB standard gamma correction
+    for i in range(len(rgb_linear)):
+        if rgb_linear[i] <= 0.0031308:
+            rgb_gamma[i] = 12.92 * rgb_linear[i]
+            if rgb_linear[i] < 0:
+                rgb_gamma[i] = 0
+        else:
+            rgb_gamma[i] = 1.055 * (rgb_linear[i] ** (1/2.4)) - 0.055
+    
+    # Check out-of-range values and just print warning (no clipping), consistent with MATLAB
+    if np.any(rgb_gamma > 1) or np.any(rgb_gamma < 0):
+        original_min = np.min(rgb_gamma)
+        original_max = np.max(rgb_gamma)
+        print(f"Warning: Gamma corrected RGB values out of range [{original_min:.4f}, {original_max:.4f}]")
+    
+    return rgb_gamma
+
+
+def rgb_to_hex(rgb):
+    """
+    Convert RGB values (0-1) to hexadecimal color code
+    
+    Parameters:
+        rgb: RGB values [R, G, B] (0-1)
+    
+    Returns:
+        Hexadecimal color code (#RRGGBB)
+    """
+    # For display purposes, clip RGB values to [0,1] range
+    rgb_clipped = np.clip(rgb, 0, 1)
+    
+    # Convert RGB values from 0-1 range to 0-255 range
+    rgb_255 = (rgb_clipped * 255).astype(int)
+    
+    # Generate hexadecimal color code
+    hex_color = '#{:02X}{:02X}{:02X}'.format(rgb_255[0], rgb_255[1], rgb_255[2])
+    
+    return hex_color
+
+
+def resample_to_1nm_step(wavelengths, values):
+    """
+    Resample data to 1nm step, mainly for display purposes
+    
+    Parameters:
+        wavelengths: Original wavelength array (usually 5nm step)
+        values: Original data values
+        
+    Returns:
+        (new_wavelengths, new_values): 1nm step wavelength and corresponding values
+    """
+    if len(wavelengths) < 2:
+        return wavelengths, values
+        
+    # Determine new wavelength range (1nm step)
+    start_wl = int(wavelengths[0])
+    end_wl = int(wavelengths[-1])
+    new_wavelengths = np.arange(start_wl, end_wl + 1, 1)
+    
+    # Use linear interpolation to get new values
+    # For wavelengths out of original range, use nearest value
+    new_values = np.interp(
+        new_wavelengths, 
+        wavelengths, 
+        values,
+        left=values[0],   # Left extrapolation value
+        right=values[-1]  # Right extrapolation value
+    )
+    
+    print(f"Data resampling: {len(wavelengths)} points ({wavelengths[0]}-{wavelengths[-1]}nm, step={wavelengths[1]-wavelengths[0]}nm) "
+          f"-> {len(new_wavelengths)} points ({new_wavelengths[0]}-{new_wavelengths[-1]}nm, step=1nm)")
+          
+    return new_wavelengths, new_values
+
+
+def compute_color(measurement, wavelengths, config, tables):
+    """
+    Process measurement data, calculate color parameters
+    
+    Depends only on its arguments, so measurements can be processed concurrently in
+    threads or processes sharing one configuration and one set of tables.
+    
+    Parameters:
+        measurement: Measurement data
+        wavelengths: Wavelength data, if None use default wavelength range
+        config: CalculationConfig
+        tables: SpectralTables
+        
+    Returns:
+        Dictionary containing processing results
+    """
+    try:
+        print("\n============== Starting to process measurement data ==============")
+        
+        if wavelengths is None:
+            wavelengths = DEFAULT_WAVELENGTHS.copy()
+            print(f"Using default wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, {len(wavelengths)} points")
+        else:
+            wavelengths = np.array(wavelengths, dtype=np.float64)
+            print(f"Using provided wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, {len(wavelengths)} points")
+        
+        # 1. Ensure numpy array and check data length consistency
+        measurement = np.array(measurement, dtype=np.float64)
+        if len(wavelengths) != len(measurement):
+            error_msg = f"Wavelength and measurement data length mismatch: Wavelength={len(wavelengths)}, Measurement value={len(measurement)}"
+            print(error_msg)
+            raise ValueError(error_msg)
+        
+        # 2. Calculate reflectance
+        reflectance = compute_reflectance(measurement, config, wavelengths)
+        
+        # 3. Calculate XYZ values
+        xyz = compute_xyz(reflectance, wavelengths, config, tables)
+        
+        # 4. Calculate xy chromaticity coordinates
+        xy = xyz_to_xy(xyz)
+        print(f"xy coordinates: ({xy[0]:.6f}, {xy[1]:.6f})")
+        
+        # 5. Calculate linear RGB values
+        rgb_linear = xyz_to_linear_rgb(xyz)
+        print(f"Linear RGB: ({rgb_linear[0]:.6f}, {rgb_linear[1]:.6f}, {rgb_linear[2]:.6f})")
+        
+        # 6. Apply gamma correction to get sRGB values
+        rgb_gamma = linear_to_gamma_rgb(rgb_linear)
+        print(f"Gamma corrected RGB: ({rgb_gamma[0]:.6f}, {rgb_gamma[1]:.6f}, {rgb_gamma[2]:.6f})")
+        
+        # 7. Convert to hexadecimal color code
+        hex_color = rgb_to_hex(rgb_gamma)
+        print(f"Hexadecimal color: {hex_color}")
+        
+        # 8. For visualization purposes resample reflectance data to 1nm step
+        wavelengths_1nm, reflectance_1nm = resample_to_1nm_step(wavelengths, reflectance)
+        
+        # 9. Return all results
+        return {
+            'reflectance': reflectance,  # Original step reflectance (for calculation)
+            'wavelengths': wavelengths,  # Original step wavelength
+            'reflectance_1nm': reflectance_1nm,  # 1nm step reflectance (for visualization)
+            'wavelengths_1nm': wavelengths_1nm,  # 1nm step wavelength
+            'xyz': xyz,
+            'xy': xy,
+            'rgb_linear': rgb_linear,
+            'rgb_gamma': rgb_gamma,
+            'hex_color': hex_color
+        }
+        
+    except Exception as e:
+        print(f"Error processing measurement data: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        
+        # Return empty result
+        empty_wavelengths = wavelengths if wavelengths is not None else DEFAULT_WAVELENGTHS.copy()
+        return {
+            'reflectance': np.zeros_like(empty_wavelengths),
+            'wavelengths': empty_wavelengths,
+            'reflectance_1nm': np.zeros_like(empty_wavelengths),
+            'wavelengths_1nm': empty_wavelengths,
+            'xyz': np.array([0.0, 0.0, 0.0]),
+            'xy': np.array([0.0, 0.0]),
+            'rgb_linear': np.array([0.0, 0.0, 0.0]),
+            'rgb_gamma': np.array([0.0, 0.0, 0.0]),
+            'hex_color': '#000000'
+        }
+
+
+@lru_cache(maxsize=32)
+def _cached_color_weights(tables, wavelengths, illuminant):
+    """Weight table for color_weights, cached per tables, wavelength grid and illuminant"""
+    if illuminant not in tables.illuminants:
+        raise ValueError(f"Unknown light source '{illuminant}'")
+    illuminant_data = tables.illuminants[illuminant]
+    k = 100.0 / np.sum(illuminant_data * tables.y_bar)
+    weights = k * illuminant_data[:, None] * np.column_stack((tables.x_bar, tables.y_bar, tables.z_bar))
+
+    wavelengths = np.array(wavelengths, dtype=np.float64)
+    if not np.array_equal(wavelengths, tables.wavelengths):
+        # np.interp is linear in the data, so interpolating each unit spectrum gives the
+        # matrix that maps a spectrum on this grid onto the CIE grid (same zero fill as compute_xyz)
+        identity = np.eye(len(wavelengths))
+        interpolation = np.column_stack([
+            np.interp(tables.wavelengths, wavelengths, unit, left=0, right=0) for unit in identity
+        ])
+        weights = interpolation.T @ weights
+    return _read_only(weights)
+
+
+def color_weights(wavelengths, illuminant, tables):
+    """
+    Weights that turn reflectance on a wavelength grid into XYZ with one matrix product
+
+    Combines the light source, the colour matching functions, the normalization k and the
+    interpolation onto the CIE wavelengths of compute_xyz, so reflectance @ weights gives
+    the same XYZ values. Computed once per grid and light source.
+
+    Parameters:
+        wavelengths: Wavelength grid of the reflectance data
+        illuminant: Light source name
+        tables: SpectralTables
+
+    Returns:
+        Read-only (W, 3) array
+    """
+    return _cached_color_weights(tables, tuple(np.asarray(wavelengths, dtype=np.float64).tolist()), illuminant)
+
+
+def reflectance_block(measurements, config, out=None):
+    """
+    Calculate the reflectance of many measurements at once, same formula as compute_reflectance
+
+    Parameters:
+        measurements: (N, W) measurement matrix
+        config: CalculationConfig
+        out: Optional (N, W) float64 array receiving the result (may be measurements itself)
+
+    Returns:
+        (N, W) reflectance matrix
+    """
+    measurements = np.asarray(measurements, dtype=np.float64)
+    if out is None:
+        out = np.empty_like(measurements)
+    if out is not measurements:
+        np.copyto(out, measurements)
+    nan_mask = np.isnan(out)
+    if nan_mask.any():
+        out[nan_mask] = 0.0
+
+    if not config.calibrated:
+        return out
+
+    black_ref, white_ref = config.reference_arrays
+    if out.shape[1] != len(black_ref) or out.shape[1] != len(white_ref):
+        raise ValueError(f"Length mismatch: Measurement={out.shape[1]}, Black reference={len(black_ref)}, White reference={len(white_ref)}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = (white_ref - black_ref) * out
+        np.subtract(out, black_ref, out=out)
+        np.multiply(out, white_ref, out=out)
+        np.divide(out, denominator, out=out)
+        np.multiply(out, config.rho_lambda, out=out)
+    if not np.isfinite(out).all():
+        np.nan_to_num(out, copy=False, nan=0.0, posinf=1.0, neginf=0.0)
+    np.maximum(out, 0, out=out)
+    return out
+
+
+def compute_color_block(reflectance, wavelengths, config, tables):
+    """
+    Calculate the colour values of many reflectance spectra at once
+
+    Gives the same values as compute_color per sample, without the per-sample logging.
+
+    Parameters:
+        reflectance: (N, W) reflectance matrix, e.g. from reflectance_block
+        wavelengths: Wavelength grid of the reflectance data (W,)
+        config: CalculationConfig, provides the light source
+        tables: SpectralTables
+
+    Returns:
+        Dictionary with (N, 3) xyz, (N, 2) xy, (N, 3) rgb_linear and (N, 3) rgb_gamma arrays
+    """
+    # Row sums instead of a matrix product: BLAS may change the summation order with the
+    # block size, this way a sample gets bit-identical values in any block
+    reflectance = np.asarray(reflectance, dtype=np.float64)
+    weights = color_weights(wavelengths, config.illuminant, tables)
+    xyz = np.empty((len(reflectance), 3))
+    for channel in range(3):
+        xyz[:, channel] = (reflectance * weights[:, channel]).sum(axis=1)
+
+    # A zero sum gives xy = (0, 0) like xyz_to_xy
+    total = xyz.sum(axis=1, keepdims=True)
+    xy = xyz[:, :2] / np.where(total == 0, np.inf, total)
+
+    scaled = xyz / 100
+    rgb_linear = scaled[:, 0:1] * SRGB_MATRIX[:, 0] + scaled[:, 1:2] * SRGB_MATRIX[:, 1] + scaled[:, 2:3] * SRGB_MATRIX[:, 2]
+    rgb_gamma = np.where(rgb_linear <= 0.0031308,
+                         np.maximum(12.92 * rgb_linear, 0),
+                         1.055 * np.power(np.maximum(rgb_linear, 0.0031308), 1/2.4) - 0.055)
+
+    return {'xyz': xyz, 'xy': xy, 'rgb_linear': rgb_linear, 'rgb_gamma': rgb_gamma}
+
+
+def hex_colors(rgb_gamma):
+    """
+    Convert many RGB values (0-1) to hexadecimal color codes, same as rgb_to_hex per row
+
+    Parameters:
+        rgb_gamma: (N, 3) RGB values
+
+    Returns:
+        List of hexadecimal color codes (#RRGGBB)
+    """
+    rgb_255 = (np.clip(rgb_gamma, 0, 1) * 255).astype(int)
+    return ['#%02X%02X%02X' % tuple(row) for row in rgb_255.tolist()]
+
 
 class ColorCalculator:
     """
@@ -30,9 +690,12 @@ class ColorCalculator:
         
         # Print key illuminant information for comparison
         self.print_illuminant_info()
-        
+
+        # Read-only tables for the pipeline functions, shared by every calculation
+        self.tables = SpectralTables.from_data(self.cie_1931, self.illuminants)
+
         # Set default wavelength range
-        self.wavelengths = np.arange(380, 781, 5)  # 380-780nm，5nmstep
+        self.wavelengths = DEFAULT_WAVELENGTHS.copy()  # 380-780nm，5nmstep
         
         # Set default parameters
         self.calibration_mode = None
@@ -401,11 +1064,24 @@ class ColorCalculator:
             self.rho_lambda = float(value)
             print(f"Set rho_lambda value to: {self.rho_lambda}")
     
-    def calculate_reflectance(self, measurement, wavelengths=None):
+    def config(self):
         """
-        Calculate reflectance completely following MATLAB's approach
+        Current settings of the calculator as an immutable configuration
         
-        MATLAB code: app.dataRho = (app.data - app.black)./(app.white-app.black).*app.white./app.data*app.rho_Nlambda;
+        Returns:
+            CalculationConfig for compute_color and the other pipeline functions
+        """
+        calibrated = self.calibration_mode and self.black_reference is not None and self.white_reference is not None
+        return CalculationConfig(
+            illuminant=self.illuminant,
+            rho_lambda=self.rho_lambda,
+            black_reference=self.black_reference if calibrated else None,
+            white_reference=self.white_reference if calibrated else None
+        )
+    
+    def calculate_reflectance(self, measurement, wavelengths=None):
+        """
+        Calculate reflectance with the current settings (see compute_reflectance)
         
         Parameters:
             measurement: Measurement data
@@ -414,104 +1090,7 @@ class ColorCalculator:
         Returns:
             Reflectance data
         """
-        if wavelengths is None:
-            wavelengths = self.wavelengths
-        
-        # Ensure input data is numpy array and use same double precision as MATLAB
-        wavelengths = np.array(wavelengths, dtype=np.float64)
-        measurement = np.array(measurement, dtype=np.float64)
-        
-        print(f"Calculating reflectance: Input wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, point count: {len(wavelengths)}")
-        
-        # Check if data is valid
-        if np.any(np.isnan(measurement)):
-            print("Warning: NaN values found in measurement data, these will be replaced with 0")
-            measurement = np.nan_to_num(measurement, nan=0.0)
-        
-        if self.calibration_mode and self.black_reference is not None and self.white_reference is not None:
-            # Ensure black and white reference data are numpy arrays
-            black_ref = np.array(self.black_reference, dtype=np.float64)
-            white_ref = np.array(self.white_reference, dtype=np.float64)
-            
-            # Check length match
-            if len(measurement) != len(black_ref) or len(measurement) != len(white_ref):
-                error_msg = f"Length mismatch: Measurement={len(measurement)}, Black reference={len(black_ref)}, White reference={len(white_ref)}"
-                print(error_msg)
-                raise ValueError(error_msg)
-            
-            print("Using black and white reference for calibration...")
-            print(f"   Black reference range: {np.min(black_ref):.4f}-{np.max(black_ref):.4f}")
-            print(f"   White reference range: {np.min(white_ref):.4f}-{np.max(white_ref):.4f}")
-            print(f"   Measurement data range: {np.min(measurement):.4f}-{np.max(measurement):.4f}")
-            print(f"  rho_lambda value: {self.rho_lambda}")
-            
-            # Select first data point(380nm) for detailed calculation and print for verification
-            if len(wavelengths) > 0 and len(measurement) > 0:
-                idx = 0  # 380nm is usually the first point
-                print(f"Detailed calculation of reflectance at 380nm:")
-                print(f"   Black reference value: {black_ref[idx]:.8f}")
-                print(f"   White reference value: {white_ref[idx]:.8f}")
-                print(f"   Measured value: {measurement[idx]:.8f}")
-                
-                # Manual calculation of reflectance at this point
-                numerator = (measurement[idx] - black_ref[idx]) * white_ref[idx]
-                denominator = (white_ref[idx] - black_ref[idx]) * measurement[idx]
-                reflectance_at_380 = (numerator / denominator) * self.rho_lambda
-                print(f"   Manual calculation formula: ((Measured - Black reference) * White reference) / ((White reference - Black reference) * Measured) * rho_lambda")
-                print(f"   Manual calculated reflectance value: {reflectance_at_380:.8f}")
-            
-            # Check measurement value less than black reference (just for warning, no calculation modification)
-            m_less_than_b = measurement < black_ref
-            count_m_less_than_b = np.sum(m_less_than_b)
-            if count_m_less_than_b > 0:
-                print(f"Warning: {count_m_less_than_b} measured values less than black reference, these may result in negative reflectance")
-                
-                # Output wavelength range of such points
-                problem_wavelengths = wavelengths[m_less_than_b]
-                if len(problem_wavelengths) > 0:
-                    print(f"   Problem wavelength range: {np.min(problem_wavelengths):.1f}-{np.max(problem_wavelengths):.1f} nm")
-            
-            # Completely follow MATLAB's calculation approach, one step calculation of reflectance
-            # MATLAB: app.dataRho = (app.data - app.black)./(app.white-app.black).*app.white./app.data*app.rho_Nlambda;
-            with np.errstate(divide='ignore', invalid='ignore'):  # Ignore divide by zero warnings
-                # Step calculation to maintain exact precision consistent with MATLAB
-                numerator = (measurement - black_ref) * white_ref
-                denominator = (white_ref - black_ref) * measurement
-                reflectance = (numerator / denominator) * self.rho_lambda
-            
-            # Handle results NaN and Inf (consistent with MATLAB)
-            if np.any(np.isnan(reflectance)) or np.any(np.isinf(reflectance)):
-                invalid_count = np.sum(np.isnan(reflectance)) + np.sum(np.isinf(reflectance))
-                print(f"Warning: {invalid_count} invalid reflectance values (NaN/Inf)")
-                reflectance = np.nan_to_num(reflectance, nan=0.0, posinf=1.0, neginf=0.0)
-            
-            # Check negative reflectance (like MATLAB, set negative values to 0)
-            neg_count = np.sum(reflectance < 0)
-            if neg_count > 0:
-                print(f"Warning: {neg_count} negative reflectance values")
-                neg_min = np.min(reflectance[reflectance < 0])
-                print(f"   Minimum negative value: {neg_min:.4f}")
-                # Like MATLAB, set negative values to 0
-                reflectance[reflectance < 0] = 0
-            
-            # Check reflectance greater than 1 (just for information, keep consistent with MATLAB)
-            over_count = np.sum(reflectance > 1.0)
-            if over_count > 0:
-                print(f"Warning: {over_count} reflectance values greater than 1.0")
-                over_max = np.max(reflectance[reflectance > 1.0])
-                print(f"   Maximum value: {over_max:.4f}")
-                # Keep values greater than 1 unchanged, consistent with MATLAB
-            
-            print(f"Reflectance calculation completed: Range {np.min(reflectance):.4f}-{np.max(reflectance):.4f}")
-            
-            # Check and print calculation result of 380nm again
-            if len(reflectance) > 0:
-                print(f"Final reflectance at 380nm: {reflectance[0]:.8f}")
-            
-            return reflectance
-        else:
-            print("Calibration mode not set or reference data, return original measurement data")
-            return measurement
+        return compute_reflectance(measurement, self.config(), wavelengths)
     
     def interpolate_data(self, wavelengths, values, target_wavelengths=None):
         """
@@ -529,6 +1108,7 @@ class ColorCalculator:
             target_wavelengths = self.wavelengths
         
         # Create interpolation function
+        import scipy.interpolate as interp
         f = interp.interp1d(wavelengths, values, kind='linear', bounds_error=False, fill_value=0)
         
         # Execute interpolation
@@ -610,6 +1190,7 @@ class ColorCalculator:
             # If wavelengths are not consistent, use interpolation
             if len(wavelengths) != len(cie_wavelengths) or not np.allclose(wavelengths, cie_wavelengths):
                 # Interpolate reflectance data to match CIE wavelengths
+                import scipy.interpolate as interp
                 interp_func = interp.interp1d(
                     wavelengths,
                     reflectance,
@@ -647,205 +1228,36 @@ class ColorCalculator:
     
     def calculate_xyz_matlab_compatible(self, reflectance, wavelengths):
         """
-        Calculate CIE XYZ values using method completely compatible with MATLAB
-        This function completely replicates MATLAB's xyXYZ function implementation:
-        
-        function [x,y,X,Y,Z] = xyXYZ(app,S,data)
-            phi = S.*data;
-            k = 100./(sum(S.*app.xyzBar(:,2)));
-            X = k.*sum(phi.*app.xyzBar(:,1));
-            Y = k.*sum(phi.*app.xyzBar(:,2));
-            Z = k.*sum(phi.*app.xyzBar(:,3));
-            
+        Calculate CIE XYZ values with the current light source (see compute_xyz)
+        
         Parameters:
-            reflectance: Reflectance data (MATLAB's data)
+            reflectance: Reflectance data
             wavelengths: Wavelength corresponding to reflectance data
             
         Returns:
             CIE XYZ three values
         """
-        try:
-            # Check input data
-            if reflectance is None or wavelengths is None:
-                print("Warning: Reflectance or wavelength data is empty")
-                return np.array([np.nan, np.nan, np.nan])
-                
-            # Ensure input data is numpy array
-            reflectance = np.array(reflectance)
-            wavelengths = np.array(wavelengths)
-            
-            if len(reflectance) == 0 or len(wavelengths) == 0:
-                print("Warning: Reflectance or wavelength data length is 0")
-                return np.array([np.nan, np.nan, np.nan])
-            
-            # Use CIE data loaded from CSV (i.e., MATLAB's xyzBar data)
-            cie_wavelengths = self.cie_1931['wavelengths']
-            cie_x = self.cie_1931['x']
-            cie_y = self.cie_1931['y']
-            cie_z = self.cie_1931['z']
-            
-            # Get current light source data (MATLAB's S)
-            illuminant = self.illuminant  # Current light source name
-            illuminant_data = self.illuminants[illuminant]
-            
-            # Ensure reflectance data, light source data, and CIE data wavelength step consistency
-            # If needed, interpolate to same wavelength points
-            if not np.array_equal(wavelengths, cie_wavelengths):
-                print(f"Reflectance data wavelength and CIE data wavelength inconsistent, perform matching")
-                # Use linear interpolation to match different step length data
-                # Note: In MATLAB equivalent to interp1 function
-                matched_reflectance = np.interp(
-                    cie_wavelengths,
-                    wavelengths,
-                    reflectance,
-                    left=0,  # Out of bounds left value set to 0
-                    right=0  # Out of bounds right value set to 0
-                )
-            else:
-                matched_reflectance = reflectance
-            
-            # Ensure light source data length consistent with CIE data
-            if len(illuminant_data) != len(cie_wavelengths):
-                print(f"Light source data length({len(illuminant_data)}) inconsistent with CIE data length({len(cie_wavelengths)})")
-                # Assume this is due to different step length when using built-in light source data
-                if len(illuminant_data) == 81 and len(cie_wavelengths) == 401:
-                    # Interpolate 5nm step length light source data to 1nm step length
-                    original_wl = np.arange(380, 781, 5)  # Original 5nm step length wavelength
-                    illuminant_data = np.interp(
-                        cie_wavelengths,
-                        original_wl,
-                        illuminant_data,
-                        left=0, right=0
-                    )
-                else:
-                    print(f"Unable to determine how to match light source data, may result in calculation error")
-            
-            # Completely follow MATLAB's xyXYZ function calculation
-            # MATLAB: phi = S.*data;
-            phi = illuminant_data * matched_reflectance
-            
-            # MATLAB: k = 100./(sum(S.*app.xyzBar(:,2)));
-            k = 100.0 / np.sum(illuminant_data * cie_y)
-            
-            # MATLAB: X = k.*sum(phi.*app.xyzBar(:,1));
-            X = k * np.sum(phi * cie_x)
-            Y = k * np.sum(phi * cie_y)
-            Z = k * np.sum(phi * cie_z)
-            
-            print(f"MATLAB compatible calculation: X={X:.6f}, Y={Y:.6f}, Z={Z:.6f}")
-            
-            return np.array([X, Y, Z])
-        
-        except Exception as e:
-            print(f"Error calculating XYZ: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return np.array([np.nan, np.nan, np.nan])
+        return compute_xyz(reflectance, wavelengths, self.config(), self.tables)
     
     def xyz_to_xy(self, XYZ):
-        """
-        Calculate xy chromaticity coordinates from XYZ values (completely following MATLAB's implementation)
-        
-        Parameters:
-            XYZ: XYZ values [X, Y, Z]
-        
-        Returns:
-            xy values [x, y]
-        """
-        # MATLAB implementation:
-        # x = X./(X + Y + Z);
-        # y = Y./(X + Y + Z);
-        denominator = XYZ[0] + XYZ[1] + XYZ[2]
-        if denominator == 0:
-            return np.array([0, 0])
-        
-        x = XYZ[0] / denominator
-        y = XYZ[1] / denominator
-        
-        return np.array([x, y])
+        """Calculate xy chromaticity coordinates from XYZ values (see xyz_to_xy)"""
+        return xyz_to_xy(XYZ)
     
     def xyz_to_linear_rgb(self, XYZ):
-        """
-        Calculate linear RGB values from XYZ values
-        
-        Parameters:
-            XYZ: XYZ values [X, Y, Z]
-        
-        Returns:
-            Linear RGB values [R, G, B]
-        """
-        # Standard sRGB conversion matrix
-        M = np.array([
-            [3.2406, -1.5372, -0.4986],
-            [-0.9689, 1.8758, 0.0415],
-            [0.0557, -0.2040, 1.0570]
-        ])
-        
-        # Standardize XYZ values (divide by 100)
-        XYZ_normalized = np.array([XYZ[0]/100, XYZ[1]/100, XYZ[2]/100])
-        
-        # Apply transformation matrix
-        rgb_linear = np.dot(M, XYZ_normalized)
-        
-        # Check negative values and print warning
-        if np.any(rgb_linear < 0):
-            print(f"Warning: Linear RGB has negative values {rgb_linear}, this may result in out-of-gamut color")
-        
-        return rgb_linear
+        """Calculate linear RGB values from XYZ values (see xyz_to_linear_rgb)"""
+        return xyz_to_linear_rgb(XYZ)
     
     def linear_to_gamma_rgb(self, rgb_linear):
-        """
-        Calculate gamma corrected sRGB values from linear RGB values
-        
-        Parameters:
-            rgb_linear: Linear RGB values [R, G, B]
-        
-        Returns:
-            Gamma corrected sRGB values [R', G', B']
-        """
-        rgb_gamma = np.zeros_like(rgb_linear)
-        
-        # Apply sRGB standard gamma correction
-        for i in range(len(rgb_linear)):
-            if rgb_linear[i] <= 0.0031308:
-                rgb_gamma[i] = 12.92 * rgb_linear[i]
-                if rgb_linear[i] < 0:
-                    rgb_gamma[i] = 0
-            else:
-                rgb_gamma[i] = 1.055 * (rgb_linear[i] ** (1/2.4)) - 0.055
-        
-        # Check out-of-range values and just print warning (no clipping), consistent with MATLAB
-        if np.any(rgb_gamma > 1) or np.any(rgb_gamma < 0):
-            original_min = np.min(rgb_gamma)
-            original_max = np.max(rgb_gamma)
-            print(f"Warning: Gamma corrected RGB values out of range [{original_min:.4f}, {original_max:.4f}]")
-        
-        return rgb_gamma
+        """Calculate gamma corrected sRGB values from linear RGB values (see linear_to_gamma_rgb)"""
+        return linear_to_gamma_rgb(rgb_linear)
     
     def rgb_to_hex(self, rgb):
-        """
-        Convert RGB values (0-1) to hexadecimal color code
-        
-        Parameters:
-            rgb: RGB values [R, G, B] (0-1)
-        
-        Returns:
-            Hexadecimal color code (#RRGGBB)
-        """
-        # For display purposes, clip RGB values to [0,1] range
-        rgb_clipped = np.clip(rgb, 0, 1)
-        
-        # Convert RGB values from 0-1 range to 0-255 range
-        rgb_255 = (rgb_clipped * 255).astype(int)
-        
-        # Generate hexadecimal color code
-        hex_color = '#{:02X}{:02X}{:02X}'.format(rgb_255[0], rgb_255[1], rgb_255[2])
-        
-        return hex_color
+        """Convert RGB values (0-1) to hexadecimal color code (see rgb_to_hex)"""
+        return rgb_to_hex(rgb)
     
     def process_measurement(self, measurement, wavelengths=None):
         """
-        Process measurement data, calculate color parameters
+        Process measurement data with the current settings (see compute_color)
         
         Parameters:
             measurement: Measurement data
@@ -854,96 +1266,7 @@ class ColorCalculator:
         Returns:
             Dictionary containing processing results
         """
-        try:
-            print("\n============== Starting to process measurement data ==============")
-            
-            if wavelengths is None:
-                wavelengths = self.wavelengths
-                print(f"Using default wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, {len(wavelengths)} points")
-            else:
-                wavelengths = np.array(wavelengths, dtype=np.float64)
-                print(f"Using provided wavelength range: {np.min(wavelengths):.1f}-{np.max(wavelengths):.1f} nm, {len(wavelengths)} points")
-            
-            # 1. Check input data
-            print("Checking input data...")
-            
-            # Ensure numpy array
-            measurement = np.array(measurement, dtype=np.float64)
-            
-            # Check data length consistency
-            if len(wavelengths) != len(measurement):
-                error_msg = f"Wavelength and measurement data length mismatch: Wavelength={len(wavelengths)}, Measurement value={len(measurement)}"
-                print(error_msg)
-                raise ValueError(error_msg)
-            
-            # Save original wavelength array for final return
-            original_wavelengths = wavelengths.copy()
-            
-            # 2. Calculate reflectance
-            print("Calculating reflectance...")
-            reflectance = self.calculate_reflectance(measurement, wavelengths)
-            
-            # 3. Calculate XYZ values
-            print("Calculating XYZ values...")
-            xyz = self.calculate_xyz(reflectance, wavelengths)
-            
-            # 4. Calculate xy chromaticity coordinates
-            print("Calculating xy chromaticity coordinates...")
-            xy = self.xyz_to_xy(xyz)
-            print(f"xy coordinates: ({xy[0]:.6f}, {xy[1]:.6f})")
-            
-            # 5. Calculate linear RGB values
-            print("Calculating linear RGB values...")
-            rgb_linear = self.xyz_to_linear_rgb(xyz)
-            print(f"Linear RGB: ({rgb_linear[0]:.6f}, {rgb_linear[1]:.6f}, {rgb_linear[2]:.6f})")
-            
-            # 6. Apply gamma correction to get sRGB values
-            print("Applying gamma correction...")
-            rgb_gamma = self.linear_to_gamma_rgb(rgb_linear)
-            print(f"Gamma corrected RGB: ({rgb_gamma[0]:.6f}, {rgb_gamma[1]:.6f}, {rgb_gamma[2]:.6f})")
-            
-            # 7. Convert to hexadecimal color code
-            hex_color = self.rgb_to_hex(rgb_gamma)
-            print(f"Hexadecimal color: {hex_color}")
-            
-            # 8. For visualization purposes resample reflectance data to 1nm step
-            print("Preparing 1nm step reflectance data for visualization...")
-            wavelengths_1nm, reflectance_1nm = self.resample_to_1nm_step(wavelengths, reflectance)
-            
-            # 9. Return all results
-            results = {
-                'reflectance': reflectance,  # Original step reflectance (for calculation)
-                'wavelengths': wavelengths,  # Original step wavelength
-                'reflectance_1nm': reflectance_1nm,  # 1nm step reflectance (for visualization)
-                'wavelengths_1nm': wavelengths_1nm,  # 1nm step wavelength
-                'xyz': xyz,
-                'xy': xy,
-                'rgb_linear': rgb_linear,
-                'rgb_gamma': rgb_gamma,
-                'hex_color': hex_color
-            }
-            
-            print("Processing completed")
-            return results
-            
-        except Exception as e:
-            print(f"Error processing measurement data: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-            # Return empty result
-            empty_wavelengths = wavelengths if wavelengths is not None else self.wavelengths
-            return {
-                'reflectance': np.zeros_like(empty_wavelengths),
-                'wavelengths': empty_wavelengths,
-                'reflectance_1nm': np.zeros_like(empty_wavelengths),
-                'wavelengths_1nm': empty_wavelengths,
-                'xyz': np.array([0.0, 0.0, 0.0]),
-                'xy': np.array([0.0, 0.0]),
-                'rgb_linear': np.array([0.0, 0.0, 0.0]),
-                'rgb_gamma': np.array([0.0, 0.0, 0.0]),
-                'hex_color': '#000000'
-            }
+        return compute_color(measurement, wavelengths, self.config(), self.tables)
     
     def process_multiple_measurements(self, measurement_files, black_data=None, white_data=None):
         """
@@ -963,6 +1286,11 @@ class ColorCalculator:
         
         results = []
         
+        # One configuration for the whole batch, the calculator itself is left unchanged
+        config = None
+        if black_data is not None and white_data is not None:
+            config = replace(self.config(), black_reference=black_data[1], white_reference=white_data[1])
+        
         for file_info in measurement_files:
             file_path, wavelengths, data = file_info
             
@@ -971,15 +1299,9 @@ class ColorCalculator:
             
             try:
                 # Calculate reflectance
-                if black_data is not None and white_data is not None:
-                    black_wavelengths, black_values = black_data
-                    white_wavelengths, white_values = white_data
-                    
-                    # Set calibration mode
-                    self.set_calibration_mode(True, black_values, white_values)
-                    
+                if config is not None:
                     # Calculate reflectance
-                    reflectance_data = self.calculate_reflectance(data, wavelengths)
+                    reflectance_data = compute_reflectance(data, config, wavelengths)
                     
                     if reflectance_data is not None:
                         # Store results
@@ -991,13 +1313,13 @@ class ColorCalculator:
                         }
                         
                         # Calculate CIE XYZ values and chromaticity coordinates
-                        xyz = self.calculate_xyz(reflectance_data, wavelengths)
-                        xy = self.xyz_to_xy(xyz)
+                        xyz = compute_xyz(reflectance_data, wavelengths, config, self.tables)
+                        xy = xyz_to_xy(xyz)
                         
                         # Calculate RGB values
-                        rgb_linear = self.xyz_to_linear_rgb(xyz)
-                        rgb_gamma = self.linear_to_gamma_rgb(rgb_linear)
-                        hex_color = self.rgb_to_hex(rgb_gamma)
+                        rgb_linear = xyz_to_linear_rgb(xyz)
+                        rgb_gamma = linear_to_gamma_rgb(rgb_linear)
+                        hex_color = rgb_to_hex(rgb_gamma)
                         
                         # Add results to result dictionary
                         result.update({
@@ -1139,38 +1461,8 @@ class ColorCalculator:
         return source_data
     
     def resample_to_1nm_step(self, wavelengths, values):
-        """
-        Resample data to 1nm step, mainly for display purposes
-        
-        Parameters:
-            wavelengths: Original wavelength array (usually 5nm step)
-            values: Original data values
-            
-        Returns:
-            (new_wavelengths, new_values): 1nm step wavelength and corresponding values
-        """
-        if len(wavelengths) < 2:
-            return wavelengths, values
-            
-        # Determine new wavelength range (1nm step)
-        start_wl = int(wavelengths[0])
-        end_wl = int(wavelengths[-1])
-        new_wavelengths = np.arange(start_wl, end_wl + 1, 1)
-        
-        # Use linear interpolation to get new values
-        # For wavelengths out of original range, use nearest value
-        new_values = np.interp(
-            new_wavelengths, 
-            wavelengths, 
-            values,
-            left=values[0],   # Left extrapolation value
-            right=values[-1]  # Right extrapolation value
-        )
-        
-        print(f"Data resampling: {len(wavelengths)} points ({wavelengths[0]}-{wavelengths[-1]}nm, step={wavelengths[1]-wavelengths[0]}nm) "
-              f"-> {len(new_wavelengths)} points ({new_wavelengths[0]}-{new_wavelengths[-1]}nm, step=1nm)")
-              
-        return new_wavelengths, new_values
+        """Resample data to 1nm step, mainly for display purposes (see resample_to_1nm_step)"""
+        return resample_to_1nm_step(wavelengths, values)
     
     def extract_instrument_values(self, measurement_file):
         """
@@ -0,0 +1,364 @@
+import os
+import json
+import queue
+import threading
+import multiprocessing
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from color_calculator import CalculationConfig, reflectance_block, compute_color_block, color_weights, hex_colors
+
+
+# Default address of the service, local connections only
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# How long the batcher waits for more requests with the same settings before computing
+BATCH_WINDOW_SECONDS = 0.002
+
+# Maximum spectra computed in one worker task
+MAX_BATCH_ROWS = 50000
+
+# Largest accepted request body
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+
+# Worker process state, set once by the pool initializer
+_worker_state = {}
+
+
+def _init_worker(tables):
+    """Process pool initializer: keep the spectral tables for every task of this worker"""
+    _worker_state['tables'] = tables
+
+
+def compute_colors(measurements, wavelengths, config, tables):
+    """
+    Reflectance and colour values of a measurement block
+
+    Returns:
+        Dictionary with (N, W) reflectance and the colour arrays of compute_color_block
+    """
+    reflectance = reflectance_block(measurements, config)
+    values = compute_color_block(reflectance, wavelengths, config, tables)
+    values['reflectance'] = reflectance
+    return values
+
+
+def _compute_in_worker(measurements, wavelengths, config):
+    """Compute a block inside a worker process with its cached tables and weights"""
+    return compute_colors(measurements, wavelengths, config, _worker_state['tables'])
+
+
+class RequestBatcher:
+    """
+    Collect concurrent requests and compute those with the same settings together
+
+    Requests are queued with their settings; a dispatcher thread takes the first
+    waiting request, gathers the others with the same configuration and wavelength
+    grid that arrive within the batch window, and computes them as one block on the
+    worker pool (or in the dispatcher thread without a pool).
+    """
+
+    def __init__(self, tables, executor=None, batch_window=BATCH_WINDOW_SECONDS, max_rows=MAX_BATCH_ROWS):
+        self.tables = tables
+        self.executor = executor
+        self.batch_window = batch_window
+        self.max_rows = max_rows
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self._dispatch, name="color-service-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, measurements, wavelengths, config):
+        """
+        Queue a measurement block
+
+        Returns:
+            Future of the compute_colors result of this block
+        """
+        future = Future()
+        key = (config, tuple(wavelengths.tolist()))
+        self.pending.put((key, measurements, wavelengths, config, future))
+        return future
+
+    def close(self):
+        """Stop the dispatcher thread after the queued requests"""
+        self.pending.put(None)
+        self.thread.join()
+
+    def _dispatch(self):
+        """Dispatcher thread: group queued requests into batches"""
+        deferred = []
+        while True:
+            item = deferred.pop(0) if deferred else self.pending.get()
+            if item is None:
+                return
+            batch = [item]
+            rows = len(item[1])
+            while rows < self.max_rows:
+                try:
+                    other = self.pending.get(timeout=self.batch_window)
+                except queue.Empty:
+                    break
+                if other is None or other[0] != item[0]:
+                    deferred.append(other)
+                    if other is None:
+                        break
+                    continue
+                batch.append(other)
+                rows += len(other[1])
+            self._run(batch)
+
+    def _run(self, batch):
+        """Compute one batch and hand every request its rows"""
+        _, _, wavelengths, config, _ = batch[0]
+        self.batches += 1
+        block = np.concatenate([measurements for _, measurements, _, _, _ in batch]) if len(batch) > 1 else batch[0][1]
+        try:
+            if self.executor is None:
+                future = Future()
+                future.set_result(compute_colors(block, wavelengths, config, self.tables))
+            else:
+                future = self.executor.submit(_compute_in_worker, block, wavelengths, config)
+        except Exception as e:
+            for *_, request_future in batch:
+                request_future.set_exception(e)
+            return
+        future.add_done_callback(lambda done: self._split(batch, done))
+
+    @staticmethod
+    def _split(batch, done):
+        """Distribute the rows of a finished batch to its requests"""
+        error = done.exception()
+        start = 0
+        for _, measurements, _, _, request_future in batch:
+            if error is not None:
+                request_future.set_exception(error)
+                continue
+            stop = start + len(measurements)
+            request_future.set_result({key: values[start:stop] for key, values in done.result().items()})
+            start = stop
+
+
+def parse_compute_request(request, defaults):
+    """
+    Measurement block and configuration of a /compute request
+
+    Parameters:
+        request: Decoded JSON body, {"spectra": [[...], ...], "wavelengths": [...]} with optional
+            "names", "illuminant", "rho_lambda", "black_reference", "white_reference" and
+            "include_reflectance"
+        defaults: Service defaults {'wavelengths', 'config'}
+
+    Returns:
+        (names, measurements, wavelengths, config)
+
+    Raises:
+        ValueError: If the request is invalid
+    """
+    if not isinstance(request, dict) or 'spectra' not in request:
+        raise ValueError("Request needs a 'spectra' list")
+    measurements = np.array(request['spectra'], dtype=np.float64)
+    if measurements.ndim == 1:
+        measurements = measurements[None, :]
+    if measurements.ndim != 2:
+        raise ValueError("'spectra' must be a list of equally long value lists")
+
+    wavelengths = request.get('wavelengths', defaults['wavelengths'])
+    if wavelengths is None:
+        raise ValueError("Request needs 'wavelengths' (the service has no default grid)")
+    wavelengths = np.array(wavelengths, dtype=np.float64)
+    if measurements.shape[1] != len(wavelengths):
+        raise ValueError(f"{measurements.shape[1]} values per spectrum for {len(wavelengths)} wavelengths")
+
+    names = request.get('names') or [f"sample{i + 1}" for i in range(len(measurements))]
+    if len(names) != len(measurements):
+        raise ValueError(f"{len(names)} names for {len(measurements)} spectra")
+
+    config = defaults['config']
+    if ('black_reference' in request) != ('white_reference' in request):
+        raise ValueError("Calibration needs both 'black_reference' and 'white_reference'")
+    overrides = {key: request[key] for key in ('illuminant', 'rho_lambda', 'black_reference', 'white_reference')
+                 if key in request}
+    if overrides:
+        settings = {'illuminant': config.illuminant, 'rho_lambda': config.rho_lambda,
+                    'black_reference': config.black_reference, 'white_reference': config.white_reference}
+        settings.update(overrides)
+        try:
+            config = CalculationConfig(**settings)
+        except TypeError as e:
+            raise ValueError(f"Invalid calculation settings: {e}") from None
+    if config.calibrated:
+        for name, reference in (('black_reference', config.black_reference), ('white_reference', config.white_reference)):
+            if len(reference) != len(wavelengths):
+                raise ValueError(f"'{name}' has {len(reference)} values for {len(wavelengths)} wavelengths")
+    return names, measurements, wavelengths, config
+
+
+def compute_response(names, values, include_reflectance=False):
+    """JSON response of a computed request, one list per quantity in sample order"""
+    response = {
+        'names': list(names),
+        'xyz': values['xyz'].tolist(),
+        'xy': values['xy'].tolist(),
+        'rgb_linear': values['rgb_linear'].tolist(),
+        'rgb_gamma': values['rgb_gamma'].tolist(),
+        'hex_color': hex_colors(values['rgb_gamma'])
+    }
+    if include_reflectance:
+        response['reflectance'] = values['reflectance'].tolist()
+    return response
+
+
+class ColorServiceHandler(BaseHTTPRequestHandler):
+    """HTTP handler: GET /health, POST /compute"""
+
+    server_version = "AleksameterColorService/1.0"
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/compute':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError(f"Request larger than {MAX_REQUEST_BYTES} bytes")
+            request = json.loads(self.rfile.read(length))
+            self._send_json(200, self.server.service.compute(request))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            print(f"Error computing request: {e}")
+            self._send_json(500, {'error': str(e)})
+
+    def _send_json(self, status, body):
+        """Write a JSON response"""
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Requests are not logged one by one"""
+
+
+class ColorService:
+    """
+    Local colour computation service
+
+    Keeps the spectral tables loaded and a pool of worker processes with their
+    weight tables warm, and answers JSON requests over HTTP. Concurrent requests
+    with the same settings are computed together (see RequestBatcher).
+
+    Parameters:
+        tables: SpectralTables (ColorCalculator.tables)
+        config: Default CalculationConfig of requests without their own settings
+        wavelengths: Default wavelength grid of requests without wavelengths
+        host, port: Listening address, port 0 picks a free port
+        workers: Worker processes, 0 computes in the dispatcher thread
+    """
+
+    def __init__(self, tables, config=None, wavelengths=None, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None,
+                 batch_window=BATCH_WINDOW_SECONDS):
+        self.defaults = {'config': config or CalculationConfig(), 'wavelengths': wavelengths}
+        self.executor = None
+        self.workers = os.cpu_count() or 1 if workers is None else workers
+        if self.workers > 0:
+            # Use spawn so workers do not inherit the listening socket and threads of the server
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=_init_worker, initargs=(tables,))
+        self.batcher = RequestBatcher(tables, self.executor, batch_window)
+        self.requests = 0
+        self.spectra = 0
+        self.lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), ColorServiceHandler)
+        self.server.daemon_threads = True
+        self.server.service = self
+        if wavelengths is not None:
+            color_weights(wavelengths, self.defaults['config'].illuminant, tables)
+
+    @property
+    def url(self):
+        """Base URL of the service"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def health(self):
+        """Status of the service"""
+        with self.lock:
+            return {'status': 'ok', 'workers': self.workers, 'requests': self.requests, 'spectra': self.spectra,
+                    'batches': self.batcher.batches}
+
+    def compute(self, request):
+        """Answer a /compute request, see parse_compute_request"""
+        names, measurements, wavelengths, config = parse_compute_request(request, self.defaults)
+        values = self.batcher.submit(measurements, wavelengths, config).result()
+        with self.lock:
+            self.requests += 1
+            self.spectra += len(measurements)
+        return compute_response(names, values, bool(request.get('include_reflectance', False)))
+
+    def serve_forever(self):
+        """Answer requests until shutdown() is called"""
+        print(f"Color service listening on {self.url} with {self.workers} worker(s)")
+        self.server.serve_forever()
+
+    def start(self):
+        """Answer requests in a background thread, returns the thread"""
+        thread = threading.Thread(target=self.server.serve_forever, name="color-service", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """Stop answering requests and stop the workers"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def request_colors(url, spectra, wavelengths=None, timeout=60, **settings):
+    """
+    Compute spectra on a running colour service
+
+    Parameters:
+        url: Base URL of the service, e.g. http://127.0.0.1:8765
+        spectra: (N, W) measurement values
+        wavelengths: Wavelength grid, None for the service default
+        timeout: Seconds to wait for the answer
+        settings: Optional names, illuminant, rho_lambda, black_reference, white_reference,
+            include_reflectance
+
+    Returns:
+        Decoded JSON response (see compute_response)
+
+    Raises:
+        ValueError: If the service rejected the request
+    """
+    request = {'spectra': np.asarray(spectra, dtype=np.float64).tolist()}
+    if wavelengths is not None:
+        request['wavelengths'] = np.asarray(wavelengths, dtype=np.float64).tolist()
+    for key, value in settings.items():
+        request[key] = value.tolist() if isinstance(value, np.ndarray) else value
+
+    http_request = urllib.request.Request(f"{url}/compute", data=json.dumps(request).encode('utf-8'),
+                                          headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise ValueError(json.loads(e.read()).get('error', str(e))) from None
@@ -44,6 +44,7 @@ a = Analysis(
         'scipy.special._ufuncs_cxx',
         # Other required modules
         'openpyxl',
+        'pyarrow',
         'colour',
         'PIL',
         'json',
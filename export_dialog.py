@@ -1,11 +1,14 @@
 import os
-import pandas as pd
-import numpy as np
+import copy
+import importlib.util
+from functools import partial
 from PySide6.QtWidgets import (
-    QDialog, QFileDialog, QMessageBox, QPushButton, QLineEdit, QHBoxLayout, QWidget
+    QDialog, QFileDialog, QMessageBox, QPushButton, QLineEdit, QHBoxLayout, QWidget, QComboBox
 )
 from PySide6.QtCore import Qt
 from ui_export_dialog import Ui_Dialog_export
+from export_tables import EXPORT_FORMATS, export_wavelengths, export_snapshot, export_units, export_data_file
+from export_jobs import ExportJob
 
 class ExportDialog(QDialog):
     def __init__(self, data, settings, parent=None):
@@ -27,6 +30,16 @@ class ExportDialog(QDialog):
         self.ui = Ui_Dialog_export()
         self.ui.setupUi(self)
         
+        # Columnar and line-delimited formats, and the table layout of the columnar ones
+        self.ui.comboBox_Export_Format.addItem("Parquet (.parquet)")
+        self.ui.comboBox_Export_Format.addItem("Arrow IPC (.arrow)")
+        self.ui.comboBox_Export_Format.addItem("JSON Lines (.ndjson)")
+        self.comboBox_Export_Layout = QComboBox(self.ui.groupBox_Export_File)
+        self.comboBox_Export_Layout.addItems(["Wide", "Long"])
+        self.comboBox_Export_Layout.setToolTip("Wide: one reflectance column per sample\n"
+                                               "Long: one row per sample and wavelength")
+        self.ui.formLayout.addRow("Table Layout:", self.comboBox_Export_Layout)
+        
         # Ensure settings has export_dialog section
         if 'export_dialog' not in self.settings:
             self.settings['export_dialog'] = {}
@@ -46,6 +59,9 @@ class ExportDialog(QDialog):
         self.ui.pushButton_Export_Browse.clicked.connect(self.browse_file)
         
         # Connect confirmation button signals
+        # on_accepted validates the input and closes the dialog only once the export job is
+        # started, so drop the direct accept() connection made by setupUi
+        self.ui.buttonBox.accepted.disconnect()
         self.ui.buttonBox.accepted.connect(self.on_accepted)
         self.ui.buttonBox.rejected.connect(self.reject)
         
@@ -61,6 +77,7 @@ class ExportDialog(QDialog):
         # Settings file format
         format_index = export_dialog_settings.get('format_index', 0)  # Default to Excel (index 0)
         self.ui.comboBox_Export_Format.setCurrentIndex(format_index)
+        self.comboBox_Export_Layout.setCurrentText(export_dialog_settings.get('table_layout', 'Wide'))
         
         # Set selected data types
         export_rho = export_dialog_settings.get('export_rho', True)
@@ -85,16 +102,10 @@ class ExportDialog(QDialog):
 
         # Get the currently selected file format
         format_idx = self.ui.comboBox_Export_Format.currentIndex()
-        if format_idx == 0:
-            ext = ".xlsx"
-        elif format_idx == 1:
-            ext = ".csv"
-        elif format_idx == 2:
-            ext = ".txt"
-        elif format_idx == 3:
-            ext = ".json"
-        else:
-            ext = ".txt" # Fallback
+        ext = EXPORT_FORMATS[format_idx][1] if 0 <= format_idx < len(EXPORT_FORMATS) else ".txt"
+        
+        # The table layout only applies to the columnar formats
+        self.comboBox_Export_Layout.setEnabled(ext in ('.parquet', '.arrow'))
             
         # Change the extension
         base_name = os.path.splitext(current_path)[0]
@@ -107,18 +118,8 @@ class ExportDialog(QDialog):
         
         # Get the currently selected file format
         format_idx = self.ui.comboBox_Export_Format.currentIndex()
-        if format_idx == 0:
-            filter_text = "Excel Files (*.xlsx)"
-            ext = ".xlsx"
-        elif format_idx == 1:
-            filter_text = "CSV Files (*.csv)"
-            ext = ".csv"
-        elif format_idx == 2:
-            filter_text = "Text Files (*.txt)"
-            ext = ".txt"
-        elif format_idx == 3:
-            filter_text = "JSON Files (*.json)"
-            ext = ".json"
+        if 0 <= format_idx < len(EXPORT_FORMATS):
+            _, ext, filter_text = EXPORT_FORMATS[format_idx]
         else:
             filter_text = "Text Files (*.txt)" # Fallback
             ext = ".txt"
@@ -157,540 +158,49 @@ class ExportDialog(QDialog):
             QMessageBox.warning(self, "Export Error", "Please specify an export file path.")
             return
         
-        # Call the appropriate export function based on the selected format
+        # Get the selected format
         format_idx = self.ui.comboBox_Export_Format.currentIndex()
         
         # Ensure correct extension
-        if format_idx == 0 and not file_path.lower().endswith('.xlsx'):
-            file_path += '.xlsx'
-        elif format_idx == 1 and not file_path.lower().endswith('.csv'):
-            file_path += '.csv'
-        elif format_idx == 2 and not file_path.lower().endswith('.txt'):
-            file_path += '.txt'
-        elif format_idx == 3 and not file_path.lower().endswith('.json'):
-            file_path += '.json'
-        
-        success = False
-        
-        if format_idx == 0:
-            success = self.export_to_excel(file_path, export_rho, export_color)
-        elif format_idx == 1:
-            success = self.export_to_csv(file_path, export_rho, export_color)
-        elif format_idx == 2:
-            success = self.export_to_txt(file_path, export_rho, export_color)
-        elif format_idx == 3:
-            success = self.export_to_json(file_path, export_rho, export_color)
+        format_name, ext, _ = EXPORT_FORMATS[format_idx]
+        if not file_path.lower().endswith(ext):
+            file_path += ext
         
-        if success:
-            # Save export directory to settings
-            self.settings['export']['default_directory'] = os.path.dirname(file_path)
-            # Also save as last used directory
-            self.settings['export']['last_directory'] = os.path.dirname(file_path)
-            
-            # Save current selections to settings
-            self.settings['export_dialog']['format_index'] = format_idx
-            self.settings['export_dialog']['export_rho'] = export_rho
-            self.settings['export_dialog']['export_color'] = export_color
-            
-            # Also update default format
-            self.settings['export']['default_format'] = ['xlsx', 'csv', 'txt', 'json'][format_idx]
-            
-            # Save settings
-            if self.parent:
-                self.parent.save_settings()
-            
-            # Show success message
-            QMessageBox.information(self, "Success", f"Data successfully exported to {file_path}")
-            
-            # Close dialog
-            self.accept()
-        else:
-             # If success is False, an error message should have been shown already by the export function
-             # But as a fallback:
-             msg_box_result = QMessageBox.question(self, "Error", "Export failed. Please check the file path and permissions.", QMessageBox.StandardButton.Ok)
-             if msg_box_result == QMessageBox.StandardButton.Ok:
-                  print("Export failed message shown and acknowledged by user.") # Fallback message
-    
-    def export_to_excel(self, file_path, export_rho=True, export_color=True):
-        """Export data to an Excel file, with selectable data types."""
-        try:
-            # Get original wavelength data
-            wavelengths = self.data.get('original_wavelengths', None)
-            if wavelengths is None and 'wavelengths' in self.data:
-                wavelengths = self.data['wavelengths']
-            
-            if export_rho and wavelengths is None:
-                # Use 5nm wavelengths as fallback if original not available
-                if 'wavelengths' in self.data:
-                    wavelengths = self.data['wavelengths']
-                    print("Warning: Original wavelengths not found, using 5nm interpolated wavelengths for rho export.")
-                else:
-                    QMessageBox.critical(self, "Export Error", "Wavelength data not found. Cannot export reflectance data.")
-                    return False
-            
-            # Get list of filenames
-            file_names = []
-            for result in self.data['results']:
-                if result['file_name'] not in file_names:
-                    file_names.append(result['file_name'])
-            
-            # Use openpyxl engine, create Excel write object
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                
-                # Create and export reflectance data (if selected)
-                if export_rho:
-                    # Create reflectance data
-                    rho_data = {'Lambda': wavelengths}
-                    
-                    # Add reflectance data for each file, remove extension
-                    for file_name in file_names:
-                        if file_name in self.data['reflectance']:
-                            # Remove file extension
-                            base_name = os.path.splitext(file_name)[0]
-                            
-                            reflectance_data = self.data['reflectance'][file_name]
-                            reflectance_values = None
-                            
-                            # Try to extract reflectance data
-                            if isinstance(reflectance_data, dict):
-                                if 'reflectance_1nm' in reflectance_data and len(reflectance_data['reflectance_1nm']) == len(wavelengths):
-                                    reflectance_values = reflectance_data['reflectance_1nm']
-                                elif 'reflectance' in reflectance_data and len(reflectance_data['reflectance']) == len(wavelengths):
-                                    reflectance_values = reflectance_data['reflectance']
-                            elif isinstance(reflectance_data, np.ndarray) and len(reflectance_data) == len(wavelengths):
-                                reflectance_values = reflectance_data
-                            
-                            # Only add data with matching length
-                            if reflectance_values is not None:
-                                rho_data[base_name] = reflectance_values
-                    
-                    # Create DataFrame and export
-                    rho_df = pd.DataFrame(rho_data)
-                    rho_df.to_excel(writer, index=False, header=True, sheet_name='rho')
-                
-                # Create and export color data (if selected)
-                if export_color:
-                    # Prepare color data
-                    color_data = {
-                        'Unnamed: 0': [],  # File name column
-                        'x': [],
-                        'y': [],
-                        'R (lin)': [],
-                        'G (lin)': [],
-                        'B (lin)': [],
-                        'R (gamma)': [],
-                        'G (gamma)': [],
-                        'B (gamma)': []
-                    }
-                    
-                    # Fill data in order by file name
-                    for i in range(min(3, len(self.data['results']))):
-                        # Get result data
-                        result = self.data['results'][i]
-                        # Remove file extension
-                        base_name = os.path.splitext(result['file_name'])[0]
-                        
-                        # File name and chromaticity coordinates
-                        color_data['Unnamed: 0'].append(base_name)
-                        color_data['x'].append(result['x'])
-                        color_data['y'].append(result['y'])
-                        
-                        # RGB linear values - directly use calculation results
-                        color_data['R (lin)'].append(result['rgb_linear'][0])
-                        color_data['G (lin)'].append(result['rgb_linear'][1])
-                        color_data['B (lin)'].append(result['rgb_linear'][2])
-                        
-                        # RGB gamma values (0-255 range) - directly use calculation results
-                        # Note: R value needs to be truncated to 255, as shown in example file
-                        r_gamma = round(result['rgb_gamma'][0] * 255)
-                        if r_gamma > 255:
-                            r_gamma = 255
-                        
-                        color_data['R (gamma)'].append(r_gamma)
-                        color_data['G (gamma)'].append(round(result['rgb_gamma'][1] * 255))
-                        color_data['B (gamma)'].append(round(result['rgb_gamma'][2] * 255))
-                    
-                    # Create DataFrame and export
-                    color_df = pd.DataFrame(color_data)
-                    color_df.to_excel(writer, index=False, header=True, sheet_name='color')
-                
-                # Get worksheet, apply format
-                workbook = writer.book
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    
-                    # Remove all cell formats
-                    from openpyxl.styles import Font, Alignment, Border, Side
-                    
-                    # Create a normal font and alignment
-                    normal_font = Font(name='Calibri', size=11, bold=False)
-                    general_alignment = Alignment(horizontal='general', vertical='bottom')
-                    no_border = Border(left=Side(style=None), right=Side(style=None), 
-                                      top=Side(style=None), bottom=Side(style=None))
-                    
-                    # Apply to all cells
-                    for row in worksheet.rows:
-                        for cell in row:
-                            cell.font = normal_font
-                            cell.alignment = general_alignment
-                            cell.border = no_border
-            
-            print(f"Data successfully exported to {file_path}")
-            return True
+        # Checks that need the user are done here, the export itself runs in the background
+        if not os.path.isdir(os.path.dirname(os.path.abspath(file_path))):
+            QMessageBox.warning(self, "Export Error", f"The folder {os.path.dirname(file_path)} does not exist.")
+            return
+        if export_rho and export_wavelengths(self.data) is None:
+            QMessageBox.critical(self, "Export Error", "Wavelength data not found. Cannot export reflectance data.")
+            return
+        if format_name in ('parquet', 'arrow') and importlib.util.find_spec('pyarrow') is None:
+            QMessageBox.critical(self, "Export Error", "Parquet and Arrow export need the pyarrow package, please install it.")
+            return
         
-        except Exception as e:
-            QMessageBox.critical(self, "Excel Export Error", f"An error occurred while exporting to Excel: {e}")
-            return False
-    
-    def export_to_csv(self, file_path, export_rho=True, export_color=True):
-        """Export data to a CSV file, with a fixed format, ignoring separator/decimal settings."""
-        try:
-            # Fixed format: comma separator, dot decimal
-            separator = ','
-            decimal = '.' # This will be handled by f-string formatting to ensure dot as decimal
-
-            # Get original wavelength data
-            wavelengths = self.data.get('original_wavelengths', None)
-            if export_rho and wavelengths is None:
-                if 'wavelengths' in self.data:
-                    wavelengths = self.data['wavelengths']
-                    print("Warning: Original wavelengths not found, using 5nm interpolated wavelengths for rho export.")
-                else:
-                    QMessageBox.critical(self, "Export Error", "Wavelength data not found. Cannot export reflectance data.")
-                    return False
-            
-            # Get list of filenames
-            file_names = []
-            for result in self.data['results']:
-                if result['file_name'] not in file_names:
-                    file_names.append(result['file_name'])
-            
-            # Create CSV content
-            csv_data = ""
-            
-            # Export reflectance data if selected
-            if export_rho:
-                # Create header row: "Wavelength [nm]", "Spectral Irradiance for filename1 [W/sqm*nm]", ...
-                header_parts = ["Wavelength [nm]"]
-                for file_name in file_names:
-                    base_name = os.path.splitext(file_name)[0]
-                    header_parts.append(f"Spectral Irradiance for {base_name} [W/sqm*nm]")
-                csv_data += separator.join(header_parts) + os.linesep
-                
-                # Add data rows: wavelength,value1,value2,...
-                for i, wavelength in enumerate(wavelengths):
-                    row_parts = [f"{int(wavelength)}"] # Wavelength as integer
-                    for file_name in file_names:
-                        if file_name in self.data['reflectance']:
-                            reflectance_data = self.data['reflectance'][file_name]
-                            reflectance_value = None
-                            
-                            if isinstance(reflectance_data, dict):
-                                if 'reflectance_1nm' in reflectance_data and len(reflectance_data['reflectance_1nm']) > i:
-                                    reflectance_value = reflectance_data['reflectance_1nm'][i]
-                                elif 'reflectance' in reflectance_data and len(reflectance_data['reflectance']) > i:
-                                    reflectance_value = reflectance_data['reflectance'][i]
-                            elif isinstance(reflectance_data, np.ndarray) and len(reflectance_data) > i:
-                                reflectance_value = reflectance_data[i]
-                            
-                            if reflectance_value is not None:
-                                # Format with dot as decimal, 6 decimal places
-                                row_parts.append(f"{reflectance_value:.6f}") 
-                            else:
-                                row_parts.append("0.000000") # Default for missing data
-                        else:
-                            row_parts.append("0.000000") # Default for missing file data
-                    csv_data += separator.join(row_parts) + os.linesep
-            
-            # Export color data if selected (maintains previous structure but uses fixed separator)
-            if export_color:
-                if export_rho:
-                    csv_data += os.linesep # Add a separator line if both types are exported
-                
-                # Create header row for color data
-                color_header_parts = ["File", "x", "y", "R (lin)", "G (lin)", "B (lin)", "R (gamma)", "G (gamma)", "B (gamma)"]
-                csv_data += separator.join(color_header_parts) + os.linesep
-                
-                # Add color data rows
-                for result in self.data['results']:
-                    base_name = os.path.splitext(result['file_name'])[0]
-                    
-                    # Format numbers with dot as decimal
-                    row_parts = [
-                        base_name,
-                        f"{result['x']:.6f}",
-                        f"{result['y']:.6f}",
-                        f"{result['rgb_linear'][0]:.6f}",
-                        f"{result['rgb_linear'][1]:.6f}",
-                        f"{result['rgb_linear'][2]:.6f}",
-                        f"{min(255, round(result['rgb_gamma'][0] * 255))}", # R (gamma)
-                        f"{round(result['rgb_gamma'][1] * 255)}",          # G (gamma)
-                        f"{round(result['rgb_gamma'][2] * 255)}"           # B (gamma)
-                    ]
-                    csv_data += separator.join(row_parts) + os.linesep
-            
-            # Write data to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(csv_data)
-            
-            print(f"Data successfully exported to {file_path} with fixed CSV format.")
-            return True
-            
-        except Exception as e:
-            QMessageBox.critical(self, "CSV Export Error", f"An error occurred while exporting to CSV: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-    
-    def export_to_txt(self, file_path, export_rho=True, export_color=True):
-        """Export data to a TXT file, handling potential file access issues."""
-        try:
-            # Determine the separator based on settings
-            separator = '\t'  # Use tab for TXT files
-            decimal = '.'     # Always use period for decimal
-            include_header = self.settings['export'].get('include_header', True)
-            
-            # Get original wavelength data
-            wavelengths = self.data.get('original_wavelengths', None)
-            if export_rho and wavelengths is None:
-                # Use 5nm wavelengths as fallback if original not available
-                if 'wavelengths' in self.data:
-                    wavelengths = self.data['wavelengths']
-                    print("Warning: Original wavelengths not found, using 5nm interpolated wavelengths for rho export.")
-                else:
-                    QMessageBox.critical(self, "Export Error", "Wavelength data not found. Cannot export reflectance data.")
-                    return False
-                
-            # Get list of filenames
-            file_names = []
-            for result in self.data['results']:
-                if result['file_name'] not in file_names:
-                    file_names.append(result['file_name'])
-            
-            # Create TXT content
-            txt_data = ""
-            
-            # Export reflectance data if selected
-            if export_rho:
-                # Create header row if enabled
-                if include_header:
-                    header = f"Lambda{separator}"
-                    for file_name in file_names:
-                        # Remove file extension for column headers
-                        base_name = os.path.splitext(file_name)[0]
-                        header += f"{base_name}{separator}"
-                    txt_data += header.rstrip(separator) + "\n"
-                
-                # Add data rows
-                for i, wavelength in enumerate(wavelengths):
-                    row = f"{wavelength:.1f}{separator}"
-                    for file_name in file_names:
-                        if file_name in self.data['reflectance']:
-                            reflectance_data = self.data['reflectance'][file_name]
-                            reflectance_value = None
-                            
-                            # Try to extract reflectance data
-                            if isinstance(reflectance_data, dict):
-                                if 'reflectance_1nm' in reflectance_data and len(reflectance_data['reflectance_1nm']) > i:
-                                    reflectance_value = reflectance_data['reflectance_1nm'][i]
-                                elif 'reflectance' in reflectance_data and len(reflectance_data['reflectance']) > i:
-                                    reflectance_value = reflectance_data['reflectance'][i]
-                            elif isinstance(reflectance_data, np.ndarray) and len(reflectance_data) > i:
-                                reflectance_value = reflectance_data[i]
-                            
-                            if reflectance_value is not None:
-                                row += f"{reflectance_value:.6f}{separator}"
-                            else:
-                                row += f"0.000000{separator}"
-                        else:
-                            row += f"0.000000{separator}"
-                    txt_data += row.rstrip(separator) + "\n"
-            
-            # Export color data if selected
-            if export_color:
-                # Add a separator line if both types are exported
-                if export_rho:
-                    txt_data += "\n"
-                
-                # Create header row for color data
-                if include_header:
-                    header = f"File{separator}x{separator}y{separator}"
-                    header += f"R (lin){separator}G (lin){separator}B (lin){separator}"
-                    header += f"R (gamma){separator}G (gamma){separator}B (gamma)"
-                    txt_data += header + "\n"
-                
-                # Add color data rows
-                for result in self.data['results']:
-                    # Remove file extension
-                    base_name = os.path.splitext(result['file_name'])[0]
-                    
-                    # Create row with file name and chromaticity coordinates
-                    row = f"{base_name}{separator}{result['x']:.6f}{separator}{result['y']:.6f}{separator}"
-                    
-                    # Add RGB linear values
-                    row += f"{result['rgb_linear'][0]:.6f}{separator}"
-                    row += f"{result['rgb_linear'][1]:.6f}{separator}"
-                    row += f"{result['rgb_linear'][2]:.6f}{separator}"
-                    
-                    # Add RGB gamma values (0-255 range)
-                    r_gamma = min(255, round(result['rgb_gamma'][0] * 255))
-                    row += f"{r_gamma}{separator}"
-                    row += f"{round(result['rgb_gamma'][1] * 255)}{separator}"
-                    row += f"{round(result['rgb_gamma'][2] * 255)}"
-                    
-                    txt_data += row + "\n"
-            
-            # Write data to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(txt_data)
-            
-            print(f"Data successfully exported to {file_path}")
-            return True
-            
-        except Exception as e:
-            QMessageBox.critical(self, "TXT Export Error", f"An error occurred while exporting to TXT: {e}")
-            return False
-    
-    def export_to_json(self, file_path, export_rho=True, export_color=True):
-        """Export data to a JSON file, with selectable data types and new format."""
-        try:
-            import json
-            
-            export_data = {}
-
-            # Get original wavelength data
-            wavelengths = self.data.get('original_wavelengths', None)
-            if wavelengths is None and 'wavelengths' in self.data:
-                wavelengths = self.data['wavelengths']
-
-            if export_rho:
-                if wavelengths is None:
-                    if 'wavelengths' in self.data: # Fallback to interpolated if original not found
-                        wavelengths = self.data['wavelengths']
-                        print("Warning: Original wavelengths not found, using 5nm interpolated wavelengths for rho export in JSON.")
-                    else:
-                        QMessageBox.critical(self, "Export Error", "Wavelength data not found. Cannot export reflectance data to JSON.")
-                        return False
-                
-                if isinstance(wavelengths, np.ndarray):
-                    wavelengths_list = wavelengths.tolist()
-                else:
-                    wavelengths_list = list(wavelengths)
-                formatted_wavelengths = [int(w) for w in wavelengths_list]
-                export_data["Wavelength [nm]"] = formatted_wavelengths
-                
-                reflectance_export_data_dict = {} # Changed name for clarity
-                if 'results' in self.data and self.data['results']:
-                    file_names = [result['file_name'] for result in self.data['results']]
-                elif 'reflectance' in self.data: 
-                    file_names = list(self.data['reflectance'].keys())
-                else:
-                    file_names = [] 
-                
-                for file_name in file_names:
-                    file_reflectance_data = self.data.get('reflectance', {}).get(file_name)
-                    
-                    if file_reflectance_data is not None:
-                        base_name = os.path.splitext(file_name)[0]
-                        reflectance_key = f"Spectral Irradiance for {base_name} [W/sqm*nm]"
-                        
-                        actual_reflectance_values = None
-                        if isinstance(file_reflectance_data, np.ndarray):
-                            actual_reflectance_values = file_reflectance_data
-                        elif isinstance(file_reflectance_data, list): 
-                            actual_reflectance_values = file_reflectance_data
-                        elif isinstance(file_reflectance_data, dict):
-                            if 'reflectance_1nm' in file_reflectance_data and (isinstance(file_reflectance_data['reflectance_1nm'], np.ndarray) or isinstance(file_reflectance_data['reflectance_1nm'], list)):
-                                actual_reflectance_values = file_reflectance_data['reflectance_1nm']
-                            elif 'reflectance' in file_reflectance_data and (isinstance(file_reflectance_data['reflectance'], np.ndarray) or isinstance(file_reflectance_data['reflectance'], list)):
-                                actual_reflectance_values = file_reflectance_data['reflectance']
-
-                        if actual_reflectance_values is not None:
-                            if isinstance(actual_reflectance_values, np.ndarray):
-                                reflectance_export_data_dict[reflectance_key] = actual_reflectance_values.tolist()
-                            else: 
-                                reflectance_export_data_dict[reflectance_key] = list(actual_reflectance_values)
-                        else:
-                            print(f"Warning: Reflectance data for {file_name} found but not in a recognized array format. Skipping.")
-                            reflectance_export_data_dict[reflectance_key] = [] 
-                    else:
-                        print(f"Warning: No reflectance data found for file: {file_name}")
-                        base_name = os.path.splitext(file_name)[0]
-                        reflectance_key = f"Spectral Irradiance for {base_name} [W/sqm*nm]"
-                        reflectance_export_data_dict[reflectance_key] = [] 
-                
-                if reflectance_export_data_dict:
-                    export_data["Spectral Irradiance Data"] = reflectance_export_data_dict
-
-            if export_color:
-                color_analysis_list = [] # List of dictionaries for each file's color data
-                
-                for result in self.data['results']:
-                    # print(f"DEBUG: Processing result for JSON color: {result}") # Uncomment for debugging
-                    
-                    file_color_data = {}
-                    file_color_data["File Name"] = str(result.get('file_name', ''))
-                    file_color_data["x"] = result.get('x', 0.0) 
-                    file_color_data["y"] = result.get('y', 0.0) 
-                    
-                    # Process sRGB Linear
-                    rgb_linear_source = result.get('rgb_linear', [0.0, 0.0, 0.0])
-                    processed_rgb_linear = []
-                    if isinstance(rgb_linear_source, np.ndarray):
-                        processed_rgb_linear = rgb_linear_source.tolist()
-                    elif isinstance(rgb_linear_source, (list, tuple)):
-                        processed_rgb_linear = list(rgb_linear_source)
-                    else:
-                        print(f"Warning: rgb_linear for {file_color_data['File Name']} is not an array/list: {rgb_linear_source}")
-                        processed_rgb_linear = [0.0, 0.0, 0.0] 
-                    
-                    # Ensure it has 3 elements
-                    file_color_data["sRGB Linear"] = (processed_rgb_linear + [0.0, 0.0, 0.0])[:3]
-
-
-                    # Process sRGB Gamma
-                    rgb_gamma_source = result.get('rgb_gamma', [0.0, 0.0, 0.0])
-                    srgb_gamma_255 = [0, 0, 0] # Default
-
-                    processed_rgb_gamma_list = None
-                    if isinstance(rgb_gamma_source, np.ndarray):
-                        processed_rgb_gamma_list = rgb_gamma_source.tolist()
-                    elif isinstance(rgb_gamma_source, (list, tuple)):
-                        processed_rgb_gamma_list = list(rgb_gamma_source)
-                    
-                    if isinstance(processed_rgb_gamma_list, list) and len(processed_rgb_gamma_list) == 3:
-                        try:
-                            srgb_gamma_255 = [
-                                min(255, round(float(val) * 255)) for val in processed_rgb_gamma_list
-                            ]
-                        except (ValueError, TypeError) as e_convert:
-                            print(f"Warning: Could not convert rgb_gamma values for {file_color_data['File Name']}: {processed_rgb_gamma_list}. Error: {e_convert}")
-                            # srgb_gamma_255 remains [0, 0, 0]
-                    else:
-                        # This warning helps identify if 'rgb_gamma' is missing or has an unexpected format
-                        if 'rgb_gamma' in result:
-                             print(f"Warning: 'rgb_gamma' key found for {file_color_data['File Name']} but format is unexpected after processing: {rgb_gamma_source}, got: {processed_rgb_gamma_list}")
-                        else:
-                             print(f"Warning: 'rgb_gamma' key missing for {file_color_data['File Name']}")
-                        # srgb_gamma_255 remains [0, 0, 0]
-
-                    file_color_data["sRGB Gamma"] = srgb_gamma_255
-                    
-                    color_analysis_list.append(file_color_data)
-                    
-                export_data["Colorimetric Analysis"] = color_analysis_list
-            
-            export_data['metadata'] = {
-                "export_date": pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "illuminant": self.settings.get('illuminant', 'D65'),
-                "rho_lambda": self.settings.get('rho_lambda', 0.989), # Ensure this is serializable
-                "gamut": self.settings.get('gamut', 'sRGB')
-            }
-
-            with open(file_path, 'w') as f:
-                json.dump(export_data, f, indent=2)
-            
-            return True
-        except Exception as e:
-            QMessageBox.critical(self, "Export Error", f"An error occurred while exporting to JSON: {e}")
-            return False 
\ No newline at end of file
+        # The job works on a snapshot, so the user can keep importing and editing data meanwhile
+        task = partial(export_data_file, format_name, file_path, export_snapshot(self.data), copy.deepcopy(self.settings),
+                       export_rho, export_color, self.comboBox_Export_Layout.currentText())
+        total = export_units(format_name, self.data, export_rho, export_color)
+        job = ExportJob(f"Exporting {os.path.basename(file_path)}", task, total, self.parent)
+        self.parent.start_export_job(job)
+        
+        # Save export directory to settings
+        self.settings['export']['default_directory'] = os.path.dirname(file_path)
+        # Also save as last used directory
+        self.settings['export']['last_directory'] = os.path.dirname(file_path)
+        
+        # Save current selections to settings
+        self.settings['export_dialog']['format_index'] = format_idx
+        self.settings['export_dialog']['export_rho'] = export_rho
+        self.settings['export_dialog']['export_color'] = export_color
+        self.settings['export_dialog']['table_layout'] = self.comboBox_Export_Layout.currentText()
+        
+        # Also update default format
+        self.settings['export']['default_format'] = format_name
+        
+        # Save settings
+        if self.parent:
+            self.parent.save_settings()
+        
+        # Close dialog, the main window status bar shows the progress
+        self.accept()
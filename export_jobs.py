@@ -0,0 +1,96 @@
+import traceback
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton
+
+from file_output import ExportCancelled
+
+
+class ExportJob(QThread):
+    """
+    Run an export task in a background thread, with progress and cancellation
+
+    The task is called with a progress callback taking the number of work units
+    just finished; the callback returns False once the job was cancelled, which the
+    exporters turn into ExportCancelled (see file_output.report_progress).
+
+    Parameters:
+        title: Short description shown while the job runs
+        task: Callable(progress) returning the list of written file paths
+        total: Number of work units the task reports
+        parent: Parent object
+    """
+    progress_changed = Signal(int)
+    job_finished = Signal(list)
+    job_cancelled = Signal(list)
+    job_failed = Signal(str)
+
+    def __init__(self, title, task, total, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.task = task
+        self.total = max(1, total)
+        self.done = 0
+        self.percent = 0
+
+    def report(self, count=1):
+        """Progress callback of the task, returns False once cancelled"""
+        self.done += count
+        percent = min(100, self.done * 100 // self.total)
+        if percent != self.percent:
+            self.percent = percent
+            self.progress_changed.emit(percent)
+        return not self.isInterruptionRequested()
+
+    def cancel(self):
+        """Ask the task to stop at its next progress report"""
+        self.requestInterruption()
+
+    def run(self):
+        try:
+            paths = self.task(self.report)
+        except ExportCancelled:
+            print(f"{self.title}: cancelled")
+            self.job_cancelled.emit([])
+            return
+        except Exception as e:
+            print(f"Error in {self.title}: {str(e)}")
+            traceback.print_exc()
+            self.job_failed.emit(str(e))
+            return
+
+        if self.isInterruptionRequested() and self.done < self.total:
+            # Tasks that stop early on their own return the files written so far
+            self.job_cancelled.emit(paths)
+        else:
+            self.job_finished.emit(paths)
+
+
+class ExportJobPanel(QWidget):
+    """Status bar entry of a running export job: title, progress bar and cancel button"""
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.label = QLabel(job.title)
+        layout.addWidget(self.label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setFixedWidth(120)
+        layout.addWidget(self.progress_bar)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_button)
+
+        job.progress_changed.connect(self.progress_bar.setValue)
+
+    def cancel(self):
+        """Cancel the job, the panel is removed once the job has stopped"""
+        self.job.cancel()
+        self.cancel_button.setEnabled(False)
+        self.label.setText(f"{self.job.title} (cancelling...)")
@@ -0,0 +1,652 @@
+import os
+import json
+from datetime import datetime
+import numpy as np
+
+from table_text import format_numbers, decimal_mark
+from file_output import report_progress, atomic_output
+
+
+# Export formats in the order of the format combo box: (name, extension, file dialog filter)
+EXPORT_FORMATS = [
+    ('xlsx', '.xlsx', "Excel Files (*.xlsx)"),
+    ('csv', '.csv', "CSV Files (*.csv)"),
+    ('txt', '.txt', "Text Files (*.txt)"),
+    ('json', '.json', "JSON Files (*.json)"),
+    ('parquet', '.parquet', "Parquet Files (*.parquet)"),
+    ('arrow', '.arrow', "Arrow IPC Files (*.arrow)"),
+    ('ndjson', '.ndjson', "NDJSON Files (*.ndjson)")
+]
+
+# Excel sheet limits
+EXCEL_MAX_COLUMNS = 16384
+EXCEL_MAX_ROWS = 1048576
+
+# Header of the colour sheet/table columns after the file name column
+COLOR_HEADERS = ["x", "y", "R (lin)", "G (lin)", "B (lin)", "R (gamma)", "G (gamma)", "B (gamma)"]
+
+# Cells formatted at once by the text writers, bounds the memory of a text export
+TEXT_CHUNK_CELLS = 200000
+
+# Worksheet rows between progress reports of the Excel writer
+XLSX_PROGRESS_ROWS = 1000
+
+
+def export_wavelengths(data):
+    """
+    Wavelengths of exported reflectance data
+
+    Parameters:
+        data: Main window data dictionary
+
+    Returns:
+        Original measurement wavelengths, the interpolated wavelengths if those are missing, or None
+    """
+    wavelengths = data.get('original_wavelengths', None)
+    if wavelengths is None and 'wavelengths' in data:
+        wavelengths = data['wavelengths']
+    return wavelengths
+
+
+def result_file_names(data):
+    """File names of the results, in result order without duplicates"""
+    return list(dict.fromkeys(result['file_name'] for result in data['results']))
+
+
+def reflectance_columns(data, wavelengths, fill=None):
+    """
+    Reflectance columns matching the export wavelengths
+
+    The 1nm data is preferred. Without a fill value, samples whose data length does
+    not match the wavelengths are skipped; with one, every sample gets a column,
+    cut to the wavelengths and padded with the fill value.
+
+    Parameters:
+        data: Main window data dictionary
+        wavelengths: Export wavelengths
+        fill: Optional value of missing data points
+
+    Returns:
+        (sample names without extension, list of reflectance arrays)
+    """
+    count = len(wavelengths)
+    names = []
+    columns = []
+    for file_name in result_file_names(data):
+        reflectance_data = data['reflectance'].get(file_name)
+        reflectance_values = None
+        if isinstance(reflectance_data, dict):
+            if 'reflectance_1nm' in reflectance_data and (fill is not None or len(reflectance_data['reflectance_1nm']) == count):
+                reflectance_values = reflectance_data['reflectance_1nm']
+            elif 'reflectance' in reflectance_data and (fill is not None or len(reflectance_data['reflectance']) == count):
+                reflectance_values = reflectance_data['reflectance']
+        elif isinstance(reflectance_data, np.ndarray) and (fill is not None or len(reflectance_data) == count):
+            reflectance_values = reflectance_data
+
+        if reflectance_values is not None:
+            values = np.asarray(reflectance_values, dtype=np.float64)[:count]
+        elif fill is not None:
+            values = np.empty(0)
+        else:
+            continue
+        if len(values) < count:
+            values = np.concatenate([values, np.full(count - len(values), fill, dtype=np.float64)])
+        names.append(os.path.splitext(file_name)[0])
+        columns.append(values)
+    return names, columns
+
+
+def color_columns(results):
+    """
+    Colour data of all results as columns
+
+    Parameters:
+        results: Main window results list
+
+    Returns:
+        (sample names without extension, (N, 8) array in COLOR_HEADERS order).
+        The gamma values are in range 0-255, rounded, with R truncated to 255.
+    """
+    names = [os.path.splitext(result['file_name'])[0] for result in results]
+    values = np.empty((len(results), len(COLOR_HEADERS)), dtype=np.float64)
+    if results:
+        values[:, 0] = [result['x'] for result in results]
+        values[:, 1] = [result['y'] for result in results]
+        values[:, 2:5] = [result['rgb_linear'][:3] for result in results]
+        gamma = np.round(np.array([result['rgb_gamma'][:3] for result in results], dtype=np.float64) * 255)
+        gamma[:, 0] = np.minimum(gamma[:, 0], 255)
+        values[:, 5:8] = gamma
+    return names, values
+
+
+def stored_reflectance(data, file_name):
+    """
+    Reflectance values stored for a file, whatever their length
+
+    Returns:
+        The 1nm data if present, otherwise the measured reflectance, or None
+    """
+    reflectance_data = data.get('reflectance', {}).get(file_name)
+    if isinstance(reflectance_data, dict):
+        for key in ('reflectance_1nm', 'reflectance'):
+            if isinstance(reflectance_data.get(key), (np.ndarray, list)):
+                return reflectance_data[key]
+        return None
+    if isinstance(reflectance_data, (np.ndarray, list)):
+        return reflectance_data
+    return None
+
+
+def json_color_record(result):
+    """
+    Colour data of one result as written to JSON
+
+    Returns:
+        Dictionary with File Name, x, y, sRGB Linear and sRGB Gamma (0-255, rounded and clamped)
+    """
+    rgb_linear = np.asarray(result.get('rgb_linear', [0.0, 0.0, 0.0]), dtype=np.float64).tolist()
+    rgb_gamma = np.asarray(result.get('rgb_gamma', [0.0, 0.0, 0.0]), dtype=np.float64)
+    if rgb_gamma.shape == (3,):
+        srgb_gamma_255 = [min(255, round(value * 255)) for value in rgb_gamma.tolist()]
+    else:
+        srgb_gamma_255 = [0, 0, 0]
+    return {
+        "File Name": str(result.get('file_name', '')),
+        "x": float(result.get('x', 0.0)),
+        "y": float(result.get('y', 0.0)),
+        "sRGB Linear": (rgb_linear + [0.0, 0.0, 0.0])[:3],
+        "sRGB Gamma": srgb_gamma_255
+    }
+
+
+def _json_array(values):
+    """JSON text of a numeric array, written from the array buffer in one call"""
+    return json.dumps(np.asarray(values, dtype=np.float64).tolist())
+
+
+def write_json(file, data, wavelengths=None, export_rho=True, export_color=True, metadata=None, progress=None):
+    """
+    Stream the JSON export to an open text file
+
+    The document is written piece by piece, one sample at a time, so only a single
+    reflectance array is converted at once. Arrays are written on one line each.
+
+    Parameters:
+        file: Text file opened for writing
+        data: Main window data dictionary
+        wavelengths: Export wavelengths (with export_rho)
+        export_rho: Write the wavelengths and the spectral data of every sample
+        export_color: Write the colorimetric analysis of every result
+        metadata: Optional metadata object, written last
+        progress: Optional callable(items written), returning False cancels (raises ExportCancelled)
+    """
+    separator = "{\n"
+    if export_rho:
+        file.write(f'{separator}  "Wavelength [nm]": {json.dumps([int(w) for w in np.asarray(wavelengths).tolist()])}')
+        separator = ",\n"
+        file_names = result_file_names(data) or list(data.get('reflectance', {}))
+        if file_names:
+            file.write(f'{separator}  "Spectral Irradiance Data": {{')
+            item_separator = "\n"
+            for file_name in file_names:
+                key = f"Spectral Irradiance for {os.path.splitext(file_name)[0]} [W/sqm*nm]"
+                values = stored_reflectance(data, file_name)
+                if values is None:
+                    print(f"Warning: No reflectance data found for file: {file_name}")
+                    values = []
+                file.write(f'{item_separator}    {json.dumps(key)}: {_json_array(values)}')
+                item_separator = ",\n"
+                report_progress(progress)
+            file.write("\n  }")
+
+    if export_color:
+        file.write(f'{separator}  "Colorimetric Analysis": [')
+        separator = ",\n"
+        item_separator = "\n"
+        for result in data['results']:
+            file.write(f'{item_separator}    {json.dumps(json_color_record(result))}')
+            item_separator = ",\n"
+            report_progress(progress)
+        file.write("\n  ]")
+
+    if metadata is not None:
+        file.write(f'{separator}  "metadata": {json.dumps(metadata)}')
+        separator = ",\n"
+    file.write("\n}\n" if separator != "{\n" else "{}\n")
+
+
+def write_ndjson(file, data, wavelengths=None, export_rho=True, export_color=True, metadata=None, progress=None):
+    """
+    Stream the export as newline-delimited JSON, one sample per line
+
+    The first line is a metadata record holding the wavelength grid, every further
+    line a self-contained sample record, so the file can be consumed line by line.
+
+    Parameters:
+        file: Text file opened for writing
+        data: Main window data dictionary
+        wavelengths: Export wavelengths (with export_rho)
+        export_rho: Include the spectral data of each sample ("Spectral Irradiance")
+        export_color: Include the colour data of each sample
+        metadata: Optional metadata written to the first record
+        progress: Optional callable(records written), returning False cancels (raises ExportCancelled)
+    """
+    header = {"record": "metadata"}
+    header.update(metadata or {})
+    if export_rho:
+        header["Wavelength [nm]"] = [int(w) for w in np.asarray(wavelengths).tolist()]
+    file.write(json.dumps(header) + "\n")
+
+    results = {}
+    for result in data['results']:
+        results.setdefault(result['file_name'], result)
+    for file_name, result in results.items():
+        record = json_color_record(result) if export_color else {"File Name": str(file_name)}
+        line = '{"record": "sample", ' + json.dumps(record)[1:-1]
+        if export_rho:
+            values = stored_reflectance(data, file_name)
+            line += f', "Spectral Irradiance": {_json_array(values if values is not None else [])}'
+        file.write(line + "}\n")
+        report_progress(progress)
+
+
+def shard_ranges(count, size):
+    """(start, stop) ranges splitting count items into chunks of at most size (at least one range)"""
+    if count == 0:
+        return [(0, 0)]
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def shard_sheet_name(base_name, shard):
+    """Sheet name of a shard: the base name, then base_2, base_3, ..."""
+    return base_name if shard == 0 else f"{base_name}_{shard + 1}"
+
+
+def _chunk_rows(row_cells):
+    """Rows per text chunk for rows of row_cells cells"""
+    return max(1, TEXT_CHUNK_CELLS // max(1, row_cells))
+
+
+def write_reflectance_text(file, wavelengths, columns, headers=None, separator='\t', decimal='.',
+                           decimal_places=6, wavelength_format='%.1f', line_end='\n', progress=None):
+    """
+    Write the reflectance table to an open text file in chunks of rows
+
+    Each chunk is copied into one (rows, samples) block and formatted with a single
+    %-format per row, so the memory used does not grow with the number of wavelengths.
+
+    Parameters:
+        file: Text file opened for writing
+        wavelengths: Export wavelengths, the first column
+        columns: Reflectance arrays from reflectance_columns
+        headers: Optional header cells, no header line if None
+        separator: Field separator
+        decimal: Decimal mark
+        decimal_places: Decimal places of the reflectance values
+        wavelength_format: %-format of the wavelengths
+        line_end: Line terminator
+        progress: Optional callable(rows written), returning False cancels (raises ExportCancelled)
+    """
+    if headers is not None:
+        file.write(separator.join(headers) + line_end)
+
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    value_format = f'%.{decimal_places}f'
+    step = _chunk_rows(len(columns) + 1)
+    block = np.empty((min(step, len(wavelengths)), len(columns)), dtype=np.float64)
+    for start, stop in shard_ranges(len(wavelengths), step):
+        lines = format_numbers(wavelengths[start:stop], wavelength_format, decimal)
+        if columns and lines:
+            rows = block[:stop - start]
+            for index, column in enumerate(columns):
+                rows[:, index] = column[start:stop]
+            values = format_numbers(rows, value_format, decimal, separator)
+            lines = [wavelength + separator + row for wavelength, row in zip(lines, values)]
+        if lines:
+            file.write(line_end.join(lines) + line_end)
+        report_progress(progress, stop - start)
+
+
+def write_color_text(file, names, values, headers=None, separator='\t', decimal='.',
+                     decimal_places=6, line_end='\n', progress=None):
+    """
+    Write the colour table to an open text file in chunks of rows
+
+    Parameters:
+        file: Text file opened for writing
+        names: Sample names, the first column
+        values: (N, 8) array from color_columns
+        headers: Optional header cells, no header line if None
+        separator: Field separator
+        decimal: Decimal mark
+        decimal_places: Decimal places of x, y and the linear RGB values
+        line_end: Line terminator
+        progress: Optional callable(rows written), returning False cancels (raises ExportCancelled)
+    """
+    if headers is not None:
+        file.write(separator.join(headers) + line_end)
+
+    value_format = f'%.{decimal_places}f'
+    row_format = separator.join([value_format] * 5 + ['%d'] * 3)
+    for start, stop in shard_ranges(len(names), _chunk_rows(len(COLOR_HEADERS) + 1)):
+        rows = format_numbers(values[start:stop], value_format, decimal, template=row_format)
+        if rows:
+            file.write(line_end.join(name + separator + row for name, row in zip(names[start:stop], rows)) + line_end)
+        report_progress(progress, stop - start)
+
+
+def write_xlsx(file_path, wavelengths=None, reflectance=None, colors=None, progress=None):
+    """
+    Write the export workbook in openpyxl write-only mode
+
+    Rows are streamed to the file without building a worksheet in memory and no cell
+    is styled individually, all cells use the workbook default style. Reflectance
+    samples beyond the Excel column limit continue on further sheets (rho_2, ...),
+    colour rows beyond the row limit on color_2, ...
+
+    Parameters:
+        file_path: Target .xlsx path
+        wavelengths: Export wavelengths (with reflectance)
+        reflectance: Optional (names, columns) from reflectance_columns
+        colors: Optional (names, values) from color_columns
+        progress: Optional callable(rows written), returning False cancels (raises ExportCancelled)
+
+    Returns:
+        List of the written sheet names
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet_names = []
+
+    if reflectance is not None:
+        names, columns = reflectance
+        wavelength_values = np.asarray(wavelengths).tolist()
+        for shard, (start, stop) in enumerate(shard_ranges(len(names), EXCEL_MAX_COLUMNS - 1)):
+            sheet = workbook.create_sheet(shard_sheet_name('rho', shard))
+            sheet.append(['Lambda'] + names[start:stop])
+            # One (W, samples) block per sheet, appended row by row
+            block = np.column_stack(columns[start:stop]).tolist() if stop > start else [[] for _ in wavelength_values]
+            for row_index, (wavelength, row) in enumerate(zip(wavelength_values, block), 1):
+                sheet.append([wavelength] + row)
+                if row_index % XLSX_PROGRESS_ROWS == 0:
+                    report_progress(progress, XLSX_PROGRESS_ROWS)
+            report_progress(progress, len(wavelength_values) % XLSX_PROGRESS_ROWS)
+            sheet_names.append(sheet.title)
+
+    if colors is not None:
+        names, values = colors
+        for shard, (start, stop) in enumerate(shard_ranges(len(names), EXCEL_MAX_ROWS - 1)):
+            sheet = workbook.create_sheet(shard_sheet_name('color', shard))
+            # Column widths are set once per column, before any row is written
+            sheet.column_dimensions['A'].width = max([10] + [len(name) + 2 for name in names[start:stop]])
+            sheet.append(['Unnamed: 0'] + COLOR_HEADERS)
+            for row_index, (name, row) in enumerate(zip(names[start:stop], values[start:stop].tolist()), 1):
+                # Gamma values are whole numbers
+                sheet.append([name] + row[:5] + [int(value) for value in row[5:]])
+                if row_index % XLSX_PROGRESS_ROWS == 0:
+                    report_progress(progress, XLSX_PROGRESS_ROWS)
+            report_progress(progress, (stop - start) % XLSX_PROGRESS_ROWS)
+            sheet_names.append(sheet.title)
+
+    workbook.save(file_path)
+    return sheet_names
+
+
+def _arrow_metadata(metadata):
+    """Schema metadata as the bytes mapping expected by pyarrow, values JSON encoded"""
+    return {key.encode('utf-8'): json.dumps(value).encode('utf-8') for key, value in (metadata or {}).items()}
+
+
+def reflectance_table(wavelengths, names, columns, layout='Wide', metadata=None):
+    """
+    Reflectance data as an Arrow table
+
+    The wavelength grid is stored in the schema metadata ('wavelengths') as well as
+    in a column. Float64 sample arrays are wrapped without copying in the wide layout.
+
+    Parameters:
+        wavelengths: Export wavelengths
+        names: Sample names from reflectance_columns
+        columns: Reflectance arrays from reflectance_columns
+        layout: 'Wide' for one column per sample, 'Long' for (File, Wavelength [nm], Reflectance) rows
+        metadata: Optional further schema metadata, values must be JSON serializable
+
+    Returns:
+        pyarrow.Table
+    """
+    import pyarrow as pa
+
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    metadata = dict(metadata or {}, wavelengths=wavelengths.tolist(), wavelength_unit='nm', layout=layout)
+
+    if layout == 'Long':
+        sample_indices = np.repeat(np.arange(len(names), dtype=np.int32), len(wavelengths))
+        arrays = [
+            pa.DictionaryArray.from_arrays(sample_indices, pa.array(names, type=pa.string())),
+            pa.array(np.tile(wavelengths, len(names))),
+            pa.array(np.concatenate(columns) if columns else np.empty(0))
+        ]
+        fields = ['File', 'Wavelength [nm]', 'Reflectance']
+    else:
+        arrays = [pa.array(wavelengths)] + [pa.array(np.ascontiguousarray(column)) for column in columns]
+        fields = ['Wavelength [nm]'] + list(names)
+    return pa.Table.from_arrays(arrays, names=fields).replace_schema_metadata(_arrow_metadata(metadata))
+
+
+def color_table(results, illuminant, rho_lambda, metadata=None):
+    """
+    Colour results as an Arrow table with typed columns
+
+    Parameters:
+        results: Main window results list
+        illuminant: Illuminant of the calculation, stored per row
+        rho_lambda: rho_lambda factor of the calculation, stored per row
+        metadata: Optional schema metadata, values must be JSON serializable
+
+    Returns:
+        pyarrow.Table with File, COLOR_HEADERS (gamma values as int16), Hex Color, Illuminant and rho_lambda
+    """
+    import pyarrow as pa
+
+    names, values = color_columns(results)
+    # Column-major copy, so every column below is wrapped without a further copy
+    values = np.asfortranarray(values)
+    count = len(names)
+    arrays = [pa.array(names, type=pa.string())]
+    arrays += [pa.array(values[:, index]) for index in range(5)]
+    arrays += [pa.array(values[:, index].astype(np.int16)) for index in range(5, 8)]
+    arrays += [
+        pa.array([result.get('hex_color', '') for result in results], type=pa.string()),
+        pa.DictionaryArray.from_arrays(np.zeros(count, dtype=np.int8), pa.array([str(illuminant)])),
+        pa.array(np.full(count, float(rho_lambda)))
+    ]
+    fields = ['File'] + COLOR_HEADERS + ['Hex Color', 'Illuminant', 'rho_lambda']
+    return pa.Table.from_arrays(arrays, names=fields).replace_schema_metadata(_arrow_metadata(metadata))
+
+
+def write_arrow_table(file_path, table, file_format='parquet', compression='zstd'):
+    """
+    Write an Arrow table as compressed Parquet or Arrow IPC file
+
+    Parameters:
+        file_path: Target path
+        table: pyarrow.Table
+        file_format: 'parquet' or 'arrow' (Arrow IPC file format, readable with pyarrow.ipc.open_file or pandas.read_feather)
+        compression: Compression codec
+    """
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, file_path, compression=compression)
+    else:
+        import pyarrow as pa
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(file_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+def table_file_paths(file_path, export_rho, export_color):
+    """
+    Target paths of single-table formats (Parquet, Arrow)
+
+    Returns:
+        {'rho': path, 'color': path} for the selected tables; the given path if only one table
+        is exported, otherwise the tables go to <name>_rho.<ext> and <name>_color.<ext>
+    """
+    selected = [table for table, export in (('rho', export_rho), ('color', export_color)) if export]
+    if len(selected) == 1:
+        return {selected[0]: file_path}
+    base, ext = os.path.splitext(file_path)
+    return {table: f"{base}_{table}{ext}" for table in selected}
+
+
+def export_snapshot(data):
+    """
+    Shallow copy of the data an export reads
+
+    The export runs in the background while the main window keeps importing or
+    clearing data; the sample arrays are replaced, never modified, so they are shared.
+
+    Parameters:
+        data: Main window data dictionary
+
+    Returns:
+        Data dictionary with its own results list and reflectance mapping
+    """
+    return {
+        'results': list(data['results']),
+        'reflectance': dict(data.get('reflectance', {})),
+        'original_wavelengths': data.get('original_wavelengths', None),
+        'wavelengths': data.get('wavelengths', None)
+    }
+
+
+def export_metadata(settings):
+    """Calculation settings written to the JSON, NDJSON, Parquet and Arrow exports"""
+    general = settings.get('general', {})
+    return {
+        "export_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "illuminant": general.get('illuminant', 'D65'),
+        "rho_lambda": general.get('rho_lambda', 0.989),
+        "gamut": general.get('gamut', 'sRGB')
+    }
+
+
+def export_units(format_name, data, export_rho=True, export_color=True):
+    """
+    Number of progress units an export reports, see export_data_file
+
+    Text and Excel formats report rows, JSON formats samples and the columnar
+    formats one unit per table.
+    """
+    wavelengths = export_wavelengths(data)
+    wavelength_count = len(wavelengths) if export_rho and wavelengths is not None else 0
+    result_count = len(data['results']) if export_color else 0
+    if format_name in ('parquet', 'arrow'):
+        return int(export_rho) + int(export_color)
+    if format_name == 'json':
+        return (len(result_file_names(data)) if export_rho else 0) + result_count
+    if format_name == 'ndjson':
+        return len(result_file_names(data))
+    if format_name == 'xlsx':
+        sheets = len(shard_ranges(len(result_file_names(data)), EXCEL_MAX_COLUMNS - 1))
+        return wavelength_count * sheets + result_count
+    return wavelength_count + result_count
+
+
+def export_data_file(format_name, file_path, data, settings, export_rho=True, export_color=True,
+                     table_layout='Wide', progress=None):
+    """
+    Export the data to a file of one of the export formats
+
+    Every file is written to a temporary file first and only replaces the target
+    once it is complete, a failed or cancelled export never leaves a partial file.
+    Safe to run in a background thread on an export_snapshot of the data.
+
+    Parameters:
+        format_name: 'xlsx', 'csv', 'txt', 'json', 'ndjson', 'parquet' or 'arrow'
+        file_path: Target path
+        data: Data dictionary (see export_snapshot)
+        settings: Settings dictionary (number format, header and calculation settings)
+        export_rho: Export the reflectance data
+        export_color: Export the colour data
+        table_layout: 'Wide' or 'Long' reflectance table of the columnar formats
+        progress: Optional callable(units), see export_units; returning False cancels
+
+    Returns:
+        List of written file paths
+
+    Raises:
+        ValueError: If reflectance is exported without wavelength data
+        ExportCancelled: If the progress callback cancelled the export
+    """
+    wavelengths = export_wavelengths(data)
+    if export_rho and wavelengths is None:
+        raise ValueError("Wavelength data not found. Cannot export reflectance data.")
+    if export_rho and data.get('original_wavelengths', None) is None:
+        print("Warning: Original wavelengths not found, using 5nm interpolated wavelengths for rho export.")
+
+    export_settings = settings.get('export', {})
+    decimal = decimal_mark(settings)
+    decimal_places = export_settings.get('decimal_places', 6)
+
+    if format_name in ('parquet', 'arrow'):
+        metadata = export_metadata(settings)
+        paths = table_file_paths(file_path, export_rho, export_color)
+        if export_rho:
+            names, columns = reflectance_columns(data, wavelengths)
+            table = reflectance_table(wavelengths, names, columns, table_layout, metadata)
+            with atomic_output(paths['rho']) as temp_path:
+                write_arrow_table(temp_path, table, format_name)
+            report_progress(progress)
+        if export_color:
+            table = color_table(data['results'], metadata['illuminant'], metadata['rho_lambda'], metadata)
+            with atomic_output(paths['color']) as temp_path:
+                write_arrow_table(temp_path, table, format_name)
+            report_progress(progress)
+        return list(paths.values())
+
+    with atomic_output(file_path) as temp_path:
+        if format_name == 'xlsx':
+            # Stream the columns of every sample to a write-only workbook
+            reflectance = reflectance_columns(data, wavelengths) if export_rho else None
+            colors = color_columns(data['results']) if export_color else None
+            sheet_names = write_xlsx(temp_path, wavelengths, reflectance, colors, progress)
+            print(f"Excel sheets: {', '.join(sheet_names)}")
+        elif format_name in ('json', 'ndjson'):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                writer = write_ndjson if format_name == 'ndjson' else write_json
+                writer(f, data, wavelengths, export_rho, export_color, export_metadata(settings), progress)
+        elif format_name == 'csv':
+            # Comma separated, semicolons when the decimal mark is a comma
+            separator = ';' if decimal == ',' else ','
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                if export_rho:
+                    # Missing values are written as 0
+                    names, columns = reflectance_columns(data, wavelengths, fill=0.0)
+                    headers = ["Wavelength [nm]"] + [f"Spectral Irradiance for {name} [W/sqm*nm]" for name in names]
+                    write_reflectance_text(f, wavelengths, columns, headers, separator, decimal, decimal_places,
+                                           wavelength_format='%d', line_end=os.linesep, progress=progress)
+                if export_color:
+                    if export_rho:
+                        f.write(os.linesep)
+                    names, values = color_columns(data['results'])
+                    write_color_text(f, names, values, ["File"] + COLOR_HEADERS, separator, decimal,
+                                     decimal_places, line_end=os.linesep, progress=progress)
+        elif format_name == 'txt':
+            include_header = export_settings.get('include_header', True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                if export_rho:
+                    names, columns = reflectance_columns(data, wavelengths, fill=0.0)
+                    headers = ["Lambda"] + names if include_header else None
+                    write_reflectance_text(f, wavelengths, columns, headers, '\t', decimal, decimal_places,
+                                           progress=progress)
+                if export_color:
+                    if export_rho:
+                        f.write("\n")
+                    names, values = color_columns(data['results'])
+                    headers = ["File"] + COLOR_HEADERS if include_header else None
+                    write_color_text(f, names, values, headers, '\t', decimal, decimal_places, progress=progress)
+        else:
+            raise ValueError(f"Unknown export format '{format_name}'")
+    return [file_path]
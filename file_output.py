@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+
+def _current_umask():
+    """Process umask (only readable by setting it)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Permissions of new files, applied to the temporary files which are created private
+_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def user_data_directory():
+    """
+    Per-user data directory of the application (created if missing)
+
+    Returns:
+        ~/Library/Application Support/Aleksameter (macOS), %APPDATA%/Aleksameter (Windows)
+        or ~/.aleksameter (other platforms)
+    """
+    if sys.platform == 'darwin':  # macOS
+        user_data_dir = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support', 'Aleksameter')
+    elif sys.platform == 'win32':  # Windows
+        user_data_dir = os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), 'Aleksameter')
+    else:  # Linux and other platforms
+        user_data_dir = os.path.join(os.path.expanduser('~'), '.aleksameter')
+
+    os.makedirs(user_data_dir, exist_ok=True)
+    return user_data_dir
+
+
+class ExportCancelled(Exception):
+    """Raised by an exporter when its progress callback asks to stop"""
+
+
+def report_progress(progress, count=1):
+    """
+    Report finished work units to an optional progress callback
+
+    Parameters:
+        progress: None or callable(count), returning False to cancel
+        count: Number of units finished since the last report
+
+    Raises:
+        ExportCancelled: If the callback returned False
+    """
+    if progress is not None and progress(count) is False:
+        raise ExportCancelled()
+
+
+@contextmanager
+def atomic_output(file_path):
+    """
+    Write a file through a temporary file that replaces the target on success
+
+    The temporary file is created next to the target and keeps its extension, so
+    writers that pick the format from the extension work unchanged. If the block
+    raises, the temporary file is removed and an existing target is left untouched.
+
+    Parameters:
+        file_path: Target path
+
+    Yields:
+        Temporary path to write to
+    """
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    stem, ext = os.path.splitext(file_name)
+    handle, temp_path = tempfile.mkstemp(suffix=ext, prefix=f".{stem}.", dir=directory)
+    os.close(handle)
+    try:
+        os.chmod(temp_path, _FILE_MODE)
+        yield temp_path
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
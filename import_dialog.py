@@ -1,4 +1,3 @@
-import sys
 import os
 import pandas as pd
 import numpy as np
@@ -17,8 +16,14 @@ from ui_Import import Ui_Dialog_import
 
 
 class ImportDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent, settings_service):
+        """
+        Parameters:
+            parent: Parent window
+            settings_service: SettingsService of the main window, holding the import directories
+        """
         super().__init__(parent)
+        self.settings_service = settings_service
         self.ui = Ui_Dialog_import()
         self.ui.setupUi(self)
         
@@ -642,74 +647,22 @@ class ImportDialog(QDialog):
         print("Import dialog accepted.")
         super().accept()
 
-    def get_settings_file_path(self):
-        """Get absolute path of settings file (using user data directory)"""
-        # Get user data directory
-        if sys.platform == 'darwin':  # macOS
-            user_data_dir = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support', 'Aleksameter')
-        elif sys.platform == 'win32':  # Windows
-            user_data_dir = os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), 'Aleksameter')
-        else:  # Linux and other platforms
-            user_data_dir = os.path.join(os.path.expanduser('~'), '.aleksameter')
-        
-        # Ensure directory exists
-        if not os.path.exists(user_data_dir):
-            os.makedirs(user_data_dir)
-        
-        # Complete path of settings file
-        settings_file = os.path.join(user_data_dir, "app_settings.json")
-        print(f"Import dialog settings file path: {settings_file}")
-        return settings_file
-
     def get_import_directory(self):
         """Get import directory, use cached if available, otherwise return default directory"""
         # Prioritize last directory recorded in session
         if hasattr(self, 'last_directory') and self.last_directory:
             return self.last_directory
-            
-        # Try reading last import directory from settings
-        settings_file = self.get_settings_file_path()
-        try:
-            if os.path.exists(settings_file):
-                import json
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-                    if 'import' in settings and 'default_directory' in settings['import']:
-                        return settings['import']['default_directory']
-        except Exception as e:
-            print(f"Error reading import directory settings: {e}")
         
-        # Default directory
-        return os.path.expanduser('~')
+        # Last import directory from the settings, or the home directory
+        return self.settings_service.get('import', 'default_directory', os.path.expanduser('~'))
     
     def save_import_directory(self, directory):
         """Save import directory to settings and update session variable"""
         # Update session variable
         self.last_directory = directory
         
-        # Save to settings file
-        settings_file = self.get_settings_file_path()
-        try:
-            settings = {}
-            if os.path.exists(settings_file):
-                import json
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-            
-            if 'import' not in settings:
-                settings['import'] = {}
-            
-            settings['import']['default_directory'] = directory
-            
-            # Ensure directory exists
-            settings_dir = os.path.dirname(settings_file)
-            if not os.path.exists(settings_dir):
-                os.makedirs(settings_dir)
-            
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f, indent=4)
-        except Exception as e:
-            print(f"Error saving import directory settings: {e}")
+        # Saved by the settings service together with other changes
+        self.settings_service.set('import', 'default_directory', directory)
 
     def get_selected_data(self):
         """
@@ -750,39 +703,8 @@ class ImportDialog(QDialog):
 
     def get_directory(self, key):
         """Get directory for specific file type, return None if doesn't exist"""
-        settings_file = self.get_settings_file_path()
-        try:
-            if os.path.exists(settings_file):
-                import json
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-                    if 'import' in settings and key in settings['import']:
-                        return settings['import'][key]
-        except Exception as e:
-            print(f"Error getting directory settings: {e}")
-        return None
+        return self.settings_service.get('import', key)
     
     def save_directory(self, key, directory):
-        """Save directory for specific file type to settings file"""
-        settings_file = self.get_settings_file_path()
-        try:
-            settings = {}
-            if os.path.exists(settings_file):
-                import json
-                with open(settings_file, 'r') as f:
-                    settings = json.load(f)
-            
-            if 'import' not in settings:
-                settings['import'] = {}
-            
-            settings['import'][key] = directory
-            
-            # Ensure directory exists
-            settings_dir = os.path.dirname(settings_file)
-            if not os.path.exists(settings_dir):
-                os.makedirs(settings_dir)
-            
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f, indent=4)
-        except Exception as e:
-            print(f"Error saving directory settings: {e}")
\ No newline at end of file
+        """Save directory for specific file type to the settings"""
+        self.settings_service.set('import', key, directory)
@@ -1,35 +1,62 @@
 import os
 import sys
+import time
 import numpy as np
-import pandas as pd
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QMessageBox, QTableWidgetItem,
-    QHeaderView, QFileDialog, QMenu, QColorDialog, QVBoxLayout, QDialog, QPushButton, QWidget, QSizePolicy
+    QApplication, QMainWindow, QMessageBox, QLineEdit, QLabel, QHBoxLayout,
+    QHeaderView, QFileDialog, QMenu, QColorDialog, QVBoxLayout, QDialog, QPushButton, QWidget, QSizePolicy,
+    QToolTip
 )
-from PySide6.QtCore import Qt, QSize, QTimer
-from PySide6.QtGui import QAction, QColor, QPixmap, QIcon, QClipboard, QScreen
-import matplotlib.pyplot as plt
+from PySide6.QtCore import Qt, QSize, QTimer, QThread
+from PySide6.QtGui import QAction, QPixmap, QIcon, QClipboard, QScreen, QCursor
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-import matplotlib.patches as patches
-import scipy.interpolate as interp
-import json
 import matplotlib.ticker as ticker
-import warnings
-import colour
-from colour.plotting.diagrams import plot_chromaticity_diagram_colours
-from colour.plotting import plot_RGB_colourspaces_in_chromaticity_diagram_CIE1931
 
+# Dialogs, the colour library, scipy and pandas are imported on first use to keep startup fast
 from ui_form import Ui_MainWindow
-from import_dialog import ImportDialog
-from export_dialog import ExportDialog
-from plot_dialog import PlotDialog
-from settings_dialog import SettingsDialog
-from about_dialog import AboutDialog
-from reflectance_data_dialog import ReflectanceDataDialog
-from color_calculator import ColorCalculator
-from cie_data_dialog import CIEDataDialog
+from color_calculator import DEFAULT_WAVELENGTHS
+from startup_timing import startup_timer
+from measurement_files import load_measurement_file
+from spectral_data import build_spectral_block_from_data, build_chromaticity_block
+from plot_picking import ChromaticityIndex, SpectralIndex, pixel_tolerance
+from results_model import ResultsTableModel, ResultsFilterProxyModel
+from spectral_data import build_results_block, subset_block
+from result_filter import parse_filter_query, FILTER_SYNTAX
+from table_text import decimal_mark, include_header, results_columns, join_table
+from clipboard_copy import copy_text_to_clipboard
+from export_jobs import ExportJobPanel
+from settings_service import SettingsService, user_settings_path
+from plot_renderer import (
+    resolve_reflectance_mode, draw_reflectance_collection, draw_reflectance_envelope, reflectance_upper_limit,
+    resolve_cie_mode, draw_chromaticity_diagram, draw_cie_markers, draw_cie_density,
+    draw_simplified_boundary, diagram_ready, spectral_locus, chromaticity_background
+)
+
+
+class DiagramPrewarmWorker(QThread):
+    """
+    Compute the spectral locus and the chromaticity diagram background off the UI thread
+    
+    Both results are cached by plot_renderer, so the finished signal only tells the
+    main window to redraw.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.duration = 0.0
+    
+    def run(self):
+        start_time = time.perf_counter()
+        try:
+            spectral_locus()
+            chromaticity_background()
+        except Exception as e:
+            print(f"Error preparing chromaticity diagram: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        self.duration = time.perf_counter() - start_time
 
 
 class MainWindow(QMainWindow):
@@ -56,26 +83,26 @@ class MainWindow(QMainWindow):
         # Set initial window size
         self.resize(833, 660)  # Set to 833x660 size
         
-        # Initialize default settings
-        self.settings = self.get_default_settings()
-        
-        # Load settings from config file (will override default settings)
-        self.load_settings()
-        
-        # Initialize color calculator
-        self.color_calculator = ColorCalculator()
+        # Load settings from config file on top of the defaults, the settings service
+        # keeps them in memory and saves changes in batches
+        self.settings_service = SettingsService(self.get_settings_file_path(), self.get_default_settings(), self)
+        self.settings = self.settings_service.settings
+        startup_timer.mark("Main window UI and settings")
         
-        # Set rho_lambda value
-        self.color_calculator.set_rho_lambda(self.settings['general']['rho_lambda'])
+        # Export jobs running in the background
+        self.export_jobs = []
         
-        # Set illuminant type
-        self.color_calculator.set_illuminant(self.settings['general']['illuminant'])
+        # The color calculator loads its CIE and illuminant tables on first use (see prewarm)
+        self._color_calculator = None
+        self._result_cache = None
+        self.diagram_worker = None
         
         # Initialize data
         self.reset_data()
         
         # Set up interface
         self.setup_ui()
+        startup_timer.mark("Plots and results table")
         
         # Create menu actions
         self.connect_menu_actions()
@@ -99,17 +126,68 @@ class MainWindow(QMainWindow):
         # Initially disable Export and Plot menu options
         self.update_menu_state(False)
     
+    @property
+    def color_calculator(self):
+        """Color calculator, created with the current settings on first use"""
+        if self._color_calculator is None:
+            from color_calculator import ColorCalculator
+            self._color_calculator = ColorCalculator()
+            
+            # Set rho_lambda value
+            self._color_calculator.set_rho_lambda(self.settings['general']['rho_lambda'])
+            
+            # Set illuminant type
+            self._color_calculator.set_illuminant(self.settings['general']['illuminant'])
+        return self._color_calculator
+    
+    @property
+    def result_cache(self):
+        """On-disk cache of calculated samples, repeat imports skip the calculation"""
+        if self._result_cache is None:
+            from result_cache import ResultCache
+            self._result_cache = ResultCache()
+        return self._result_cache
+    
+    def prewarm(self):
+        """
+        Load expensive resources after the window is shown
+        
+        The calculator tables are loaded right away, the chromaticity diagram (which needs
+        the colour library) is computed in a background thread and the CIE plot is redrawn
+        once it is ready.
+        """
+        start_time = time.perf_counter()
+        self.color_calculator
+        startup_timer.record_deferred("Color calculator tables", time.perf_counter() - start_time)
+        
+        if not diagram_ready() and self.diagram_worker is None:
+            self.diagram_worker = DiagramPrewarmWorker(self)
+            self.diagram_worker.finished.connect(self.on_diagram_ready)
+            self.diagram_worker.start()
+    
+    def on_diagram_ready(self):
+        """Redraw the CIE plots with the coloured diagram once it has been computed"""
+        startup_timer.record_deferred("Chromaticity diagram (background thread)", self.diagram_worker.duration)
+        self.update_cie_plot()
+        if self.cie_dialog is not None and self.cie_dialog.isVisible():
+            self.update_expanded_cie_plot()
+    
     def reset_data(self):
         """Reset data storage"""
         self.data = {
-            'wavelengths': self.color_calculator.wavelengths,
+            'wavelengths': DEFAULT_WAVELENGTHS.copy(),
             'original_wavelengths': None,  # Used to store original measurement wavelength data (usually 1nm interval)
             'reflectance': {},
             'results': [],
             'file_names': [],
             # Add new field to store original measurement data
-            'raw_measurements': {}  # Format: {'file_name': {'values': original values, 'wavelengths': wavelengths}}
+            'raw_measurements': {},  # Format: {'file_name': {'values': original values, 'wavelengths': wavelengths}}
+            # Header fields of the measurement files (date, integration time, ...), used by the results filter
+            'metadata': {}  # Format: {'file_name': {'header key': 'value'}}
         }
+        if hasattr(self, 'results_proxy'):
+            self.results_proxy.set_metadata(self.data['metadata'])
+        self.invalidate_data_cache()
         
         # Reset charts
         if hasattr(self, 'reflectance_canvas'):
@@ -118,12 +196,203 @@ class MainWindow(QMainWindow):
             self.update_cie_plot()
         
         # Clear results table
-        if hasattr(self, 'ui') and hasattr(self.ui, 'table_results'):
-            self.ui.table_results.setRowCount(0)
+        if hasattr(self, 'results_model'):
+            self.results_model.clear()
             
         # Disable Export and Plot menu options
         self.update_menu_state(False)
     
+    def invalidate_data_cache(self):
+        """Drop data derived from the results (call whenever self.data changes)"""
+        self.spectral_block = None
+        self.chromaticity_block = None
+        self.spectral_index = None
+        self.chromaticity_index = None
+    
+    def get_visible_names(self):
+        """Get the file names passing the results filter, or None if no filter is active"""
+        if not hasattr(self, 'results_proxy'):
+            return None
+        return self.results_proxy.accepted_names()
+    
+    def filter_block(self, block):
+        """Restrict a spectral or chromaticity block to the samples passing the results filter"""
+        visible_names = self.get_visible_names()
+        if visible_names is None:
+            return block
+        return subset_block(block, [row for row, name in enumerate(block['names']) if name in visible_names])
+    
+    def get_chromaticity_block(self):
+        """Get the columnar xy coordinates and colours of the shown results, built once per data or filter change"""
+        if self.chromaticity_block is None:
+            self.chromaticity_block = self.filter_block(build_chromaticity_block(self.data['results']))
+        return self.chromaticity_block
+    
+    def get_spectral_block(self):
+        """Get the columnar reflectance block of the shown samples, built once per data or filter change"""
+        if self.spectral_block is None:
+            self.spectral_block = self.filter_block(build_spectral_block_from_data(self.data))
+        return self.spectral_block
+    
+    def get_chromaticity_index(self):
+        """Get the KD-tree over the result xy coordinates, rebuilt only when the results change"""
+        if self.chromaticity_index is None:
+            self.chromaticity_index = ChromaticityIndex(self.get_chromaticity_block()['xy'])
+        return self.chromaticity_index
+    
+    def get_spectral_index(self):
+        """Get the nearest-curve index over the reflectance grid, rebuilt only when the results change"""
+        if self.spectral_index is None:
+            block = self.get_spectral_block()
+            self.spectral_index = SpectralIndex(block['wavelengths'], block['reflectance'])
+        return self.spectral_index
+    
+    def pick_cie_sample(self, event):
+        """
+        Find the sample under the mouse on the CIE plot
+        
+        Parameters:
+            event: Matplotlib mouse event
+        
+        Returns:
+            Row in the chromaticity block, or None
+        """
+        if event.inaxes is None or event.xdata is None or not self.data['results']:
+            return None
+        tolerance = max(pixel_tolerance(event.inaxes))
+        return self.get_chromaticity_index().nearest(event.xdata, event.ydata, tolerance)
+    
+    def pick_reflectance_sample(self, event):
+        """
+        Find the curve under the mouse on the reflectance plot
+        
+        Parameters:
+            event: Matplotlib mouse event
+        
+        Returns:
+            Row in the spectral block, or None
+        """
+        if event.inaxes is None or event.xdata is None or not self.data['reflectance']:
+            return None
+        _, tolerance = pixel_tolerance(event.inaxes)
+        return self.get_spectral_index().nearest(event.xdata, event.ydata, tolerance)
+    
+    def _on_cie_hover(self, event):
+        """Show the sample under the mouse on the CIE plot as a tooltip"""
+        row = self.pick_cie_sample(event)
+        if row is None:
+            QToolTip.hideText()
+            return
+        block = self.get_chromaticity_block()
+        x, y = block['xy'][row]
+        QToolTip.showText(QCursor.pos(), f"{block['names'][row]}\nx = {x:.4f}, y = {y:.4f}", self.cie_canvas)
+    
+    def _on_reflectance_hover(self, event):
+        """Show the curve under the mouse on the reflectance plot as a tooltip"""
+        row = self.pick_reflectance_sample(event)
+        if row is None:
+            QToolTip.hideText()
+            return
+        QToolTip.showText(QCursor.pos(), f"{self.get_spectral_block()['names'][row]}\n{event.xdata:.0f} nm", self.reflectance_canvas)
+    
+    def _on_cie_click(self, event):
+        """Select the clicked sample of the CIE plot in the results table"""
+        row = self.pick_cie_sample(event)
+        if row is not None:
+            self.select_result_row(self.get_chromaticity_block()['names'][row])
+    
+    def _on_reflectance_click(self, event):
+        """Select the clicked curve of the reflectance plot in the results table"""
+        row = self.pick_reflectance_sample(event)
+        if row is not None:
+            self.select_result_row(self.get_spectral_block()['names'][row])
+    
+    def select_result_row(self, file_name):
+        """Select and show the results table row of a sample"""
+        source_row = self.results_model.row_of(file_name)
+        row = None if source_row is None else self.results_proxy.proxy_row(source_row)
+        if row is not None:
+            self.ui.table_results.selectRow(row)
+            self.ui.table_results.scrollTo(self.results_proxy.index(row, 1))
+    
+    def get_selected_file_names(self):
+        """Get the file names of the rows selected in the results table"""
+        if not hasattr(self, 'results_proxy') or self.ui.table_results.selectionModel() is None:
+            return []
+        return [self.results_model.file_name(self.results_proxy.source_row(index.row()))
+                for index in self.ui.table_results.selectionModel().selectedRows(1)]
+    
+    def on_results_selection_changed(self):
+        """Redraw the plots whose highlighting and legend follow the table selection"""
+        sample_count = len(self.get_spectral_block()['names'])
+        if resolve_reflectance_mode(self.settings['plot'].get('reflectance_render_mode', 'Auto'), sample_count) != 'Lines':
+            self.update_reflectance_plot()
+        if resolve_cie_mode(self.settings['plot'].get('cie_render_mode', 'Auto'), len(self.get_chromaticity_block()['names'])) == 'Density':
+            self.update_cie_plot()
+    
+    def setup_results_filter(self):
+        """Add the filter field above the results table"""
+        filter_layout = QHBoxLayout()
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.lineEdit_results_filter = QLineEdit(self.ui.tableGroup)
+        self.lineEdit_results_filter.setPlaceholderText("Filter: name*, x:0.3..0.5, color:#FF62, date:2023-04-01..2023-04-30, time:50..100")
+        self.lineEdit_results_filter.setToolTip(FILTER_SYNTAX)
+        self.lineEdit_results_filter.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.lineEdit_results_filter)
+        
+        self.label_results_count = QLabel(self.ui.tableGroup)
+        filter_layout.addWidget(self.label_results_count)
+        
+        self.ui.tableLayout.insertLayout(0, filter_layout)
+        
+        # Apply the filter shortly after typing stops
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_results_filter)
+        self.lineEdit_results_filter.textChanged.connect(self.filter_timer.start)
+    
+    def apply_results_filter(self):
+        """Filter the results table and restrict the plots to the shown samples"""
+        try:
+            criteria = parse_filter_query(self.lineEdit_results_filter.text())
+        except ValueError as e:
+            # Keep the current filter until the query is valid
+            self.lineEdit_results_filter.setStyleSheet("QLineEdit { color: #c00000; }")
+            self.label_results_count.setText(str(e))
+            return
+        self.lineEdit_results_filter.setStyleSheet("")
+        
+        # Keep the selection of the samples that are still shown
+        selected_names = self.get_selected_file_names()
+        self.results_proxy.set_filter(criteria)
+        for name in selected_names:
+            source_row = self.results_model.row_of(name)
+            row = self.results_proxy.proxy_row(source_row) if source_row is not None else None
+            if row is not None:
+                self.ui.table_results.selectionModel().select(
+                    self.results_proxy.index(row, 0),
+                    self.ui.table_results.selectionModel().SelectionFlag.Select | self.ui.table_results.selectionModel().SelectionFlag.Rows)
+        self.update_results_count()
+        
+        # Plots only show the filtered subset
+        self.invalidate_data_cache()
+        self.update_reflectance_plot()
+        self.update_cie_plot()
+        if self.cie_dialog is not None and self.cie_dialog.isVisible():
+            self.update_expanded_cie_plot()
+    
+    def update_results_count(self):
+        """Show how many results pass the filter"""
+        if not hasattr(self, 'label_results_count'):
+            return
+        total = self.results_model.rowCount()
+        if self.results_proxy.is_filtered():
+            self.label_results_count.setText(f"{self.results_proxy.rowCount()} of {total} shown")
+        else:
+            self.label_results_count.setText(f"{total} results" if total else "")
+    
     def setup_ui(self):
         """Set up UI components"""
         # Set up reflectance chart
@@ -160,6 +429,10 @@ class MainWindow(QMainWindow):
         # Connect canvas resize event to ensure chart adapts to container
         self.reflectance_canvas.mpl_connect('resize_event', self._on_reflectance_resize)
         
+        # Hover tooltips and click-to-select on curves
+        self.reflectance_canvas.mpl_connect('motion_notify_event', self._on_reflectance_hover)
+        self.reflectance_canvas.mpl_connect('button_press_event', self._on_reflectance_click)
+        
         # Initial drawing
         self.update_reflectance_plot()
     
@@ -203,6 +476,10 @@ class MainWindow(QMainWindow):
         
         # Listen for resize events to adjust chart
         self.cie_canvas.mpl_connect('resize_event', self._on_cie_resize)
+        
+        # Hover tooltips and click-to-select on points
+        self.cie_canvas.mpl_connect('motion_notify_event', self._on_cie_hover)
+        self.cie_canvas.mpl_connect('button_press_event', self._on_cie_click)
     
     def _on_cie_resize(self, event):
         """Handle CIE chart resize event"""
@@ -213,11 +490,14 @@ class MainWindow(QMainWindow):
     
     def setup_results_table(self):
         """Set up results table"""
-        # Set table headers
-        self.ui.table_results.setColumnCount(6)  # Increase to 6 columns, add color column
-        self.ui.table_results.setHorizontalHeaderLabels([
-            "CLR", "File Name", "x", "y", "sRGB Linear", "sRGB Gamma"
-        ])
+        # The table is a sorted and filtered view over the columnar results model, headers come from the model
+        self.results_model = ResultsTableModel(self)
+        self.results_model.set_rgb_format(self.settings['general']['rgb_values'])
+        self.results_proxy = ResultsFilterProxyModel(self)
+        self.results_proxy.set_metadata(self.data['metadata'])
+        self.results_proxy.setSourceModel(self.results_model)
+        self.ui.table_results.setModel(self.results_proxy)
+        self.setup_results_filter()
         
         # Get table header
         header = self.ui.table_results.horizontalHeader()
@@ -244,7 +524,7 @@ class MainWindow(QMainWindow):
         
         # Set table style
         self.ui.table_results.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 font-size: 9pt;
             }
@@ -254,7 +534,7 @@ class MainWindow(QMainWindow):
                 font-size: 9pt;
                 border: 1px solid #d0d0d0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 2px;
             }
         """)
@@ -263,6 +543,7 @@ class MainWindow(QMainWindow):
         self.ui.table_results.setAlternatingRowColors(True)
         self.ui.table_results.setSortingEnabled(True)
         self.ui.table_results.setSelectionBehavior(self.ui.table_results.SelectionBehavior.SelectRows)
+        self.ui.table_results.selectionModel().selectionChanged.connect(self.on_results_selection_changed)
         
         # Set initial column width adjustment
         QTimer.singleShot(100, self.adjust_table_columns)
@@ -328,80 +609,17 @@ class MainWindow(QMainWindow):
     
     def get_settings_file_path(self):
         """Get absolute path of settings file (using user data directory)"""
-        # Get user data directory
-        if sys.platform == 'darwin':  # macOS
-            user_data_dir = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support', 'Aleksameter')
-        elif sys.platform == 'win32':  # Windows
-            user_data_dir = os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), 'Aleksameter')
-        else:  # Linux and other platforms
-            user_data_dir = os.path.join(os.path.expanduser('~'), '.aleksameter')
-        
-        # Ensure directory exists
-        if not os.path.exists(user_data_dir):
-            os.makedirs(user_data_dir)
-        
-        # Complete settings file path
-        settings_file = os.path.join(user_data_dir, "app_settings.json")
+        settings_file = user_settings_path()
         print(f"Settings file path: {settings_file}")
         return settings_file
     
     def load_settings(self):
-        """Load settings"""
-        try:
-            settings_file = self.get_settings_file_path()
-            
-            # Check if file exists and is not empty
-            if os.path.exists(settings_file) and os.path.getsize(settings_file) > 0:
-                with open(settings_file, 'r') as f:
-                    loaded_settings = json.loads(f.read())
-                
-                # Get default settings as base
-                default_settings = self.get_default_settings()
-                
-                # Create new settings dictionary starting from defaults
-                complete_settings = default_settings.copy()
-                
-                # Override defaults with loaded settings
-                for category in loaded_settings:
-                    if category in complete_settings:
-                        complete_settings[category].update(loaded_settings[category])
-                    else:
-                        complete_settings[category] = loaded_settings[category]
-                
-                # Apply complete settings
-                self.settings = complete_settings
-                print(f"Settings loaded from {settings_file}")
-            else:
-                print(f"Settings file {settings_file} does not exist or is empty, using default settings")
-                # Use default settings
-                self.settings = self.get_default_settings()
-                # Create default settings file
-                self.save_settings()
-        except Exception as e:
-            print(f"Error loading settings: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            # Use default settings and create settings file
-            self.settings = self.get_default_settings()
-            self.save_settings()
+        """Reload settings from the settings file (the settings dictionary is updated in place)"""
+        self.settings_service.load()
     
     def save_settings(self):
-        """Save settings"""
-        try:
-            settings_file = self.get_settings_file_path()
-            
-            # Ensure directory exists
-            settings_dir = os.path.dirname(settings_file)
-            if not os.path.exists(settings_dir):
-                os.makedirs(settings_dir)
-                
-            with open(settings_file, 'w') as f:
-                f.write(json.dumps(self.settings, indent=4))
-            print(f"Settings saved to {settings_file}")
-        except Exception as e:
-            print(f"Error saving settings: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        """Save settings, the settings service writes all changes made within a short delay at once"""
+        self.settings_service.mark_changed()
             
     def get_default_settings(self):
         """Get default settings"""
@@ -424,6 +642,8 @@ class MainWindow(QMainWindow):
                 'reflectance_show_legend': True,
                 'cie_show_legend': True,
                 'reflectance_color': '#1f77b4',  # Default blue
+                'reflectance_render_mode': 'Auto',  # Lines, or a single line collection for many samples
+                'cie_render_mode': 'Auto',  # Markers, or a density for many samples
                 
                 # Add font size settings
                 'reflectance_font_size': 'Medium',  # Default medium font size
@@ -474,7 +694,8 @@ class MainWindow(QMainWindow):
     
     def open_import_dialog(self):
         """Open import dialog"""
-        dialog = ImportDialog(self)
+        from import_dialog import ImportDialog
+        dialog = ImportDialog(self, self.settings_service)
         result = dialog.exec()
         
         print(f"Import dialog result: {result}")
@@ -588,6 +809,7 @@ class MainWindow(QMainWindow):
                     'values': data['values'].copy(),
                     'wavelengths': data['wavelengths'].copy()
                 }
+                self.data['metadata'][file_name] = data.get('metadata', {})
             except Exception as e:
                 error_msg = f"Error loading file {path}: {str(e)}"
                 print(f"Error: {error_msg}")
@@ -599,6 +821,16 @@ class MainWindow(QMainWindow):
         
         print(f"Processing {len(measurements)} measurement files...")
         
+        # Snapshot of the calculator settings, shared by all measurements of this import
+        config = self.color_calculator.config()
+        
+        # Calculate the samples that are not in the result cache yet
+        from result_cache import compute_colors_cached
+        computed_results, cached_count = compute_colors_cached(
+            [(measurement['values'], measurement['wavelengths']) for measurement in measurements],
+            config, self.color_calculator.tables, self.result_cache)
+        print(f"Result cache: {cached_count}/{len(measurements)} measurements cached")
+        
         # Process each measurement data
         for i, measurement in enumerate(measurements):
             try:
@@ -616,8 +848,8 @@ class MainWindow(QMainWindow):
                 print(f"  wavelength range: {min(wavelengths):.1f}-{max(wavelengths):.1f} nm")
                 print(f"  Number of data points: {len(wavelengths)}")
                 
-                # Calculate color parameters
-                result = self.color_calculator.process_measurement(values, wavelengths)
+                # Calculated or cached color parameters
+                result = computed_results[i]
                 
                 if result is None:
                     print(f"  Error: Processing failed, no result returned")
@@ -658,6 +890,7 @@ class MainWindow(QMainWindow):
             
         # Update interface
         print("Updating interface...")
+        self.invalidate_data_cache()
         try:
             self.update_reflectance_plot()
             self.update_cie_plot()
@@ -711,115 +944,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", error_msg)
     
     def load_data_from_file(self, file_path):
-        """Load data from file"""
-        try:
-            # Choose different loading methods based on file extension
-            ext = os.path.splitext(file_path)[1].lower()
-            
-            # Process CSV files (specifically for example format)
-            if ext == '.csv':
-                print(f"Loading CSV file: {file_path}")
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                
-                # Find where data section starts
-                data_start_index = -1
-                for i, line in enumerate(lines):
-                    if line.startswith("Wavelength [nm],"):
-                        data_start_index = i + 1
-                        break
-                
-                if data_start_index >= 0:
-                    print(f"Found data section at line{data_start_index}")
-                    # Extract data
-                    wavelengths = []
-                    values = []
-                    for line in lines[data_start_index:]:
-                        parts = line.strip().split(',')
-                        if len(parts) >= 2 and parts[0] and parts[1]:
-                            try:
-                                wavelength = float(parts[0])
-                                value = float(parts[1])
-                                wavelengths.append(wavelength)
-                                values.append(value)
-                            except ValueError:
-                                continue
-                    
-                    if wavelengths and values:
-                        wavelengths_np = np.array(wavelengths)
-                        values_np = np.array(values)
-                        
-                        # Print wavelength information
-                        if len(wavelengths) > 1:
-                            step = wavelengths[1] - wavelengths[0]
-                            print(f"Extracted{len(wavelengths)}data points")
-                            print(f"wavelength range: {wavelengths[0]}-{wavelengths[-1]}nm, step: {step}nm")
-                            
-                            # Check if wavelength is uniform
-                            diff = np.diff(wavelengths_np)
-                            if not np.allclose(diff, step, rtol=1e-3):
-                                print("Warning: Wavelength step is not uniform!")
-                                print(f"Min step: {np.min(diff)}nm, Max step: {np.max(diff)}nm")
-                            
-                            # Check value range
-                            print(f"Value range: {np.min(values_np)}-{np.max(values_np)}")
-                        
-                        return {
-                            'wavelengths': wavelengths_np,
-                            'values': values_np
-                        }
-                
-                # If above parsing fails, try regular CSV parsing
-                print("Trying regular CSV parsing method...")
-                try:
-                    data = np.genfromtxt(file_path, delimiter=',', skip_header=1, names=True)
-                    if data.size > 0:
-                        # Try to find wavelength and value columns
-                        col_names = data.dtype.names
-                        wavelength_col = None
-                        value_col = None
-                        
-                        # Try to match column names
-                        for col in col_names:
-                            col_lower = col.lower()
-                            if 'wave' in col_lower or 'lambda' in col_lower or 'nm' in col_lower:
-                                wavelength_col = col
-                            elif 'value' in col_lower or 'reflectance' in col_lower or 'intensity' in col_lower:
-                                value_col = col
-                        
-                        # If can't find suitable column names, use first two columns
-                        if wavelength_col is None and len(col_names) > 0:
-                            wavelength_col = col_names[0]
-                        if value_col is None and len(col_names) > 1:
-                            value_col = col_names[1]
-                        
-                        if wavelength_col and value_col:
-                            wavelengths_np = data[wavelength_col]
-                            values_np = data[value_col]
-                            
-                            # Print wavelength information
-                            if len(wavelengths_np) > 1:
-                                step = wavelengths_np[1] - wavelengths_np[0]
-                                print(f"Using columns '{wavelength_col}' and '{value_col}'")
-                                print(f"wavelength range: {wavelengths_np[0]}-{wavelengths_np[-1]}nm, step: {step}nm")
-                                print(f"Value range: {np.min(values_np)}-{np.max(values_np)}")
-                            
-                            return {
-                                'wavelengths': wavelengths_np,
-                                'values': values_np
-                            }
-                except Exception as e:
-                    print(f"Regular CSV parsing failed: {e}")
-            
-            # If other file type or CSV parsing failed
-            print(f"Unsupported file type: {ext}")
-            return None
-            
-        except Exception as e:
-            print(f"Error loading file: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        """Load data from file (see measurement_files.load_measurement_file)"""
+        return load_measurement_file(file_path)
     
     def update_reflectance_plot(self):
         """Update reflectance chart"""
@@ -852,12 +978,34 @@ class MainWindow(QMainWindow):
         # Enable grid
         ax.grid(True, linestyle='--', alpha=0.7)
         
+        render_mode = resolve_reflectance_mode(self.settings['plot'].get('reflectance_render_mode', 'Auto'),
+                                               len(self.get_spectral_block()['names']))
+        visible_names = self.get_visible_names()
+        
         # Check if there's data to plot
-        if self.data['reflectance']:
+        if self.data['reflectance'] and render_mode in ('Collection', 'Envelope'):
+            block = self.get_spectral_block()
+            show_legend = self.settings['plot'].get('reflectance_show_legend', True)
+            if render_mode == 'Envelope':
+                # Very high sample counts: statistical bands, selected samples drawn on top
+                max_reflectance = draw_reflectance_envelope(ax, block, self.get_selected_file_names(), show_legend, legend_size=7)
+                print(f"Plotted statistical envelope of {len(block['names'])} reflectance curves")
+            else:
+                # High sample counts: one LineCollection from the columnar block, legend only for the selection
+                draw_reflectance_collection(ax, block, self.get_selected_file_names(), show_legend, legend_size=7)
+                max_reflectance = np.max(block['reflectance']) if len(block['names']) > 0 else 0
+                print(f"Plotted {len(block['names'])} reflectance curves as a line collection")
+            
+            # Adaptively adjust Y-axis range
+            ax.set_ylim(0, reflectance_upper_limit(max_reflectance))
+        elif self.data['reflectance']:
             max_reflectance = 0
             
-            # Plot reflectance data
+            # Plot reflectance data (only the samples passing the results filter)
             for file_name, result_data in self.data['reflectance'].items():
+                if visible_names is not None and file_name not in visible_names:
+                    continue
+                
                 # Get wavelength and reflectance data
                 if 'reflectance_1nm' in result_data and 'wavelengths_1nm' in result_data:
                     wavelengths = result_data['wavelengths_1nm']
@@ -874,6 +1022,7 @@ class MainWindow(QMainWindow):
                 if len(wavelengths) != len(reflectance):
                     try:
                         # Perform interpolation
+                        import scipy.interpolate as interp
                         source_wavelengths = np.linspace(wavelengths[0], wavelengths[-1], len(reflectance))
                         interp_func = interp.interp1d(source_wavelengths, reflectance, bounds_error=False, fill_value="extrapolate")
                         reflectance = interp_func(wavelengths)
@@ -942,221 +1091,14 @@ class MainWindow(QMainWindow):
         # Enable axis background settings to ensure grid is behind all elements
         ax.set_axisbelow(True)
         
-        try:
-            # Disable warning messages
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                
-                # First draw colored background of chromaticity diagram
-                plot_chromaticity_diagram_colours(
-                    axes=ax,
-                    diagram_colours="RGB",  # Use RGB color
-                    method="CIE 1931",  # Use CIE 1931 method
-                    standalone=False,  # Not standalone plotting
-                    title=False,  # Don't use default title
-                    bounding_box=(0, 0.8, 0, 0.9)  # Restore original settings
-                )
-                
-                # Get spectral locus data points
-                cmfs = colour.colorimetry.MSDS_CMFS['CIE 1931 2 Degree Standard Observer']
-                XYZ = cmfs.values
-                xy = colour.XYZ_to_xy(XYZ)
-                wavelengths = cmfs.wavelengths
-                
-                # Create wavelength to coordinate mapping
-                wavelength_dict = {wl: (x, y) for wl, (x, y) in zip(wavelengths, xy)}
-                
-                # Define wavelength range we want to mark (460-620nm, every 20nm)
-                custom_wavelength_labels = list(range(460, 640, 20))
-                
-                # Create smooth boundary lines - use more interpolation points for smoother effect
-                # Use scipy interpolation method
-                from scipy.interpolate import interp1d
-                
-                # Create closed spectral locus point list (head-to-tail connection)
-                # Spectral locus line
-                x_locus = np.append(xy[..., 0], xy[0, 0])
-                y_locus = np.append(xy[..., 1], xy[0, 1])
-                
-                # Create parameterized coordinates for interpolation
-                t = np.linspace(0, 1, len(x_locus))
-                
-                # Create interpolation functions
-                fx = interp1d(t, x_locus, kind='cubic')
-                fy = interp1d(t, y_locus, kind='cubic')
-                
-                # Generate denser points for interpolation to make curves smoother
-                t_new = np.linspace(0, 1, 1000)
-                x_smooth = fx(t_new)
-                y_smooth = fy(t_new)
-                
-                # Draw smooth spectral boundary lines with high zorder
-                ax.plot(
-                    x_smooth, 
-                    y_smooth, 
-                    color='black', 
-                    linewidth=1.0,
-                    solid_capstyle='round',
-                    zorder=10
-                )
-                
-                # Purple line - connect highest and lowest wavelength points
-                purple_line = np.vstack([
-                    [xy[-1, 0], xy[-1, 1]],  # Highest wavelength points
-                    [xy[0, 0], xy[0, 1]]      # Lowest wavelength points
-                ])
-                
-                # Draw purple line with dashed style
-                ax.plot(
-                    purple_line[:, 0], 
-                    purple_line[:, 1], 
-                    color='black', 
-                    linewidth=1.0,
-                    linestyle='--',
-                    zorder=10
-                )
-                
-                # Manually draw gamut ensuring use of thin black lines
-                gamut = self.settings['general']['gamut']
-                
-                # Draw gamut boundaries - define corresponding vertices based on selected gamut
-                if gamut == 'None':
-                    # Don't draw gamut
-                    pass
-                elif gamut == 'sRGB':
-                    # sRGB gamut vertices
-                    r = (0.64, 0.33)
-                    g = (0.30, 0.60)
-                    b = (0.15, 0.06)
-                elif gamut == 'Adobe RGB':
-                    # Adobe RGB gamut vertices
-                    r = (0.64, 0.33)
-                    g = (0.21, 0.71)
-                    b = (0.15, 0.06)
-                elif gamut == 'HTC VIVE Pro Eye':
-                    # HTC VIVE Pro Eye gamut vertices (precise values)
-                    r = (0.6585, 0.3407)
-                    g = (0.2326, 0.7119)
-                    b = (0.1431, 0.0428)
-                elif gamut == 'Meta Oculus Quest 1':
-                    # Meta Oculus Quest 1 gamut vertices (precise values)
-                    r = (0.6596, 0.3396)
-                    g = (0.2395, 0.7069)
-                    b = (0.1452, 0.0531)
-                elif gamut == 'Meta Oculus Quest 2':
-                    # Meta Oculus Quest 2 gamut vertices (precise values)
-                    r = (0.6364, 0.3305)
-                    g = (0.3032, 0.5938)
-                    b = (0.1536, 0.0632)
-                elif gamut == 'Meta Oculus Rift':
-                    # Meta Oculus Rift gamut vertices (precise values)
-                    r = (0.6690, 0.3300)
-                    g = (0.2545, 0.7015)
-                    b = (0.1396, 0.0519)
-                else:
-                    # Default to sRGB
-                    r = (0.64, 0.33)
-                    g = (0.30, 0.60)
-                    b = (0.15, 0.06)
-                
-                # Only create and draw gamut polygon when gamut is not 'None'
-                if gamut != 'None':
-                    # Create closed polygon point list
-                    x_points = [r[0], g[0], b[0], r[0]]
-                    y_points = [r[1], g[1], b[1], r[1]]
-                    
-                    # Draw gamut boundary and add labels
-                    ax.plot(x_points, y_points, 'k-', linewidth=1.5, label=gamut)
-                
-                # Draw currently used illuminant points
-                illuminant = self.settings['general']['illuminant']
-                
-                # Common illuminant xy coordinates
-                illuminant_coords = {
-                    'D65': (0.3128, 0.3290),
-                    'D50': (0.3457, 0.3585),
-                    'A': (0.4476, 0.4074),
-                    'E': (1/3, 1/3)  # Equal energy illuminant at (1/3, 1/3)
-                }
-                
-                # Remove all possibly remaining marker points and text annotations (keep this code)
-                for child in ax.get_children():
-                    # Remove text annotations (wavelength numbers)
-                    if hasattr(child, 'get_text') and child.get_text() and child.get_text().isdigit():
-                        child.remove()
-                    # Remove point markers, but not data points
-                    if hasattr(child, 'get_marker') and child.get_marker() not in [None, 'None', ''] and child.get_zorder() < 30:
-                        child.remove()
-                
-                # Draw illuminant points after removing marker points
-                if illuminant in illuminant_coords:
-                    # Get illuminant coordinates
-                    x_illum, y_illum = illuminant_coords[illuminant]
-                    
-                    # Draw illuminant points using small hollow black points
-                    ax.plot(x_illum, y_illum, 'o', color='black', markersize=4, markerfacecolor='none', markeredgewidth=0.8, zorder=50)
-                    
-                    # Add annotation at upper right of illuminant points with transparent background
-                    ax.annotate(
-                        f"{illuminant}",
-                        (x_illum + 0.02, y_illum + 0.02),  # Offset ensures annotation is at upper right of points
-                        fontsize=wavelength_label_size,  # Same font size as wavelength labels
-                        color='black',
-                        ha='left',  # Left align
-                        va='bottom',  # Bottom align
-                        zorder=50
-                    )
-                
-                # Add 460-620nm wavelength marks on CIE boundary, ensure compact and beautiful
-                for wl in custom_wavelength_labels:
-                    if wl in wavelength_dict:
-                        x, y = wavelength_dict[wl]
-                        
-                        # Get direction vector from point position to center point (1/3, 1/3)
-                        center = np.array([1/3, 1/3])
-                        point = np.array([x, y])
-                        direction = point - center
-                        
-                        # Normalize and extend direction vector
-                        direction = direction / np.linalg.norm(direction)
-                        
-                        # Adjust offset for specific wavelengths
-                        if wl == 460:
-                            # For 460nm, move upper left to avoid exceeding boundary
-                            offset = np.array([-0.02, 0.02])
-                        elif wl == 540:
-                            # For 540nm, move more to upper right
-                            offset = np.array([0.07, 0.03])
-                        elif wl == 620:
-                            # For 620nm, move more to upper right
-                            offset = np.array([0.03, 0.05])
-                        else:
-                            # Other wavelengths use standard offset
-                            offset = direction * 0.015
-                        
-                        # Draw small points
-                        ax.plot(x, y, 'o', color='black', markersize=2, zorder=15)
-                        
-                        # Determine text alignment
-                        h_align = 'left' if direction[0] > 0 else 'right'
-                        v_align = 'bottom' if direction[1] > 0 else 'top'
-                        
-                        # Add wavelength labels with smaller font
-                        ax.annotate(
-                            f"{wl}",
-                            (x + offset[0], y + offset[1]),
-                            fontsize=wavelength_label_size,
-                            color='black',
-                            ha=h_align,
-                            va=v_align,
-                            zorder=15,
-                            bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', boxstyle='round,pad=0.1')
-                        )
-                
-        except Exception as e:
-            # If colour library drawing fails, fallback to original method
-            print(f"Colour library drawing failed, fallback to original method: {e}")
-            self.draw_cie_boundary(ax)
+        # Draw the coloured diagram from the cached background, with spectral locus, gamut,
+        # illuminant point and wavelength labels (falls back to a simplified boundary).
+        # Until the background thread has computed the diagram, show the simplified boundary.
+        if diagram_ready():
+            draw_chromaticity_diagram(ax, self.settings['general']['gamut'], self.settings['general']['illuminant'],
+                                      wavelength_label_size=wavelength_label_size)
+        else:
+            draw_simplified_boundary(ax, self.settings['general']['gamut'], self.settings['general']['illuminant'])
         
         # Set title and axis labels
         # Set title (based on settings)
@@ -1193,15 +1135,16 @@ class MainWindow(QMainWindow):
             return
         
         # Draw chromaticity coordinate points
-        print(f"Plotting {len(self.data['results'])} CIE coordinates")
-        for result in self.data['results']:
-            x, y = result['x'], result['y']
-            hex_color = result['hex_color']
-            file_name = result['file_name']
-            print(f"  Plotting point: {file_name} at ({x:.4f}, {y:.4f})")
+        block = self.get_chromaticity_block()
+        render_mode = resolve_cie_mode(self.settings['plot'].get('cie_render_mode', 'Auto'), len(block['names']))
+        if render_mode == 'Density':
+            # High sample counts: hexbin density, markers only for the selected samples
+            draw_cie_density(ax, block, self.get_selected_file_names())
+            print(f"Plotted density of {len(block['names'])} CIE coordinates")
+        else:
+            print(f"Plotting {len(block['names'])} CIE coordinates")
             # Set data points same size as illuminant points, use solid points, add labels for legend display
-            ax.plot(x, y, 'o', color=hex_color, markersize=4, markeredgecolor='black', 
-                   markeredgewidth=0.8, zorder=100, label=file_name)
+            draw_cie_markers(ax, block)
         
         # Decide whether to show legend based on settings - including measurement points and gamut
         show_legend = self.settings['plot'].get('cie_show_legend', True)
@@ -1227,97 +1170,22 @@ class MainWindow(QMainWindow):
         # Refresh canvas
         self.cie_canvas.draw()
     
-    def draw_cie_boundary(self, ax):
-        """Draw CIE 1931 chromaticity diagram boundary"""
-        # Use simplified CIE 1931 chromaticity diagram boundary points
-        boundary_x = [0.1740, 0.0000, 0.0000, 0.0332, 0.0648, 0.0919, 0.1390, 0.1738, 0.2080, 0.2586, 0.3230, 0.3962, 0.4400, 0.4699, 0.4999, 0.5140, 0.5295, 0.5482, 0.5651, 0.5780, 0.5832, 0.5800, 0.5672, 0.5314, 0.4649, 0.3652, 0.2615, 0.1740]
-        boundary_y = [0.0049, 0.0000, 0.0100, 0.0380, 0.0650, 0.0910, 0.2080, 0.2737, 0.3344, 0.4077, 0.4964, 0.5574, 0.5800, 0.5888, 0.5991, 0.6039, 0.6089, 0.6128, 0.6150, 0.6160, 0.6160, 0.6155, 0.6123, 0.6030, 0.5657, 0.4679, 0.2624, 0.0049]
-        
-        # Draw boundary
-        ax.plot(boundary_x, boundary_y, 'k-')
-        
-        # Fill range
-        ax.fill(boundary_x, boundary_y, alpha=0.1, color='gray')
-        
-        # Draw white point
-        ax.plot(0.3127, 0.3290, 'ko', markersize=6, label='D65')
-        
-        # Draw sRGB gamut (manually define vertices)
-        srgb_r = (0.64, 0.33)
-        srgb_g = (0.30, 0.60)
-        srgb_b = (0.15, 0.06)
-        srgb_x = [srgb_r[0], srgb_g[0], srgb_b[0], srgb_r[0]]
-        srgb_y = [srgb_r[1], srgb_g[1], srgb_b[1], srgb_r[1]]
-        ax.plot(srgb_x, srgb_y, 'r--', label=self.settings['general']['gamut'])
-        
-        # Set grid with default value check
-        grid_enabled = True  # Default enable grid
-        if 'plot' in self.settings:
-            grid_enabled = self.settings['plot'].get('grid', True)
-        ax.grid(grid_enabled)
-    
     def update_results_table(self):
         """Update results table"""
-        # Clear table
-        self.ui.table_results.setRowCount(0)
+        # Apply the RGB value format setting, the model reformats the column on demand
+        self.results_model.set_rgb_format(self.settings['general']['rgb_values'])
         
         # Check if there's data to display
         if not self.data['results']:
             print("No results to display in table")
+            self.results_model.clear()
+            self.update_results_count()
             return
         
-        # Fill results
+        # Fill results (only new rows are inserted when results were appended)
         print(f"Updating table with {len(self.data['results'])} results")
-        
-        # Get RGB value format settings
-        rgb_format = self.settings['general']['rgb_values']
-        
-        for i, result in enumerate(self.data['results']):
-            row_position = self.ui.table_results.rowCount()
-            self.ui.table_results.insertRow(row_position)
-            
-            # Add color column
-            color_item = QTableWidgetItem()
-            color_item.setBackground(QColor(result['hex_color']))
-            self.ui.table_results.setItem(row_position, 0, color_item)
-            
-            # Add filename
-            file_item = QTableWidgetItem(result['file_name'])
-            self.ui.table_results.setItem(row_position, 1, file_item)
-            
-            # Add x coordinate
-            x_item = QTableWidgetItem(f"{result['x']:.6f}")
-            x_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ui.table_results.setItem(row_position, 2, x_item)
-            
-            # Add y coordinate
-            y_item = QTableWidgetItem(f"{result['y']:.6f}")
-            y_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ui.table_results.setItem(row_position, 3, y_item)
-            
-            # Add linear sRGB
-            rgb_linear = result['rgb_linear']
-            rgb_linear_str = f"({rgb_linear[0]:.4f}, {rgb_linear[1]:.4f}, {rgb_linear[2]:.4f})"
-            rgb_linear_item = QTableWidgetItem(rgb_linear_str)
-            rgb_linear_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ui.table_results.setItem(row_position, 4, rgb_linear_item)
-            
-            # Add gamma-corrected sRGB, format according to settings
-            rgb_gamma = result['rgb_gamma']
-            
-            if rgb_format == '0 ... 255':
-                # Format to 0-255 range
-                r_gamma = rgb_gamma[0] * 255
-                g_gamma = rgb_gamma[1] * 255
-                b_gamma = rgb_gamma[2] * 255
-                rgb_gamma_str = f"({int(r_gamma) if r_gamma <= 255 else 255}, {int(g_gamma) if g_gamma <= 255 else 255}, {int(b_gamma) if b_gamma <= 255 else 255})"
-            else:  # '0 ... 1'
-                # Keep 0-1 range
-                rgb_gamma_str = f"({rgb_gamma[0]:.4f}, {rgb_gamma[1]:.4f}, {rgb_gamma[2]:.4f})"
-            
-            rgb_gamma_item = QTableWidgetItem(rgb_gamma_str)
-            rgb_gamma_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ui.table_results.setItem(row_position, 5, rgb_gamma_item)
+        self.results_model.update_results(self.data['results'])
+        self.update_results_count()
         
         # Adjust table column widths
         self.adjust_table_columns()
@@ -1330,11 +1198,51 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "No data to export.")
             return
         
+        from export_dialog import ExportDialog
         dialog = ExportDialog(self.data, self.settings, self)
         # Execute dialog directly
         dialog.exec()
         # Dialog handles export logic internally
     
+    def start_export_job(self, job):
+        """
+        Run an export job in the background, showing its progress in the status bar
+        
+        Parameters:
+            job: export_jobs.ExportJob, not started yet
+        """
+        panel = ExportJobPanel(job, self)
+        self.ui.statusbar.addPermanentWidget(panel)
+        self.export_jobs.append(job)
+        
+        def on_finished(paths):
+            print(f"{job.title}: exported {', '.join(paths)}")
+            if len(paths) <= 2:
+                self.ui.statusbar.showMessage(f"Exported to {', '.join(paths)}", 10000)
+            else:
+                self.ui.statusbar.showMessage(f"Exported {len(paths)} files to {os.path.dirname(paths[0])}", 10000)
+        
+        def on_cancelled(paths):
+            message = f"{job.title} cancelled"
+            if paths:
+                message += f", {len(paths)} files written"
+            self.ui.statusbar.showMessage(message, 10000)
+        
+        def on_failed(message):
+            QMessageBox.critical(self, "Export Error", f"An error occurred during export: {message}")
+        
+        def on_stopped():
+            self.ui.statusbar.removeWidget(panel)
+            panel.deleteLater()
+            self.export_jobs.remove(job)
+            job.deleteLater()
+        
+        job.job_finished.connect(on_finished)
+        job.job_cancelled.connect(on_cancelled)
+        job.job_failed.connect(on_failed)
+        job.finished.connect(on_stopped)
+        job.start()
+    
     def open_plot_dialog(self):
         """Open plot export dialog"""
         # Check if there's data available for export
@@ -1343,11 +1251,13 @@ class MainWindow(QMainWindow):
             return
         
         # Create and show plot export dialog
+        from plot_dialog import PlotDialog
         dialog = PlotDialog(self.data, self.settings, self)
         dialog.exec()
     
     def open_settings_dialog(self):
         """Open settings dialog"""
+        from settings_dialog import SettingsDialog
         dialog = SettingsDialog(self, self.settings)
         if dialog.exec():
             # If user clicks "OK", update settings (but preserve those not in dialog)
@@ -1448,8 +1358,19 @@ class MainWindow(QMainWindow):
             self.color_calculator.set_calibration_mode(True, black_ref['values'], white_ref['values'])
             print("Resetting calibration mode")
         
+        # Snapshot of the calculator settings, shared by all recalculated datasets
+        config = self.color_calculator.config()
+        
+        # Calculate the datasets that are not in the result cache yet
+        from result_cache import compute_colors_cached
+        raw_measurements = self.data['raw_measurements']
+        computed_results, cached_count = compute_colors_cached(
+            [(raw_data['values'], raw_data['wavelengths']) for raw_data in raw_measurements.values()],
+            config, self.color_calculator.tables, self.result_cache)
+        print(f"Result cache: {cached_count}/{len(raw_measurements)} datasets cached")
+        
         # Recalculate each dataset
-        for file_name, raw_data in self.data['raw_measurements'].items():
+        for (file_name, raw_data), result in zip(raw_measurements.items(), computed_results):
             # Get wavelength and measurement values from original measurement data
             wavelengths = raw_data['wavelengths']
             values = raw_data['values']
@@ -1457,9 +1378,6 @@ class MainWindow(QMainWindow):
             print(f"Recalculating using original measurement data:'{file_name}': wavelength range={wavelengths[0]}-{wavelengths[-1]}nm, "
                   f"points={len(wavelengths)}, step={wavelengths[1]-wavelengths[0]}nm")
             
-            # Calculate color parameters
-            result = self.color_calculator.process_measurement(values, wavelengths)
-            
             # Update stored reflectance data
             self.data['reflectance'][file_name] = result
             
@@ -1474,6 +1392,7 @@ class MainWindow(QMainWindow):
             })
         
         # Update interface
+        self.invalidate_data_cache()
         self.update_reflectance_plot()
         self.update_cie_plot()
         self.update_results_table()
@@ -1487,6 +1406,7 @@ class MainWindow(QMainWindow):
     
     def open_about_dialog(self):
         """Open about dialog"""
+        from about_dialog import AboutDialog
         dialog = AboutDialog(self)
         dialog.exec()
     
@@ -1592,75 +1512,35 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "No data to copy.")
             return
         
-        # Get RGB value format settings
+        # Get RGB value format and number format settings
         rgb_format = self.settings['general']['rgb_values']
-        
-        # Build table data string
-        text = "File Name\tx\ty\tsRGB linear\tsRGB gamma\tHex Color\n"
-        
-        for result in self.data['results']:
-            rgb_linear = result['rgb_linear']
-            rgb_gamma = result['rgb_gamma']
-            
-            # Format RGB gamma values according to settings
-            if rgb_format == '0 ... 255':
-                # Format to 0-255 range
-                r_gamma = rgb_gamma[0] * 255
-                g_gamma = rgb_gamma[1] * 255
-                b_gamma = rgb_gamma[2] * 255
-                rgb_gamma_str = f"({int(r_gamma) if r_gamma <= 255 else 255}, {int(g_gamma) if g_gamma <= 255 else 255}, {int(b_gamma) if b_gamma <= 255 else 255})"
-            else:  # '0 ... 1'
-                # Keep 0-1 range
-                rgb_gamma_str = f"({rgb_gamma[0]:.4f}, {rgb_gamma[1]:.4f}, {rgb_gamma[2]:.4f})"
-            
-            row = [
-                result['file_name'],
-                f"{result['x']:.6f}",
-                f"{result['y']:.6f}",
-                f"({rgb_linear[0]:.4f}, {rgb_linear[1]:.4f}, {rgb_linear[2]:.4f})",
-                rgb_gamma_str,
-                result['hex_color']
-            ]
-            
-            text += "\t".join(row) + "\n"
-        
-        # Copy to clipboard
-        QApplication.clipboard().setText(text)
-        
-        # Show prompt
-        QMessageBox.information(self, "Copy", "Data copied to clipboard.")
+        decimal = decimal_mark(self.settings)
+        header = include_header(self.settings)
+        block = build_results_block(self.data['results'])
+        
+        def build_text():
+            # Format whole columns at once (RGB gamma values according to settings)
+            columns = results_columns(block, rgb_format=rgb_format, decimal=decimal)
+            return join_table(["File Name", "x", "y", "sRGB linear", "sRGB gamma", "Hex Color"],
+                              list(columns.values()), header)
+        
+        # Copy to clipboard (large tables are serialized in the background), then show prompt
+        copy_text_to_clipboard(self, build_text, len(block['names']) * 6,
+                               lambda: QMessageBox.information(self, "Copy", "Data copied to clipboard."))
     
     def copy_table_data(self):
         """Copy table data to clipboard, excluding color column"""
-        if self.ui.table_results.rowCount() == 0:
+        if self.results_proxy.rowCount() == 0:
             QMessageBox.warning(self, "Warning", "No data to copy.")
             return
         
-        # Build table data string
-        text = ""
-        
-        # Add headers, skip color column
-        headers = []
-        for col in range(1, self.ui.table_results.columnCount()):
-            headers.append(self.ui.table_results.horizontalHeaderItem(col).text())
-        text += "\t".join(headers) + "\n"
-        
-        # Add data rows, skip color column
-        for row in range(self.ui.table_results.rowCount()):
-            row_data = []
-            for col in range(1, self.ui.table_results.columnCount()):
-                item = self.ui.table_results.item(row, col)
-                if item is not None:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            text += "\t".join(row_data) + "\n"
-        
-        # Copy to clipboard
-        QApplication.clipboard().setText(text)
+        # Build table data string in the displayed row order, skip color column
+        build_text = self.results_model.text_builder(decimal_mark(self.settings), include_header(self.settings),
+                                                     self.results_proxy.rows)
         
-        # Show prompt
-        QMessageBox.information(self, "Copy", "Table data copied to clipboard (excluding color column).")
+        # Copy to clipboard, then show prompt
+        copy_text_to_clipboard(self, build_text, self.results_proxy.rowCount() * 5,
+                               lambda: QMessageBox.information(self, "Copy", "Table data copied to clipboard (excluding color column)."))
     
     def clear_data(self):
         """Clear all data"""
@@ -1678,7 +1558,7 @@ class MainWindow(QMainWindow):
             self.reset_data()
             self.update_reflectance_plot()
             self.update_cie_plot()
-            self.ui.table_results.setRowCount(0)
+            self.results_model.clear()
             self.update_menu_state(False)  # Disable Export and Plot
             
             # If reflectance data dialog is open, close it
@@ -1748,6 +1628,7 @@ class MainWindow(QMainWindow):
                     print("Wavelength arrays don't match, trying resampling...")
                     try:
                         # Use provided wavelength and target wavelength for interpolation
+                        import scipy.interpolate as interp
                         interp_func = interp.interp1d(
                             wavelen, 
                             reflectance, 
@@ -1776,6 +1657,7 @@ class MainWindow(QMainWindow):
         # Check if dialog already exists
         if self.reflectance_dialog is None or not self.reflectance_dialog.isVisible():
             # Create new dialog
+            from reflectance_data_dialog import ReflectanceDataDialog
             self.reflectance_dialog = ReflectanceDataDialog(wavelengths, datasets, self)
             # Use show() instead of exec() to make dialog non-modal
             self.reflectance_dialog.show()
@@ -1793,7 +1675,7 @@ class MainWindow(QMainWindow):
     
     def adjust_table_columns(self):
         """Adjust table column widths to fit content and window size"""
-        if not hasattr(self.ui, 'table_results') or self.ui.table_results.columnCount() == 0:
+        if not hasattr(self, 'results_model'):
             return
         
         # Get total table width
@@ -1813,15 +1695,17 @@ class MainWindow(QMainWindow):
         font_metrics = self.ui.table_results.fontMetrics()
         
         # Calculate header width
-        header_text = self.ui.table_results.horizontalHeaderItem(1).text()
+        header_text = self.results_model.headerData(1, Qt.Orientation.Horizontal)
         header_width = font_metrics.horizontalAdvance(header_text) + filename_padding
         
-        # Calculate maximum width of all filenames
-        for row in range(self.ui.table_results.rowCount()):
-            item = self.ui.table_results.item(row, 1)
-            if item is not None:
-                text_width = font_metrics.horizontalAdvance(item.text()) + filename_padding
-                max_filename_width = max(max_filename_width, text_width)
+        # Calculate maximum width of the filenames, measuring only the longest ones for large tables
+        names = self.results_model.block['names']
+        if len(names) > 50:
+            lengths = np.fromiter((len(name) for name in names), dtype=np.int64, count=len(names))
+            names = [names[i] for i in np.argsort(lengths)[-50:]]
+        for name in names:
+            text_width = font_metrics.horizontalAdvance(name) + filename_padding
+            max_filename_width = max(max_filename_width, text_width)
         
         # Take maximum of header and content width
         filename_width = max(max_filename_width, header_width, 80)  # At least 80 pixels
@@ -1871,29 +1755,11 @@ class MainWindow(QMainWindow):
         
         # Check if dialog already exists
         if self.cie_dialog is None or not self.cie_dialog.isVisible():
-            # Create a new dialog window
-            self.cie_dialog = QDialog(self)
-            self.cie_dialog.setWindowTitle("CIE Chromaticity Diagram")
-            self.cie_dialog.resize(900, 900)  # Increase size from 600x600 to 900x900
-            
-            # Get parent window position and size
-            parent_geometry = self.geometry()
-            parent_x = parent_geometry.x()
-            parent_y = parent_geometry.y()
-            parent_width = parent_geometry.width()
-            
-            # Place window to the right of main window
-            self.cie_dialog.setGeometry(parent_x + parent_width + 10, parent_y, 900, 900)  # Update size
-            
-            # Create layout
-            layout = QVBoxLayout(self.cie_dialog)
-            
-            # Create figure and canvas - increase size
-            self.cie_expanded_figure = Figure(figsize=(10, 10), dpi=100)  # Increase from 8x8 to 10x10
-            self.cie_expanded_canvas = FigureCanvas(self.cie_expanded_figure)
-            
-            # Add canvas to layout
-            layout.addWidget(self.cie_expanded_canvas)
+            # The dialog shows the diagram above a second view of the filtered results,
+            # sharing the selection of the main window table
+            from cie_data_dialog import CIEDataDialog
+            self.cie_dialog = CIEDataDialog(self.results_model, self.results_proxy, self.settings,
+                                            self.ui.table_results.selectionModel(), self)
             
             # Update CIE chart
             self.update_expanded_cie_plot()
@@ -1909,244 +1775,59 @@ class MainWindow(QMainWindow):
     
     def update_expanded_cie_plot(self):
         """Update expanded CIE chart"""
-        if not hasattr(self, 'cie_expanded_figure') or not hasattr(self, 'cie_expanded_canvas'):
+        if self.cie_dialog is None:
             return
-            
+        
         # Clear chart
-        self.cie_expanded_figure.clear()
+        self.cie_dialog.figure.clear()
         
         # Create subplot
-        ax = self.cie_expanded_figure.add_subplot(111)
+        ax = self.cie_dialog.figure.add_subplot(111)
         
         # Set font size - adjust for high resolution
         title_size = 12
         label_size = 10
         tick_size = 9
         wavelength_label_size = 8
-        annotation_size = 8
         legend_size = 9
         
-        # Use same plotting logic as main window, but adjust some parameters for clarity
-        try:
-            # Disable warning messages
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                
-                # First draw colored background of chromaticity diagram
-                plot_chromaticity_diagram_colours(
-                    axes=ax,
-                    diagram_colours="RGB",  # Use RGB color
-                    method="CIE 1931",  # Use CIE 1931 method
-                    standalone=False,  # Not standalone plotting
-                    title=False,  # Don't use default title
-                    bounding_box=(0, 0.8, 0, 0.9)  # Restore original settings
-                )
-                
-                # Get spectral locus data points
-                cmfs = colour.colorimetry.MSDS_CMFS['CIE 1931 2 Degree Standard Observer']
-                XYZ = cmfs.values
-                xy = colour.XYZ_to_xy(XYZ)
-                wavelengths = cmfs.wavelengths
-                
-                # Create wavelength to coordinate mapping
-                wavelength_dict = {wl: (x, y) for wl, (x, y) in zip(wavelengths, xy)}
-                
-                # Define wavelength range we want to mark (460-620nm, every 20nm)
-                custom_wavelength_labels = list(range(460, 640, 20))
-                
-                # Create smooth boundary lines
-                from scipy.interpolate import interp1d
-                
-                # Spectral locus line
-                x_locus = np.append(xy[..., 0], xy[0, 0])
-                y_locus = np.append(xy[..., 1], xy[0, 1])
-                
-                # Create parameterized coordinates
-                t = np.linspace(0, 1, len(x_locus))
-                
-                # Create interpolation functions
-                fx = interp1d(t, x_locus, kind='cubic')
-                fy = interp1d(t, y_locus, kind='cubic')
-                
-                # Generate denser points
-                t_new = np.linspace(0, 1, 1000)
-                x_smooth = fx(t_new)
-                y_smooth = fy(t_new)
-                
-                # Draw spectral boundary lines
-                ax.plot(
-                    x_smooth, 
-                    y_smooth, 
-                    color='black', 
-                    linewidth=1.2,  # Slightly thicker
-                    solid_capstyle='round',
-                    zorder=10
-                )
-                
-                # Purple line
-                purple_line = np.vstack([
-                    [xy[-1, 0], xy[-1, 1]],
-                    [xy[0, 0], xy[0, 1]]
-                ])
-                
-                # Draw purple line
-                ax.plot(
-                    purple_line[:, 0], 
-                    purple_line[:, 1], 
-                    color='black', 
-                    linewidth=1.2,  # Slightly thicker
-                    linestyle='--',
-                    zorder=10
-                )
-                
-                # Draw gamut
-                gamut = self.settings['general']['gamut']
-                
-                # Define corresponding vertices based on selected gamut
-                if gamut == 'None':
-                    pass
-                elif gamut == 'sRGB':
-                    r = (0.64, 0.33)
-                    g = (0.30, 0.60)
-                    b = (0.15, 0.06)
-                elif gamut == 'Adobe RGB':
-                    r = (0.64, 0.33)
-                    g = (0.21, 0.71)
-                    b = (0.15, 0.06)
-                elif gamut == 'HTC VIVE Pro Eye':
-                    r = (0.6585, 0.3407)
-                    g = (0.2326, 0.7119)
-                    b = (0.1431, 0.0428)
-                elif gamut == 'Meta Oculus Quest 1':
-                    r = (0.6596, 0.3396)
-                    g = (0.2395, 0.7069)
-                    b = (0.1452, 0.0531)
-                elif gamut == 'Meta Oculus Quest 2':
-                    r = (0.6364, 0.3305)
-                    g = (0.3032, 0.5938)
-                    b = (0.1536, 0.0632)
-                elif gamut == 'Meta Oculus Rift':
-                    r = (0.6690, 0.3300)
-                    g = (0.2545, 0.7015)
-                    b = (0.1396, 0.0519)
-                else:
-                    # Default to sRGB
-                    r = (0.64, 0.33)
-                    g = (0.30, 0.60)
-                    b = (0.15, 0.06)
-                
-                # Draw gamut polygon
-                if gamut != 'None':
-                    x_points = [r[0], g[0], b[0], r[0]]
-                    y_points = [r[1], g[1], b[1], r[1]]
-                    
-                    # Draw gamut boundary and add labels
-                    ax.plot(x_points, y_points, 'k-', linewidth=1.5, label=gamut)
-                
-                # Draw illuminantpoints
-                illuminant = self.settings['general']['illuminant']
-                
-                # Common illuminant coordinates
-                illuminant_coords = {
-                    'D65': (0.3128, 0.3290),
-                    'D50': (0.3457, 0.3585),
-                    'A': (0.4476, 0.4074),
-                    'E': (1/3, 1/3)
-                }
-                
-                # Draw current illuminant points
-                if illuminant in illuminant_coords:
-                    x_illum, y_illum = illuminant_coords[illuminant]
-                    
-                    ax.plot(x_illum, y_illum, 'o', color='black', markersize=6, 
-                           markerfacecolor='none', markeredgewidth=1.2, zorder=50)
-                    
-                    # Add illuminant annotation
-                    ax.annotate(
-                        f"{illuminant}",
-                        (x_illum + 0.02, y_illum + 0.02),
-                        fontsize=annotation_size,
-                        color='black',
-                        ha='left',
-                        va='bottom',
-                        zorder=50
-                    )
-                
-                # Add wavelength marks
-                for wl in custom_wavelength_labels:
-                    if wl in wavelength_dict:
-                        x, y = wavelength_dict[wl]
-                        
-                        # Calculate offset direction
-                        center = np.array([1/3, 1/3])
-                        point = np.array([x, y])
-                        direction = point - center
-                        
-                        # Normalize direction vector
-                        direction = direction / np.linalg.norm(direction)
-                        
-                        # Adjust offset for specific wavelengths
-                        if wl == 460:
-                            offset = np.array([-0.02, 0.02])
-                        elif wl == 540:
-                            offset = np.array([0.07, 0.03])
-                        elif wl == 620:
-                            offset = np.array([0.03, 0.05])
-                        else:
-                            offset = direction * 0.015
-                        
-                        # Draw wavelength points
-                        ax.plot(x, y, 'o', color='black', markersize=3, zorder=15)
-                        
-                        # Determine text alignment
-                        h_align = 'left' if direction[0] > 0 else 'right'
-                        v_align = 'bottom' if direction[1] > 0 else 'top'
-                        
-                        # Add wavelength labels
-                        ax.annotate(
-                            f"{wl}",
-                            (x + offset[0], y + offset[1]),
-                            fontsize=wavelength_label_size,
-                            color='black',
-                            ha=h_align,
-                            va=v_align,
-                            zorder=15,
-                            bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', boxstyle='round,pad=0.1')
-                        )
-                        
-                # Only draw data points when data exists
-                if self.data['results']:
-                    # Draw data points - use larger points for easy viewing on large chart
-                    for result in self.data['results']:
-                        x, y = result['x'], result['y']
-                        hex_color = result['hex_color']
-                        file_name = result['file_name']
-                        # Increase point size for large view, use labels for legend
-                        ax.plot(x, y, 'o', color=hex_color, markersize=8, markeredgecolor='black', 
-                              markeredgewidth=1.2, zorder=100, label=file_name)
-                
-                # Decide whether to show legend based on settings - including measurement points and gamut
-                show_legend = self.settings['plot'].get('cie_show_legend', True)
-                if show_legend:
-                    # Get legend object and set smaller font size
-                    legend = ax.legend(fontsize=legend_size, loc='upper right', frameon=True,
-                                    bbox_to_anchor=(1.0, 1.0))
-                    if legend is not None:
-                        # Set legend box properties
-                        legend.set_frame_on(True)
-                        legend.set_title('')  # Remove legend title
-                        # Adjust legend size
-                        legend._legend_box.align = "right"
-                else:
-                    # If set to not show legend, remove any existing legend
-                    legend = ax.get_legend()
-                    if legend is not None:
-                        legend.remove()
-                
-        except Exception as e:
-            print(f"Error drawing expanded CIE chart: {e}")
-            # Fallback to simplified drawing
-            self.draw_simplified_cie_boundary(ax)
+        # Draw the diagram from the cached background shared with the main window plot,
+        # with thicker lines for the large view (simplified boundary until it is computed)
+        gamut = self.settings['general']['gamut']
+        illuminant = self.settings['general']['illuminant']
+        if diagram_ready():
+            draw_chromaticity_diagram(ax, gamut, illuminant, wavelength_label_size=wavelength_label_size,
+                                      line_width=1.2, marker_size=6)
+        else:
+            draw_simplified_boundary(ax, gamut, illuminant)
+        
+        # Only draw data points when data exists
+        if self.data['results']:
+            # Samples passing the results filter, larger points for the large chart
+            block = self.get_chromaticity_block()
+            render_mode = resolve_cie_mode(self.settings['plot'].get('cie_render_mode', 'Auto'), len(block['names']))
+            if render_mode == 'Density':
+                draw_cie_density(ax, block, self.get_selected_file_names(), marker_size=8, edge_width=1.2)
+            else:
+                draw_cie_markers(ax, block, marker_size=8, edge_width=1.2)
+        
+        # Decide whether to show legend based on settings - including measurement points and gamut
+        show_legend = self.settings['plot'].get('cie_show_legend', True)
+        if show_legend:
+            # Get legend object and set smaller font size
+            legend = ax.legend(fontsize=legend_size, loc='upper right', frameon=True,
+                            bbox_to_anchor=(1.0, 1.0))
+            if legend is not None:
+                # Set legend box properties
+                legend.set_frame_on(True)
+                legend.set_title('')  # Remove legend title
+                # Adjust legend size
+                legend._legend_box.align = "right"
+        else:
+            # If set to not show legend, remove any existing legend
+            legend = ax.get_legend()
+            if legend is not None:
+                legend.remove()
         
         # Set title and axis labels - get title settings from settings
         show_title = self.settings['plot'].get('cie_show_title', True)
@@ -2174,107 +1855,10 @@ class MainWindow(QMainWindow):
         ax.grid(False)
         
         # Adjust layout
-        self.cie_expanded_figure.tight_layout()
+        self.cie_dialog.figure.tight_layout()
         
         # Update canvas
-        self.cie_expanded_canvas.draw()
-    
-    def draw_simplified_cie_boundary(self, ax):
-        """Draw simplified boundary for expanded CIE chart (backup method)"""
-        # Use simplified CIE boundary points
-        boundary_x = [0.1740, 0.0000, 0.0000, 0.0332, 0.0648, 0.0919, 0.1390, 0.1738, 0.2080, 0.2586, 0.3230, 0.3962, 0.4400, 0.4699, 0.4999, 0.5140, 0.5295, 0.5482, 0.5651, 0.5780, 0.5832, 0.5800, 0.5672, 0.5314, 0.4649, 0.3652, 0.2615, 0.1740]
-        boundary_y = [0.0049, 0.0000, 0.0100, 0.0380, 0.0650, 0.0910, 0.2080, 0.2737, 0.3344, 0.4077, 0.4964, 0.5574, 0.5800, 0.5888, 0.5991, 0.6039, 0.6089, 0.6128, 0.6150, 0.6160, 0.6160, 0.6155, 0.6123, 0.6030, 0.5657, 0.4679, 0.2624, 0.0049]
-        
-        # Draw boundary
-        ax.plot(boundary_x, boundary_y, 'k-', linewidth=1.5)
-        
-        # Fill range
-        ax.fill(boundary_x, boundary_y, alpha=0.1, color='gray')
-        
-        # Draw illuminant
-        illuminant = self.settings['general']['illuminant']
-        # Common illuminant coordinates
-        illuminant_coords = {
-            'D65': (0.3128, 0.3290),
-            'D50': (0.3457, 0.3585),
-            'A': (0.4476, 0.4074),
-            'E': (1/3, 1/3)
-        }
-        
-        if illuminant in illuminant_coords:
-            x_illum, y_illum = illuminant_coords[illuminant]
-            ax.plot(x_illum, y_illum, 'o', color='black', markersize=6, 
-                   markerfacecolor='none', markeredgewidth=1.2, zorder=50)
-        
-        # Draw gamut (if any)
-        gamut = self.settings['general']['gamut']
-        if gamut != 'None':
-            # Define corresponding vertices based on selected gamut
-            if gamut == 'sRGB':
-                r = (0.64, 0.33)
-                g = (0.30, 0.60)
-                b = (0.15, 0.06)
-            elif gamut == 'Adobe RGB':
-                r = (0.64, 0.33)
-                g = (0.21, 0.71)
-                b = (0.15, 0.06)
-            elif gamut == 'HTC VIVE Pro Eye':
-                r = (0.6585, 0.3407)
-                g = (0.2326, 0.7119)
-                b = (0.1431, 0.0428)
-            elif gamut == 'Meta Oculus Quest 1':
-                r = (0.6596, 0.3396)
-                g = (0.2395, 0.7069)
-                b = (0.1452, 0.0531)
-            elif gamut == 'Meta Oculus Quest 2':
-                r = (0.6364, 0.3305)
-                g = (0.3032, 0.5938)
-                b = (0.1536, 0.0632)
-            elif gamut == 'Meta Oculus Rift':
-                r = (0.6690, 0.3300)
-                g = (0.2545, 0.7015)
-                b = (0.1396, 0.0519)
-            else:
-                # Default to sRGB
-                r = (0.64, 0.33)
-                g = (0.30, 0.60)
-                b = (0.15, 0.06)
-                
-            # Create closed polygon point list
-            x_points = [r[0], g[0], b[0], r[0]]
-            y_points = [r[1], g[1], b[1], r[1]]
-            
-            # Draw gamut boundary and add labels
-            ax.plot(x_points, y_points, 'k-', linewidth=1.5, label=gamut)
-        
-        # Draw data points - use labels instead of direct annotation
-        for result in self.data['results']:
-            x, y = result['x'], result['y']
-            hex_color = result['hex_color']
-            file_name = result['file_name']
-            ax.plot(x, y, 'o', color=hex_color, markersize=8, markeredgecolor='black', 
-                   markeredgewidth=1.2, zorder=100, label=file_name)
-        
-        # Decide whether to show legend based on settings
-        show_legend = self.settings['plot'].get('cie_show_legend', True)
-        if show_legend:
-            # Add legend
-            legend = ax.legend(fontsize=8, loc='upper right', frameon=True)
-            if legend is not None:
-                legend.set_frame_on(True)
-                legend.set_title('')
-        else:
-            # Don't show legend
-            legend = ax.get_legend()
-            if legend is not None:
-                legend.remove()
-                
-        # Set title (get settings from settings)
-        show_title = self.settings['plot'].get('cie_show_title', True)
-        title_text = self.settings['plot'].get('cie_title', "CIE 1931 Chromaticity Diagram")
-        
-        if show_title:
-            ax.set_title(title_text, fontsize=12)
+        self.cie_dialog.canvas.draw()
     
     def resizeEvent(self, event):
         """Handle window resize event, adjust UI elements"""
@@ -2295,8 +1879,21 @@ class MainWindow(QMainWindow):
         """
         Handle application close event, ensure all user settings are saved
         """
+        # Running exports are cancelled (their target files stay untouched) or keep the window open
+        if self.export_jobs:
+            reply = QMessageBox.question(self, "Exports Running",
+                                         f"{len(self.export_jobs)} export(s) still running. Cancel them and quit?",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+            for job in list(self.export_jobs):
+                job.cancel()
+                job.wait()
+        
         # Save all current settings to config file
         self.save_settings()
+        self.settings_service.flush()
         
         # Call parent class closeEvent to handle default close behavior
         super().closeEvent(event)
@@ -2306,4 +1903,4 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
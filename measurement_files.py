@@ -0,0 +1,275 @@
+import os
+import glob
+import tarfile
+import zipfile
+import numpy as np
+
+
+# Archive extensions whose measurement files can be imported directly
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+
+def _no_log(*args, **kwargs):
+    """Stand-in for print when loading quietly"""
+
+
+def parse_measurement_lines(lines, source, verbose=True):
+    """
+    Parse the lines of a measurement CSV file (SV15x1 export or plain two-column CSV)
+
+    Parameters:
+        lines: Text lines of the file
+        source: File name or path, used in messages
+        verbose: Print the details of the parsed data
+
+    Returns:
+        {'wavelengths', 'values', 'metadata'} dictionary, or None if no data was found
+    """
+    log = print if verbose else _no_log
+
+    # Find where data section starts, collecting the "key,value" header fields before it
+    data_start_index = -1
+    metadata = {}
+    for i, line in enumerate(lines):
+        if line.startswith("Wavelength [nm],"):
+            data_start_index = i + 1
+            break
+        key, separator, value = line.strip().partition(',')
+        if separator and key and value:
+            metadata[key] = value.strip()
+
+    if data_start_index >= 0:
+        log(f"Found data section at line{data_start_index}")
+        # Extract data
+        wavelengths = []
+        values = []
+        for line in lines[data_start_index:]:
+            parts = line.strip().split(',')
+            if len(parts) >= 2 and parts[0] and parts[1]:
+                try:
+                    wavelength = float(parts[0])
+                    value = float(parts[1])
+                    wavelengths.append(wavelength)
+                    values.append(value)
+                except ValueError:
+                    continue
+
+        if wavelengths and values:
+            wavelengths_np = np.array(wavelengths)
+            values_np = np.array(values)
+
+            # Print wavelength information
+            if len(wavelengths) > 1:
+                step = wavelengths[1] - wavelengths[0]
+                log(f"Extracted{len(wavelengths)}data points")
+                log(f"wavelength range: {wavelengths[0]}-{wavelengths[-1]}nm, step: {step}nm")
+
+                # Check if wavelength is uniform
+                diff = np.diff(wavelengths_np)
+                if not np.allclose(diff, step, rtol=1e-3):
+                    print(f"Warning: Wavelength step is not uniform in {source}!")
+                    print(f"Min step: {np.min(diff)}nm, Max step: {np.max(diff)}nm")
+
+                # Check value range
+                log(f"Value range: {np.min(values_np)}-{np.max(values_np)}")
+
+            return {
+                'wavelengths': wavelengths_np,
+                'values': values_np,
+                'metadata': metadata
+            }
+
+    # If above parsing fails, try regular CSV parsing
+    log("Trying regular CSV parsing method...")
+    try:
+        data = np.genfromtxt(lines, delimiter=',', skip_header=1, names=True)
+        if data.size > 0:
+            # Try to find wavelength and value columns
+            col_names = data.dtype.names
+            wavelength_col = None
+            value_col = None
+
+            # Try to match column names
+            for col in col_names:
+                col_lower = col.lower()
+                if 'wave' in col_lower or 'lambda' in col_lower or 'nm' in col_lower:
+                    wavelength_col = col
+                elif 'value' in col_lower or 'reflectance' in col_lower or 'intensity' in col_lower:
+                    value_col = col
+
+            # If can't find suitable column names, use first two columns
+            if wavelength_col is None and len(col_names) > 0:
+                wavelength_col = col_names[0]
+            if value_col is None and len(col_names) > 1:
+                value_col = col_names[1]
+
+            if wavelength_col and value_col:
+                wavelengths_np = data[wavelength_col]
+                values_np = data[value_col]
+
+                # Print wavelength information
+                if len(wavelengths_np) > 1:
+                    step = wavelengths_np[1] - wavelengths_np[0]
+                    log(f"Using columns '{wavelength_col}' and '{value_col}'")
+                    log(f"wavelength range: {wavelengths_np[0]}-{wavelengths_np[-1]}nm, step: {step}nm")
+                    log(f"Value range: {np.min(values_np)}-{np.max(values_np)}")
+
+                return {
+                    'wavelengths': wavelengths_np,
+                    'values': values_np
+                }
+    except Exception as e:
+        print(f"Regular CSV parsing failed for {source}: {e}")
+    return None
+
+
+def load_measurement_file(file_path, verbose=True):
+    """
+    Load a measurement file
+
+    Parameters:
+        file_path: Path of a .csv measurement file
+        verbose: Print the details of the parsed data
+
+    Returns:
+        {'wavelengths', 'values', 'metadata'} dictionary, or None if the file cannot be loaded
+    """
+    try:
+        # Choose different loading methods based on file extension
+        ext = os.path.splitext(file_path)[1].lower()
+
+        # Process CSV files (specifically for example format)
+        if ext == '.csv':
+            if verbose:
+                print(f"Loading CSV file: {file_path}")
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+            return parse_measurement_lines(lines, file_path, verbose)
+
+        # If other file type
+        print(f"Unsupported file type: {ext}")
+        return None
+
+    except Exception as e:
+        print(f"Error loading file {file_path}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def is_archive(path):
+    """Whether a path names a zip or tar archive"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _archive_member_names(archive_path):
+    """Names of the .csv files in an archive, in name order"""
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            return sorted(name for name in archive.namelist() if name.lower().endswith('.csv') and not name.endswith('/'))
+    with tarfile.open(archive_path) as archive:
+        return sorted(member.name for member in archive.getmembers()
+                      if member.isfile() and member.name.lower().endswith('.csv'))
+
+
+def _archive_members(archive_path, names):
+    """Yield (member name, text lines) of the given members of an archive"""
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            for name in names:
+                yield name, archive.read(name).decode('utf-8', errors='ignore').splitlines(True)
+    else:
+        with tarfile.open(archive_path) as archive:
+            for name in names:
+                yield name, archive.extractfile(name).read().decode('utf-8', errors='ignore').splitlines(True)
+
+
+def list_measurement_entries(sources):
+    """
+    List the measurement files matched by glob patterns, directories or archives, without reading them
+
+    Directories contribute their .csv files, archives the .csv files they contain.
+
+    Parameters:
+        sources: Iterable of glob patterns, file, directory or archive paths
+
+    Returns:
+        List of (path, archive member name or None) in a stable (sorted) order
+    """
+    entries = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, '*.csv')))
+        else:
+            paths = sorted(glob.glob(source)) or [source]
+
+        for path in paths:
+            if is_archive(path):
+                entries.extend((path, member_name) for member_name in _archive_member_names(path))
+            elif os.path.isfile(path):
+                entries.append((path, None))
+            else:
+                print(f"No measurement files match {path}")
+    return entries
+
+
+def load_measurement_entries(entries, verbose=False, skipped=None):
+    """
+    Load listed measurement files (see list_measurement_entries)
+
+    Consecutive members of the same archive are read with the archive opened once.
+    Files that cannot be parsed are reported and skipped.
+
+    Parameters:
+        entries: Iterable of (path, archive member name or None)
+        verbose: Print the details of every parsed file
+        skipped: List receiving the indices (in entries) of the skipped files, if given
+
+    Yields:
+        (file name, measurement dictionary) in entry order; archive members keep their
+        path inside the archive
+    """
+    entries = list(entries)
+    position = 0
+    while position < len(entries):
+        path, member_name = entries[position]
+        if member_name is None:
+            position += 1
+            measurement = load_measurement_file(path, verbose)
+            if measurement is None:
+                print(f"Skipping {path}: no measurement data")
+                if skipped is not None:
+                    skipped.append(position - 1)
+                continue
+            yield os.path.basename(path), measurement
+            continue
+
+        # Run of members of this archive
+        end = position
+        while end < len(entries) and entries[end][0] == path and entries[end][1] is not None:
+            end += 1
+        member_names = [entry[1] for entry in entries[position:end]]
+        first = position
+        position = end
+        for index, (member_name, lines) in enumerate(_archive_members(path, member_names), first):
+            measurement = parse_measurement_lines(lines, f"{path}:{member_name}", verbose)
+            if measurement is None:
+                print(f"Skipping {path}:{member_name}: no measurement data")
+                if skipped is not None:
+                    skipped.append(index)
+                continue
+            yield member_name, measurement
+
+
+def iter_measurements(sources, verbose=False):
+    """
+    Load the measurement files matched by glob patterns, directories or archives
+
+    Parameters:
+        sources: Iterable of glob patterns, file, directory or archive paths
+        verbose: Print the details of every parsed file
+
+    Yields:
+        (file name, measurement dictionary), see load_measurement_entries
+    """
+    return load_measurement_entries(list_measurement_entries(sources), verbose)
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+from functools import partial
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
     QComboBox, QLineEdit, QPushButton, QFileDialog,
@@ -7,13 +9,12 @@ from PySide6.QtWidgets import (
     QSpinBox, QGroupBox
 )
 from PySide6.QtCore import Qt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qtagg import (
-    FigureCanvasQTAgg as FigureCanvas,
-    NavigationToolbar2QT as NavigationToolbar
-)
 from ui_plot_dialog import Ui_Dialog_plot
-import matplotlib
+from plot_renderer import (
+    PLOT_FORMATS, BATCH_DPIS, create_plot_snapshot, export_plots,
+    build_batch_plot_jobs, export_plot_batch
+)
+from export_jobs import ExportJob
 
 
 class PlotDialog(QDialog):
@@ -43,6 +44,7 @@ class PlotDialog(QDialog):
         # Initialize UI
         self.ui = Ui_Dialog_plot()
         self.ui.setupUi(self)
+        self.setup_batch_options()
         
         # 确保settings中有plot_export部分
         if 'plot_export' not in self.settings:
@@ -60,6 +62,9 @@ class PlotDialog(QDialog):
         self.ui.pushButton_Plot_Browse.clicked.connect(self.browse_file)
         
         # Connect confirmation button signals
+        # on_accepted validates the input and closes the dialog only once the export job is
+        # started, so drop the direct accept() connection made by setupUi
+        self.ui.buttonBox.accepted.disconnect()
         self.ui.buttonBox.accepted.connect(self.on_accepted)
         self.ui.buttonBox.rejected.connect(self.reject)
         
@@ -121,10 +126,64 @@ class PlotDialog(QDialog):
         print("Using default font settings")
         return default_settings
     
+    def setup_batch_options(self):
+        """Add the batch export options (formats, DPIs, per-sample plots) above the buttons."""
+        self.groupBox_Plot_Batch = QGroupBox("Batch Export", self)
+        batch_layout = QVBoxLayout(self.groupBox_Plot_Batch)
+        
+        self.checkBox_Plot_Batch = QCheckBox("Export every selected format and DPI", self.groupBox_Plot_Batch)
+        batch_layout.addWidget(self.checkBox_Plot_Batch)
+        
+        self.checkBox_Plot_Batch_Per_Sample = QCheckBox("Add one reflectance plot per sample", self.groupBox_Plot_Batch)
+        batch_layout.addWidget(self.checkBox_Plot_Batch_Per_Sample)
+        
+        # One checkbox per file format, in the same order as comboBox_Plot_Format
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("Formats:", self.groupBox_Plot_Batch))
+        self.batch_format_checkboxes = {}
+        for ext, label in zip(PLOT_FORMATS, ["PNG", "JPG", "TIFF", "PDF"]):
+            checkbox = QCheckBox(label, self.groupBox_Plot_Batch)
+            format_layout.addWidget(checkbox)
+            self.batch_format_checkboxes[ext] = checkbox
+        batch_layout.addLayout(format_layout)
+        
+        dpi_layout = QHBoxLayout()
+        dpi_layout.addWidget(QLabel("DPI:", self.groupBox_Plot_Batch))
+        self.batch_dpi_checkboxes = {}
+        for dpi in BATCH_DPIS:
+            checkbox = QCheckBox(str(dpi), self.groupBox_Plot_Batch)
+            dpi_layout.addWidget(checkbox)
+            self.batch_dpi_checkboxes[dpi] = checkbox
+        batch_layout.addLayout(dpi_layout)
+        
+        self.ui.verticalLayout.insertWidget(self.ui.verticalLayout.indexOf(self.ui.buttonBox), self.groupBox_Plot_Batch)
+        
+        self.checkBox_Plot_Batch.stateChanged.connect(self.update_batch_options)
+    
+    def update_batch_options(self):
+        """Enable the batch controls only when batch export is selected."""
+        batch_enabled = self.checkBox_Plot_Batch.isChecked()
+        self.checkBox_Plot_Batch_Per_Sample.setEnabled(batch_enabled)
+        for checkbox in list(self.batch_format_checkboxes.values()) + list(self.batch_dpi_checkboxes.values()):
+            checkbox.setEnabled(batch_enabled)
+        # The single format selection does not apply to a batch export
+        self.ui.comboBox_Plot_Format.setEnabled(not batch_enabled)
+    
     def load_previous_selections(self):
         """Load previous user selections from settings."""
         plot_export_settings = self.settings['plot_export']
         
+        # Batch export options
+        self.checkBox_Plot_Batch.setChecked(plot_export_settings.get('batch_export', False))
+        self.checkBox_Plot_Batch_Per_Sample.setChecked(plot_export_settings.get('batch_per_sample', True))
+        batch_formats = plot_export_settings.get('batch_formats', PLOT_FORMATS)
+        for ext, checkbox in self.batch_format_checkboxes.items():
+            checkbox.setChecked(ext in batch_formats)
+        batch_dpis = plot_export_settings.get('batch_dpis', BATCH_DPIS)
+        for dpi, checkbox in self.batch_dpi_checkboxes.items():
+            checkbox.setChecked(dpi in batch_dpis)
+        self.update_batch_options()
+        
         # Settings file format
         format_index = plot_export_settings.get('format_index', 0)  # 默认为PNG (index 0)
         self.ui.comboBox_Plot_Format.setCurrentIndex(format_index)
@@ -222,15 +281,7 @@ class PlotDialog(QDialog):
             return
         
         # Get the currently selected file format
-        format_idx = self.ui.comboBox_Plot_Format.currentIndex()
-        if format_idx == 0:
-            file_ext = ".png"
-        elif format_idx == 1:
-             file_ext = ".jpg"
-        elif format_idx == 2:
-            file_ext = ".tif"
-        else:
-            file_ext = ".pdf"
+        file_ext = PLOT_FORMATS[min(self.ui.comboBox_Plot_Format.currentIndex(), len(PLOT_FORMATS) - 1)]
             
         # Ensure correct extension
         if not file_path.lower().endswith(file_ext):
@@ -243,324 +294,73 @@ class PlotDialog(QDialog):
         # 保存最后使用的目录
         self.settings['export']['last_plot_directory'] = file_dir
         
-        # 从settings中获取DPI设置值
-        dpi = self.settings['plot'].get('reflectance_dpi', 300)  # 默认为300 dpi
-        
-        success = True
-        exported_files = []
-
-        try:
-            # Export Reflectance Plot
-            if export_reflectance and hasattr(self.parent, 'reflectance_figure'):
-                # Determine the file path for the reflectance plot
-                if export_cie:
-                    reflectance_file_path = os.path.join(file_dir, f"{file_name_base}_reflectance{file_ext}")
-                else:
-                    reflectance_file_path = file_path # Use the main path if only exporting this one
-                
-                # Get reflectance plot dimensions from settings - 确保使用正确的默认值
-                width_px = self.settings['plot'].get('reflectance_width', 1600)
-                height_px = self.settings['plot'].get('reflectance_height', 800)
-                
-                # Calculate inches size
-                width_inches = width_px / dpi
-                height_inches = height_px / dpi
-                
-                print(f"Exporting Reflectance Plot: {width_px}x{height_px}px ({width_inches:.2f}x{height_inches:.2f} inches), DPI={dpi}")
-                
-                # Get original plot
-                orig_fig = self.parent.reflectance_figure
-                
-                # Save current size for later restoration
-                orig_size = orig_fig.get_size_inches()
-                orig_dpi = orig_fig.dpi
-                
-                try:
-                    # First update plot to ensure latest settings are applied
-                    self.parent.update_reflectance_plot()
-                    
-                    # Temporary adjustment of plot size
-                    orig_fig.set_size_inches(width_inches, height_inches)
-                    orig_fig.set_dpi(dpi)
-                    
-                    # 从设置中读取字体配置
-                    font_family = self.font_settings['default_font_family']
-                    
-                    # 根据字体大小设置获取具体的字号
-                    reflectance_font_size = self.settings['plot'].get('reflectance_font_size', 'Medium')
-                    
-                    # 获取font_sizes配置中的具体值
-                    font_sizes = self.font_settings['font_sizes']
-                    font_size_config = font_sizes.get(reflectance_font_size, {})
-                    
-                    # 从配置中获取字体大小值，如果没有配置则使用默认值
-                    title_size = font_size_config.get('title_size', 12)
-                    axis_label_size = font_size_config.get('axis_label_size', 10)
-                    tick_label_size = font_size_config.get('tick_label_size', 8)
-                    legend_size = font_size_config.get('legend_size', 9)
-                    
-                    # 获取当前DPI对应的缩放比例
-                    dpi_str = str(dpi)
-                    if dpi_str in self.font_settings['dpi_scaling']:
-                        scale_factor = self.font_settings['dpi_scaling'][dpi_str]
-                    else:
-                        # 对于600DPI特别Processing，强制使用较小的缩放值
-                        if dpi >= 600:
-                            scale_factor = 0.3
-                        else:
-                            scale_factor = dpi / 300.0
-                    
-                    print(f"Using scale factor: {scale_factor} for DPI: {dpi}")
-                    
-                    # 应用缩放比例
-                    title_size = int(title_size * scale_factor)
-                    axis_label_size = int(axis_label_size * scale_factor)
-                    tick_label_size = int(tick_label_size * scale_factor)
-                    legend_size = int(legend_size * scale_factor)
-                    
-                    # 调整所有子图的字体大小
-                    for ax in orig_fig.get_axes():
-                        # 调整标题and轴标签的字体大小
-                        if ax.title.get_text():
-                            ax.title.set_fontsize(title_size)
-                            ax.title.set_fontfamily(font_family)
-                        if ax.xaxis.label.get_text():
-                            ax.xaxis.label.set_fontsize(axis_label_size)
-                            ax.xaxis.label.set_fontfamily(font_family)
-                        if ax.yaxis.label.get_text():
-                            ax.yaxis.label.set_fontsize(axis_label_size)
-                            ax.yaxis.label.set_fontfamily(font_family)
-                        
-                        # 调整刻度标签的字体大小
-                        ax.tick_params(axis='both', which='major', labelsize=tick_label_size)
-                        
-                        # 调整刻度标签的字体系列
-                        for label in ax.get_xticklabels() + ax.get_yticklabels():
-                            label.set_fontfamily(font_family)
-                        
-                        # 如果有图例，调整图例字体大小
-                        if ax.get_legend():
-                            for text in ax.get_legend().get_texts():
-                                text.set_fontsize(legend_size * scale_factor)
-                                text.set_fontfamily(font_family)
-                        
-                        # 调整wavelength标签的大小 (380,400,420等)
-                        for artist in ax.get_children():
-                            # 检查是否为文本注释
-                            if isinstance(artist, matplotlib.text.Annotation):
-                                # 检查文本内容是否可能是wavelength标签(通常是3位数字)
-                                text = artist.get_text()
-                                if text.isdigit() and len(text) == 3:
-                                    # wavelength标签使用与刻度标签相同的大小
-                                    artist.set_fontsize(tick_label_size)
-                                    artist.set_fontfamily(font_family)
-                    
-                    # Adjust plot layout to ensure legend elements also scale proportionally
-                    orig_fig.tight_layout(pad=0.8)  # 减小边距，确保图表能更好地利用空间
-                    
-                    # Force redraw to update all elements
-                    orig_fig.canvas.draw()
-                    
-                    # Save plot
-                    orig_fig.savefig(
-                        reflectance_file_path,
-                        dpi=dpi,
-                        bbox_inches='tight',  # 自动调整边界确保所有内容可见
-                        pad_inches=0.25 * scale_factor  # 根据DPI调整边距
-                    )
-                    
-                    exported_files.append(reflectance_file_path)
-                    print(f"Reflectance Plot exported to: {reflectance_file_path}")
-                    
-                finally:
-                    # Restore original size and DPI
-                    orig_fig.set_size_inches(orig_size)
-                    orig_fig.set_dpi(orig_dpi)
-                    
-                    # 恢复Original字体大小
-                    for ax in orig_fig.get_axes():
-                        # 恢复保存的Original字体大小
-                        if ax.title.get_text():
-                            ax.title.set_fontsize(10)  # 恢复到默认值
-                        if ax.xaxis.label.get_text():
-                            ax.xaxis.label.set_fontsize(8)  # 恢复到默认值
-                        if ax.yaxis.label.get_text():
-                            ax.yaxis.label.set_fontsize(8)  # 恢复到默认值
-                        ax.tick_params(axis='both', which='major', labelsize=7)  # 恢复到默认值
-                        
-                        # 恢复图例字体
-                        if ax.get_legend():
-                            for text in ax.get_legend().get_texts():
-                                text.set_fontsize(7)  # 恢复到默认值
-                    
-                    # Restore original layout
-                    orig_fig.tight_layout()
-                    orig_fig.canvas.draw()
-            
-            # Export CIE Chromaticity Diagram
-            if export_cie and hasattr(self.parent, 'cie_figure'):
-                # Determine the file path for the CIE plot
-                if export_reflectance:
-                    cie_file_path = os.path.join(file_dir, f"{file_name_base}_cie{file_ext}")
-                else:
-                    cie_file_path = file_path # Use the main path if only exporting this one
-                
-                # Get CIE plot dimensions from settings
-                width_px = self.settings['plot'].get('cie_width', 900)
-                height_px = self.settings['plot'].get('cie_height', 900)
-                
-                # 获取CIE图表的DPI
-                dpi = self.settings['plot'].get('cie_dpi', 300)  # 默认为300 dpi
-                
-                # Calculate inches size
-                width_inches = width_px / dpi
-                height_inches = height_px / dpi
-                
-                print(f"Exporting CIE Plot: {width_px}x{height_px}px ({width_inches:.2f}x{height_inches:.2f} inches), DPI={dpi}")
-                
-                # Get original plot
-                orig_fig = self.parent.cie_figure
-                
-                # Save current size for later restoration
-                orig_size = orig_fig.get_size_inches()
-                orig_dpi = orig_fig.dpi
-                
-                try:
-                    # First update plot to ensure latest settings are applied
-                    self.parent.update_cie_plot()
-                    
-                    # Temporary adjustment of plot size
-                    orig_fig.set_size_inches(width_inches, height_inches)
-                    orig_fig.set_dpi(dpi)
-                    
-                    # 从设置中读取字体配置
-                    font_family = self.font_settings['default_font_family']
-                    
-                    # 根据字体大小设置获取具体的字号
-                    cie_font_size = self.settings['plot'].get('cie_font_size', 'Medium')
-                    
-                    # 获取font_sizes配置中的具体值
-                    font_sizes = self.font_settings['font_sizes']
-                    font_size_config = font_sizes.get(cie_font_size, {})
-                    
-                    # 从配置中获取字体大小值，如果没有配置则使用默认值
-                    title_size = font_size_config.get('title_size', 12)
-                    axis_label_size = font_size_config.get('axis_label_size', 10)
-                    tick_label_size = font_size_config.get('tick_label_size', 8)
-                    legend_size = font_size_config.get('legend_size', 9)
-                    
-                    # 获取当前DPI对应的缩放比例
-                    dpi_str = str(dpi)
-                    if dpi_str in self.font_settings['dpi_scaling']:
-                        scale_factor = self.font_settings['dpi_scaling'][dpi_str]
-                    else:
-                        # 对于600DPI特别Processing，强制使用较小的缩放值
-                        if dpi >= 600:
-                            scale_factor = 0.3
-                        else:
-                            scale_factor = dpi / 300.0
-                    
-                    print(f"Using scale factor: {scale_factor} for DPI: {dpi}")
-                    
-                    # 应用缩放比例
-                    title_size = int(title_size * scale_factor)
-                    axis_label_size = int(axis_label_size * scale_factor)
-                    tick_label_size = int(tick_label_size * scale_factor)
-                    legend_size = int(legend_size * scale_factor)
-                    
-                    # 调整所有子图的字体大小
-                    for ax in orig_fig.get_axes():
-                        # 调整标题and轴标签的字体大小
-                        if ax.title.get_text():
-                            ax.title.set_fontsize(title_size)
-                            ax.title.set_fontfamily(font_family)
-                        if ax.xaxis.label.get_text():
-                            ax.xaxis.label.set_fontsize(axis_label_size)
-                            ax.xaxis.label.set_fontfamily(font_family)
-                        if ax.yaxis.label.get_text():
-                            ax.yaxis.label.set_fontsize(axis_label_size)
-                            ax.yaxis.label.set_fontfamily(font_family)
-                        
-                        # 调整刻度标签的字体大小
-                        ax.tick_params(axis='both', which='major', labelsize=tick_label_size)
-                        
-                        # 调整刻度标签的字体系列
-                        for label in ax.get_xticklabels() + ax.get_yticklabels():
-                            label.set_fontfamily(font_family)
-                        
-                        # 如果有图例，调整图例字体大小
-                        if ax.get_legend():
-                            for text in ax.get_legend().get_texts():
-                                text.set_fontsize(legend_size * scale_factor)
-                                text.set_fontfamily(font_family)
-                        
-                        # 调整wavelength标签的大小 (380,400,420等)
-                        for artist in ax.get_children():
-                            # 检查是否为文本注释
-                            if isinstance(artist, matplotlib.text.Annotation):
-                                # 检查文本内容是否可能是wavelength标签(通常是3位数字)
-                                text = artist.get_text()
-                                if text.isdigit() and len(text) == 3:
-                                    # wavelength标签使用与刻度标签相同的大小
-                                    artist.set_fontsize(tick_label_size)
-                                    artist.set_fontfamily(font_family)
-                    
-                    # Adjust plot layout to ensure legend elements also scale proportionally
-                    orig_fig.tight_layout(pad=0.8)  # 减小边距，确保图表能更好地利用空间
-                    
-                    # Force redraw to update all elements
-                    orig_fig.canvas.draw()
-                    
-                    # Save plot
-                    orig_fig.savefig(
-                        cie_file_path,
-                        dpi=dpi,
-                        bbox_inches='tight',  # 自动调整边界确保所有内容可见
-                        pad_inches=0.25 * scale_factor  # 根据DPI调整边距
-                    )
-                    
-                    exported_files.append(cie_file_path)
-                    print(f"CIE Plot exported to: {cie_file_path}")
-                    
-                finally:
-                    # Restore original size and DPI
-                    orig_fig.set_size_inches(orig_size)
-                    orig_fig.set_dpi(orig_dpi)
-                    
-                    # 恢复Original字体大小
-                    for ax in orig_fig.get_axes():
-                        # 恢复保存的Original字体大小
-                        if ax.title.get_text():
-                            ax.title.set_fontsize(10)  # 恢复到默认值
-                        if ax.xaxis.label.get_text():
-                            ax.xaxis.label.set_fontsize(8)  # 恢复到默认值
-                        if ax.yaxis.label.get_text():
-                            ax.yaxis.label.set_fontsize(8)  # 恢复到默认值
-                        ax.tick_params(axis='both', which='major', labelsize=7)  # 恢复到默认值
-                        
-                        # 恢复图例字体
-                        if ax.get_legend():
-                            for text in ax.get_legend().get_texts():
-                                text.set_fontsize(7)  # 恢复到默认值
-                    
-                    # Restore original layout
-                    orig_fig.tight_layout()
-                    orig_fig.canvas.draw()
-        except Exception as e:
-            print(f"Error exporting plots: {str(e)}")
-            QMessageBox.critical(self, "Export Error", f"An error occurred during plot export: {str(e)}")
-            success = False
-        
         # Save current selections to settings
         self.settings['plot_export']['format_index'] = self.ui.comboBox_Plot_Format.currentIndex()
         self.settings['plot_export']['export_reflectance'] = export_reflectance
         self.settings['plot_export']['export_cie'] = export_cie
+        self.settings['plot_export']['batch_export'] = self.checkBox_Plot_Batch.isChecked()
+        self.settings['plot_export']['batch_per_sample'] = self.checkBox_Plot_Batch_Per_Sample.isChecked()
+        self.settings['plot_export']['batch_formats'] = [ext for ext, checkbox in self.batch_format_checkboxes.items() if checkbox.isChecked()]
+        self.settings['plot_export']['batch_dpis'] = [dpi for dpi, checkbox in self.batch_dpi_checkboxes.items() if checkbox.isChecked()]
         
-        if success:
-            if len(exported_files) == 1:
-                QMessageBox.information(self, "Export Successful", f"Plot exported to:\n{exported_files[0]}")
-            else:
-                exported_files_text = "\n".join(exported_files)
-                QMessageBox.information(self, "Export Successful", f"Plots exported to:\n{exported_files_text}")
-            
-            self.accept()  # Close dialog only upon successful export 
\ No newline at end of file
+        if self.checkBox_Plot_Batch.isChecked():
+            self.start_batch_export(file_dir, file_name_base, export_reflectance, export_cie)
+            return
+        
+        # Build the export jobs: (plot type, output path, dpi)
+        jobs = []
+        if export_reflectance:
+            reflectance_file_path = os.path.join(file_dir, f"{file_name_base}_reflectance{file_ext}") if export_cie else file_path
+            jobs.append(('reflectance', reflectance_file_path, self.settings['plot'].get('reflectance_dpi', 300)))
+        if export_cie:
+            cie_file_path = os.path.join(file_dir, f"{file_name_base}_cie{file_ext}") if export_reflectance else file_path
+            jobs.append(('cie', cie_file_path, self.settings['plot'].get('cie_dpi', 300)))
+        
+        # Render from a copy of the data model, the figures in the main window are never touched
+        snapshot = create_plot_snapshot(self.data, self.settings, self.get_selected_file_names())
+        
+        task = partial(export_plots, snapshot, jobs, self.font_settings)
+        job = ExportJob(f"Exporting {os.path.basename(file_path)}", task, len(jobs), self.parent)
+        self.parent.start_export_job(job)
+        
+        # Close dialog, the main window status bar shows the progress
+        self.accept()
+    
+    def start_batch_export(self, file_dir, file_name_base, export_reflectance, export_cie):
+        """
+        Start a batch export of all selected formats and DPIs in a process pool.
+        
+        Parameters:
+            file_dir: Output directory
+            file_name_base: File name prefix
+            export_reflectance: Include the reflectance plot of all samples
+            export_cie: Include the CIE plot of all samples
+        """
+        formats = self.settings['plot_export']['batch_formats']
+        dpis = self.settings['plot_export']['batch_dpis']
+        if not formats or not dpis:
+            QMessageBox.warning(self, "Export Error", "Please select at least one format and one DPI for batch export.")
+            return
+        
+        snapshot = create_plot_snapshot(self.data, self.settings, self.get_selected_file_names())
+        group_plots = [plot_type for plot_type, selected in (('reflectance', export_reflectance), ('cie', export_cie)) if selected]
+        jobs = build_batch_plot_jobs(snapshot, file_dir, file_name_base, formats, dpis, group_plots,
+                                     per_sample=self.checkBox_Plot_Batch_Per_Sample.isChecked())
+        print(f"Batch plot export: {len(jobs)} files to {file_dir}")
+        
+        def run_batch(progress):
+            start_time = time.perf_counter()
+            exported_files = export_plot_batch(snapshot, jobs, self.font_settings,
+                                               progress_callback=lambda done, total, file_path: progress(1))
+            print(f"Batch plot export: {len(exported_files)} files in {time.perf_counter() - start_time:.2f}s")
+            return exported_files
+        
+        job = ExportJob(f"Exporting {len(jobs)} plots", run_batch, len(jobs), self.parent)
+        self.parent.start_export_job(job)
+        self.accept()
+    
+    def get_selected_file_names(self):
+        """Get the samples selected in the main window, used for highlighting and legends."""
+        if self.parent is not None and hasattr(self.parent, 'get_selected_file_names'):
+            return self.parent.get_selected_file_names()
+        return []
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class ChromaticityIndex:
+    """
+    Nearest-sample lookup on the CIE xy plane, backed by a KD-tree
+
+    Parameters:
+        xy: Chromaticity coordinates (N, 2), row order matches the sample names
+    """
+
+    def __init__(self, xy):
+        # scipy is only loaded once picking is first used
+        from scipy.spatial import cKDTree
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        self.tree = cKDTree(self.xy) if len(self.xy) > 0 else None
+
+    def nearest(self, x, y, max_distance):
+        """
+        Find the sample closest to a point
+
+        Parameters:
+            x, y: Query point in chromaticity coordinates
+            max_distance: Maximum accepted distance (in xy units)
+
+        Returns:
+            Row index of the nearest sample, or None if none is within max_distance
+        """
+        if self.tree is None:
+            return None
+        distance, row = self.tree.query((x, y), distance_upper_bound=max_distance)
+        if not np.isfinite(distance):
+            return None
+        return int(row)
+
+
+class SpectralIndex:
+    """
+    Nearest-curve lookup on the reflectance plot
+
+    For every indexed wavelength column, the reflectance values of all samples are kept
+    sorted, so the curve closest to a point is found by a binary search in that column.
+    Columns are taken every `step` grid points to bound memory for large sample sets.
+
+    Parameters:
+        wavelengths: Common wavelength grid (W,)
+        reflectance: Reflectance matrix (N, W)
+        step: Index every step-th wavelength column
+    """
+
+    def __init__(self, wavelengths, reflectance, step=5):
+        reflectance = np.asarray(reflectance)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)[::step]
+        columns = reflectance[:, ::step].astype(np.float32, copy=False)
+
+        # (W', N) sample order and sorted values per indexed column
+        self.order = np.argsort(columns, axis=0).T.astype(np.int32)
+        self.sorted_values = np.take_along_axis(columns.T, self.order, axis=1)
+
+    def nearest(self, wavelength, value, max_distance):
+        """
+        Find the curve closest to a point
+
+        Parameters:
+            wavelength: Query wavelength (nm)
+            value: Query reflectance value
+            max_distance: Maximum accepted vertical distance (in reflectance units)
+
+        Returns:
+            Row index of the nearest curve, or None if none is within max_distance
+        """
+        if self.sorted_values.size == 0:
+            return None
+
+        column = int(np.clip(np.searchsorted(self.wavelengths, wavelength), 0, len(self.wavelengths) - 1))
+        if column > 0 and abs(self.wavelengths[column - 1] - wavelength) < abs(self.wavelengths[column] - wavelength):
+            column -= 1
+
+        values = self.sorted_values[column]
+        position = int(np.searchsorted(values, value))
+        candidates = [p for p in (position - 1, position) if 0 <= p < len(values)]
+        best = min(candidates, key=lambda p: abs(values[p] - value))
+        if abs(values[best] - value) > max_distance:
+            return None
+        return int(self.order[column, best])
+
+
+def pixel_tolerance(ax, pixels=8):
+    """
+    Convert a pick radius in screen pixels to data units of an axes
+
+    Parameters:
+        ax: Matplotlib axes
+        pixels: Pick radius in pixels
+
+    Returns:
+        (x tolerance, y tolerance) in data units
+    """
+    bbox = ax.get_window_extent()
+    x_min, x_max = ax.get_xlim()
+    y_min, y_max = ax.get_ylim()
+    return (abs(x_max - x_min) * pixels / max(bbox.width, 1),
+            abs(y_max - y_min) * pixels / max(bbox.height, 1))
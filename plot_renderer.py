@@ -0,0 +1,838 @@
+import os
+import re
+import copy
+import warnings
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import matplotlib.ticker as ticker
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from file_output import atomic_output, report_progress
+from spectral_data import sample_spectrum, build_spectral_block, spectral_statistics
+
+
+# Plot file extensions, in the same order as comboBox_Plot_Format
+PLOT_FORMATS = ['.png', '.jpg', '.tif', '.pdf']
+
+# DPI values offered for batch export
+BATCH_DPIS = [150, 300, 600]
+
+# Reflectance plot render modes, 'Auto' switches from one line per sample to a
+# single LineCollection above COLLECTION_THRESHOLD samples and to statistical
+# envelope bands above ENVELOPE_THRESHOLD samples
+REFLECTANCE_RENDER_MODES = ['Auto', 'Lines', 'Collection', 'Envelope']
+COLLECTION_THRESHOLD = 200
+ENVELOPE_THRESHOLD = 2000
+
+# CIE plot render modes, 'Auto' switches from one marker per sample to a
+# hexbin density above DENSITY_THRESHOLD samples
+CIE_RENDER_MODES = ['Auto', 'Markers', 'Density']
+DENSITY_THRESHOLD = 2000
+
+# Maximum number of legend entries in the high-count render modes
+LEGEND_MAX_ENTRIES = 20
+
+# Gamut triangle vertices (R, G, B) in CIE 1931 xy
+GAMUT_VERTICES = {
+    'sRGB': ((0.64, 0.33), (0.30, 0.60), (0.15, 0.06)),
+    'Adobe RGB': ((0.64, 0.33), (0.21, 0.71), (0.15, 0.06)),
+    'HTC VIVE Pro Eye': ((0.6585, 0.3407), (0.2326, 0.7119), (0.1431, 0.0428)),
+    'Meta Oculus Quest 1': ((0.6596, 0.3396), (0.2395, 0.7069), (0.1452, 0.0531)),
+    'Meta Oculus Quest 2': ((0.6364, 0.3305), (0.3032, 0.5938), (0.1536, 0.0632)),
+    'Meta Oculus Rift': ((0.6690, 0.3300), (0.2545, 0.7015), (0.1396, 0.0519)),
+}
+
+# Common illuminant white points in CIE 1931 xy
+ILLUMINANT_XY = {
+    'D65': (0.3128, 0.3290),
+    'D50': (0.3457, 0.3585),
+    'A': (0.4476, 0.4074),
+    'E': (1/3, 1/3)
+}
+
+# Wavelengths marked on the spectral locus (460-620nm, every 20nm)
+LOCUS_LABEL_WAVELENGTHS = list(range(460, 640, 20))
+
+# Visible extent of the chromaticity diagram (x_min, x_max, y_min, y_max)
+CIE_BOUNDING_BOX = (0, 0.8, 0, 0.9)
+
+# Simplified CIE 1931 boundary, used when the colour library is unavailable
+SIMPLIFIED_BOUNDARY_X = [0.1740, 0.0000, 0.0000, 0.0332, 0.0648, 0.0919, 0.1390, 0.1738, 0.2080, 0.2586, 0.3230, 0.3962, 0.4400, 0.4699, 0.4999, 0.5140, 0.5295, 0.5482, 0.5651, 0.5780, 0.5832, 0.5800, 0.5672, 0.5314, 0.4649, 0.3652, 0.2615, 0.1740]
+SIMPLIFIED_BOUNDARY_Y = [0.0049, 0.0000, 0.0100, 0.0380, 0.0650, 0.0910, 0.2080, 0.2737, 0.3344, 0.4077, 0.4964, 0.5574, 0.5800, 0.5888, 0.5991, 0.6039, 0.6089, 0.6128, 0.6150, 0.6160, 0.6160, 0.6155, 0.6123, 0.6030, 0.5657, 0.4679, 0.2624, 0.0049]
+
+
+def create_plot_snapshot(data, settings, selected_names=None):
+    """
+    Copy everything needed to draw the plots out of the live data model
+
+    The snapshot only holds plain Python/numpy objects, so it can be handed to a
+    worker thread (or pickled to a worker process) while the user keeps working.
+
+    Parameters:
+        data: Main window data dictionary
+        settings: Application settings
+        selected_names: Optional names of the samples selected in the results table
+
+    Returns:
+        Dictionary with sample names, spectra, chromaticity coordinates and plot settings
+    """
+    names = []
+    wavelengths = []
+    reflectance = []
+    for file_name, result_data in data.get('reflectance', {}).items():
+        if not isinstance(result_data, dict):
+            continue
+        sample_wavelengths, sample_reflectance = sample_spectrum(result_data, data.get('wavelengths'))
+        if sample_reflectance is None:
+            continue
+        names.append(file_name)
+        wavelengths.append(sample_wavelengths.copy())
+        reflectance.append(sample_reflectance.copy())
+
+    results = data.get('results', [])
+    return {
+        'names': names,
+        'wavelengths': wavelengths,
+        'reflectance': reflectance,
+        'result_names': [result['file_name'] for result in results],
+        'xy': np.array([[result['x'], result['y']] for result in results], dtype=np.float64).reshape(-1, 2),
+        'hex_colors': [result['hex_color'] for result in results],
+        'selected': list(selected_names or []),
+        'plot': copy.deepcopy(settings.get('plot', {})),
+        'gamut': settings['general'].get('gamut', 'None'),
+        'illuminant': settings['general'].get('illuminant', 'D65')
+    }
+
+
+def resolve_reflectance_mode(mode, sample_count):
+    """
+    Resolve the reflectance render mode for a number of samples
+
+    Parameters:
+        mode: Render mode setting (one of REFLECTANCE_RENDER_MODES)
+        sample_count: Number of plotted samples
+
+    Returns:
+        'Lines', 'Collection' or 'Envelope'
+    """
+    if mode == 'Auto' or mode not in REFLECTANCE_RENDER_MODES:
+        if sample_count > ENVELOPE_THRESHOLD:
+            return 'Envelope'
+        return 'Collection' if sample_count > COLLECTION_THRESHOLD else 'Lines'
+    return mode
+
+
+def legend_subset(names, selected_names):
+    """
+    Pick the samples that get a legend entry in the high-count render modes
+
+    Selected samples are listed first; without a selection all samples are listed
+    as long as they fit. The result is capped at LEGEND_MAX_ENTRIES.
+
+    Parameters:
+        names: Plotted sample names (row order)
+        selected_names: Names selected by the user
+
+    Returns:
+        List of row indices
+    """
+    index = {name: row for row, name in enumerate(names)}
+    rows = [index[name] for name in selected_names if name in index]
+    if not rows and len(names) <= LEGEND_MAX_ENTRIES:
+        rows = list(range(len(names)))
+    return rows[:LEGEND_MAX_ENTRIES]
+
+
+def draw_reflectance_collection(ax, block, selected_names=(), show_legend=True, legend_size=7,
+                                linewidth=0.6, alpha=0.7):
+    """
+    Draw all spectra of a spectral block as a single LineCollection
+
+    Parameters:
+        ax: Target axes
+        block: Spectral block from spectral_data.build_spectral_block
+        selected_names: Names of selected samples, drawn thicker and listed in the legend
+        show_legend: Whether to add a legend for the selected/visible subset
+        legend_size: Legend font size
+        linewidth: Line width of unselected spectra
+        alpha: Line transparency of unselected spectra
+
+    Returns:
+        (collection, legend) - legend is None when no legend was drawn
+    """
+    reflectance = block['reflectance']
+    segments = np.empty(reflectance.shape + (2,), dtype=np.float64)
+    segments[..., 0] = block['wavelengths']
+    segments[..., 1] = reflectance
+
+    selected = np.zeros(len(block['names']), dtype=bool)
+    selected_rows = [block['index'][name] for name in selected_names if name in block['index']]
+    selected[selected_rows] = True
+
+    collection = LineCollection(segments, colors=block['colors'], linewidths=np.where(selected, linewidth * 3, linewidth))
+    # With a selection, unselected spectra fade so the selected ones stand out
+    collection.set_alpha(np.where(selected, 1.0, alpha * 0.5) if selected.any() else alpha)
+    ax.add_collection(collection)
+
+    legend = None
+    if show_legend:
+        rows = legend_subset(block['names'], selected_names)
+        if rows:
+            handles = [Line2D([], [], color=block['colors'][row], linewidth=1.5, label=block['names'][row]) for row in rows]
+            legend = ax.legend(handles=handles, fontsize=legend_size)
+
+    return collection, legend
+
+
+def draw_reflectance_envelope(ax, block, selected_names=(), show_legend=True, legend_size=7):
+    """
+    Draw per-wavelength statistics of a spectral block as filled bands
+
+    Draws min/max, 5-95th and 25-75th percentile bands plus mean and median lines,
+    so the drawing cost does not depend on the number of samples. Selected samples
+    are drawn on top as individual lines.
+
+    Parameters:
+        ax: Target axes
+        block: Spectral block from spectral_data.build_spectral_block
+        selected_names: Names of samples to highlight (at most LEGEND_MAX_ENTRIES are drawn)
+        show_legend: Whether to add a legend
+        legend_size: Legend font size
+
+    Returns:
+        Upper value of the drawn data (for the Y-axis range)
+    """
+    wavelengths = block['wavelengths']
+    statistics = spectral_statistics(block)
+
+    ax.fill_between(wavelengths, statistics['min'], statistics['max'], color='#1f77b4', alpha=0.12,
+                    linewidth=0, label='Min - Max')
+    ax.fill_between(wavelengths, statistics['p5'], statistics['p95'], color='#1f77b4', alpha=0.22,
+                    linewidth=0, label='5th - 95th percentile')
+    ax.fill_between(wavelengths, statistics['p25'], statistics['p75'], color='#1f77b4', alpha=0.35,
+                    linewidth=0, label='25th - 75th percentile')
+    ax.plot(wavelengths, statistics['mean'], color='#1f77b4', linewidth=1.2, label='Mean')
+    ax.plot(wavelengths, statistics['median'], color='black', linewidth=1.0, linestyle='--', label='Median')
+
+    selected_rows = [block['index'][name] for name in selected_names if name in block['index']][:LEGEND_MAX_ENTRIES]
+    for row in selected_rows:
+        ax.plot(wavelengths, block['reflectance'][row], color=block['colors'][row], linewidth=1.5,
+                label=block['names'][row], zorder=20)
+
+    if show_legend:
+        ax.legend(fontsize=legend_size, title=f"{len(block['names'])} samples", title_fontsize=legend_size)
+
+    return np.max(statistics['max']) if len(wavelengths) > 0 else 0
+
+
+def export_font_sizes(snapshot, font_settings, font_size_key, dpi):
+    """
+    Resolve export font sizes for a plot at a given DPI
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        font_settings: Font settings (font_settings.json content)
+        font_size_key: Plot settings key holding the font size name ('reflectance_font_size' or 'cie_font_size')
+        dpi: Export DPI
+
+    Returns:
+        Dictionary with font family, scale factor and scaled font sizes
+    """
+    font_size_name = snapshot['plot'].get(font_size_key, 'Medium')
+    font_size_config = font_settings['font_sizes'].get(font_size_name, {})
+
+    dpi_str = str(dpi)
+    if dpi_str in font_settings['dpi_scaling']:
+        scale_factor = font_settings['dpi_scaling'][dpi_str]
+    elif dpi >= 600:
+        # Force a smaller scale for very high DPI without an explicit entry
+        scale_factor = 0.3
+    else:
+        scale_factor = dpi / 300.0
+
+    legend_size = int(font_size_config.get('legend_size', 9) * scale_factor)
+    return {
+        'family': font_settings['default_font_family'],
+        'scale_factor': scale_factor,
+        'title': int(font_size_config.get('title_size', 12) * scale_factor),
+        'axis_label': int(font_size_config.get('axis_label_size', 10) * scale_factor),
+        'tick_label': int(font_size_config.get('tick_label_size', 8) * scale_factor),
+        # Legend entries have always been scaled twice on export, keep output identical
+        'legend': legend_size * scale_factor,
+    }
+
+
+# Diagram data handed to batch worker processes by _init_batch_worker, so workers
+# never import the colour library or recompute the background
+_batch_state = {}
+
+
+def spectral_locus():
+    """
+    Get the CIE 1931 spectral locus
+
+    Returns:
+        (wavelengths, xy, xy_smooth): locus wavelengths, locus xy points (N, 2)
+        and a closed, cubic-interpolated locus (1000, 2) for drawing
+    """
+    if 'locus' in _batch_state:
+        return _batch_state['locus']
+    return _compute_spectral_locus()
+
+
+def diagram_ready():
+    """Whether the spectral locus and diagram background are available without computing them"""
+    if 'locus' in _batch_state:
+        return True
+    return _compute_spectral_locus.cache_info().currsize > 0 and chromaticity_background.cache_info().currsize > 0
+
+
+@lru_cache(maxsize=1)
+def _compute_spectral_locus():
+    """Compute the spectral locus with the colour library (see spectral_locus)"""
+    import colour
+    from scipy.interpolate import interp1d
+
+    cmfs = colour.colorimetry.MSDS_CMFS['CIE 1931 2 Degree Standard Observer']
+    xy = colour.XYZ_to_xy(cmfs.values)
+
+    # Closed locus (head-to-tail), parameterised for a smooth cubic curve
+    x_locus = np.append(xy[..., 0], xy[0, 0])
+    y_locus = np.append(xy[..., 1], xy[0, 1])
+    t = np.linspace(0, 1, len(x_locus))
+    t_new = np.linspace(0, 1, 1000)
+    xy_smooth = np.column_stack([
+        interp1d(t, x_locus, kind='cubic')(t_new),
+        interp1d(t, y_locus, kind='cubic')(t_new)
+    ])
+
+    return np.array(cmfs.wavelengths), xy, xy_smooth
+
+
+@lru_cache(maxsize=4)
+def chromaticity_background(samples=256):
+    """
+    Rasterise the coloured CIE 1931 chromaticity diagram background once
+
+    Uses the same colour computation as colour's plot_chromaticity_diagram_colours
+    (RGB diagram colours), but bakes the spectral locus clipping into the alpha
+    channel so the image can be reused by any axes without a clip path.
+
+    Parameters:
+        samples: Image resolution per axis over the unit square
+
+    Returns:
+        RGBA image (samples, samples, 4) covering extent (0, 1, 0, 1)
+    """
+    from matplotlib.path import Path
+    from colour.algebra import normalise_maximum
+    from colour.plotting import XYZ_to_plotting_colourspace
+    import colour
+
+    _, xy_locus, _ = spectral_locus()
+
+    ii, jj = np.meshgrid(np.linspace(0, 1, samples), np.linspace(1, 0, samples))
+    ij = np.stack([ii, jj], axis=-1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        RGB = normalise_maximum(XYZ_to_plotting_colourspace(colour.xy_to_XYZ(ij)), axis=-1)
+
+    inside = Path(xy_locus).contains_points(ij.reshape(-1, 2)).reshape(samples, samples)
+
+    image = np.empty((samples, samples, 4), dtype=np.float32)
+    image[..., :3] = np.clip(np.nan_to_num(RGB), 0, 1)
+    image[..., 3] = inside
+    return image
+
+
+def draw_chromaticity_diagram(ax, gamut, illuminant, wavelength_label_size=6, line_width=1.0,
+                              marker_size=4, background=None):
+    """
+    Draw the chromaticity diagram decorations: coloured background, spectral locus,
+    purple line, gamut triangle, illuminant white point and wavelength labels
+
+    Parameters:
+        ax: Target axes
+        gamut: Gamut name ('None' for no gamut)
+        illuminant: Illuminant name
+        wavelength_label_size: Font size for wavelength and illuminant labels
+        line_width: Locus line width
+        marker_size: Illuminant marker size
+        background: Optional pre-rendered background image (see chromaticity_background)
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+
+            if background is None:
+                background = _batch_state.get('background')
+            if background is None:
+                background = chromaticity_background()
+            ax.imshow(background, interpolation='bilinear', extent=(0, 1, 0, 1), zorder=-1)
+
+            locus_wavelengths, xy, xy_smooth = spectral_locus()
+            wavelength_dict = {wl: (x, y) for wl, (x, y) in zip(locus_wavelengths, xy)}
+
+            # Smooth spectral locus and dashed purple line
+            ax.plot(xy_smooth[:, 0], xy_smooth[:, 1], color='black', linewidth=line_width,
+                    solid_capstyle='round', zorder=10)
+            ax.plot([xy[-1, 0], xy[0, 0]], [xy[-1, 1], xy[0, 1]], color='black',
+                    linewidth=line_width, linestyle='--', zorder=10)
+
+            draw_gamut(ax, gamut)
+            draw_illuminant(ax, illuminant, wavelength_label_size, marker_size)
+
+            for wl in LOCUS_LABEL_WAVELENGTHS:
+                if wl not in wavelength_dict:
+                    continue
+                x, y = wavelength_dict[wl]
+
+                # Direction from the white point (1/3, 1/3) towards the locus point
+                direction = np.array([x, y]) - np.array([1/3, 1/3])
+                direction = direction / np.linalg.norm(direction)
+
+                if wl == 460:
+                    offset = np.array([-0.02, 0.02])
+                elif wl == 540:
+                    offset = np.array([0.07, 0.03])
+                elif wl == 620:
+                    offset = np.array([0.03, 0.05])
+                else:
+                    offset = direction * 0.015
+
+                ax.plot(x, y, 'o', color='black', markersize=marker_size / 2, zorder=15)
+                ax.annotate(
+                    f"{wl}",
+                    (x + offset[0], y + offset[1]),
+                    fontsize=wavelength_label_size,
+                    color='black',
+                    ha='left' if direction[0] > 0 else 'right',
+                    va='bottom' if direction[1] > 0 else 'top',
+                    zorder=15,
+                    bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', boxstyle='round,pad=0.1')
+                )
+    except Exception as e:
+        print(f"Colour library drawing failed, fallback to simplified boundary: {e}")
+        draw_simplified_boundary(ax, gamut, illuminant)
+
+
+def resolve_cie_mode(mode, sample_count):
+    """
+    Resolve the CIE render mode for a number of samples
+
+    Parameters:
+        mode: Render mode setting (one of CIE_RENDER_MODES)
+        sample_count: Number of plotted samples
+
+    Returns:
+        'Markers' or 'Density'
+    """
+    if mode == 'Auto' or mode not in CIE_RENDER_MODES:
+        return 'Density' if sample_count > DENSITY_THRESHOLD else 'Markers'
+    return mode
+
+
+def draw_cie_markers(ax, block, marker_size=4, edge_width=0.8):
+    """Draw one marker per sample in its own colour, labelled for the legend"""
+    for (x, y), hex_color, name in zip(block['xy'], block['colors'], block['names']):
+        ax.plot(x, y, 'o', color=hex_color, markersize=marker_size, markeredgecolor='black',
+                markeredgewidth=edge_width, zorder=100, label=name)
+
+
+def draw_cie_density(ax, block, selected_names=(), gridsize=80, marker_size=4, edge_width=0.8):
+    """
+    Draw the chromaticity coordinates as a hexbin density
+
+    The bins are computed vectorized over the whole xy array, so the cost barely depends
+    on the number of samples. Selected samples are drawn as individual markers on top.
+
+    Parameters:
+        ax: Target axes (with the diagram already drawn)
+        block: Chromaticity block from spectral_data.build_chromaticity_block
+        selected_names: Names of samples drawn as markers (at most LEGEND_MAX_ENTRIES)
+        gridsize: Number of hexagons across the x range
+        marker_size: Marker size for selected samples
+        edge_width: Marker edge width for selected samples
+
+    Returns:
+        The hexbin PolyCollection
+    """
+    xy = block['xy']
+    density = ax.hexbin(xy[:, 0], xy[:, 1], gridsize=gridsize, extent=CIE_BOUNDING_BOX, mincnt=1, bins='log',
+                        cmap='Greys', alpha=0.85, linewidths=0, zorder=60)
+
+    selected_rows = [block['index'][name] for name in selected_names if name in block['index']][:LEGEND_MAX_ENTRIES]
+    for row in selected_rows:
+        ax.plot(xy[row, 0], xy[row, 1], 'o', color=block['colors'][row], markersize=marker_size * 1.5,
+                markeredgecolor='black', markeredgewidth=edge_width, zorder=100, label=block['names'][row])
+    return density
+
+
+def draw_gamut(ax, gamut):
+    """Draw the gamut triangle with a legend label (nothing for 'None')"""
+    if gamut == 'None':
+        return
+    r, g, b = GAMUT_VERTICES.get(gamut, GAMUT_VERTICES['sRGB'])
+    ax.plot([r[0], g[0], b[0], r[0]], [r[1], g[1], b[1], r[1]], 'k-', linewidth=1.5, label=gamut)
+
+
+def draw_illuminant(ax, illuminant, label_size=6, marker_size=4):
+    """Draw the illuminant white point as a hollow marker with its name"""
+    if illuminant not in ILLUMINANT_XY:
+        return
+    x_illum, y_illum = ILLUMINANT_XY[illuminant]
+    ax.plot(x_illum, y_illum, 'o', color='black', markersize=marker_size, markerfacecolor='none',
+            markeredgewidth=0.8, zorder=50)
+    ax.annotate(f"{illuminant}", (x_illum + 0.02, y_illum + 0.02), fontsize=label_size,
+                color='black', ha='left', va='bottom', zorder=50)
+
+
+def draw_simplified_boundary(ax, gamut, illuminant):
+    """Draw a simplified CIE 1931 boundary (backup when the colour library fails)"""
+    ax.plot(SIMPLIFIED_BOUNDARY_X, SIMPLIFIED_BOUNDARY_Y, 'k-')
+    ax.fill(SIMPLIFIED_BOUNDARY_X, SIMPLIFIED_BOUNDARY_Y, alpha=0.1, color='gray')
+    draw_gamut(ax, gamut)
+    draw_illuminant(ax, illuminant)
+
+
+def render_reflectance_figure(snapshot, dpi, font_settings):
+    """
+    Build an independent Agg figure of the reflectance spectra for export
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        dpi: Export DPI
+        font_settings: Font settings (font_settings.json content)
+
+    Returns:
+        (figure, scale_factor)
+    """
+    plot_settings = snapshot['plot']
+    width_px = plot_settings.get('reflectance_width', 1600)
+    height_px = plot_settings.get('reflectance_height', 800)
+    sizes = export_font_sizes(snapshot, font_settings, 'reflectance_font_size', dpi)
+
+    print(f"Rendering Reflectance Plot: {width_px}x{height_px}px ({width_px / dpi:.2f}x{height_px / dpi:.2f} inches), DPI={dpi}")
+
+    figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+
+    if plot_settings.get('reflectance_show_title', True):
+        ax.set_title(plot_settings.get('reflectance_title', "Reflectance Spectra of Measured Samples"),
+                     fontsize=sizes['title'], fontfamily=sizes['family'])
+    ax.set_xlabel("Wavelength (nm)", fontsize=sizes['axis_label'], fontfamily=sizes['family'])
+    ax.set_ylabel("$\\rho$", fontsize=sizes['axis_label'], fontfamily=sizes['family'])
+    ax.tick_params(axis='both', which='major', labelsize=sizes['tick_label'])
+
+    ax.set_xlim(380, 780)
+    ax.xaxis.set_major_locator(ticker.FixedLocator([380, 400, 450, 500, 550, 600, 650, 700, 750, 780]))
+    ax.grid(True, linestyle='--', alpha=0.7)
+
+    show_legend = plot_settings.get('reflectance_show_legend', True)
+    legend = None
+    mode = resolve_reflectance_mode(plot_settings.get('reflectance_render_mode', 'Auto'), len(snapshot['names']))
+    if mode in ('Collection', 'Envelope') and snapshot['names']:
+        block = build_spectral_block(snapshot['names'], snapshot['wavelengths'], snapshot['reflectance'],
+                                     dict(zip(snapshot['result_names'], snapshot['hex_colors'])))
+        if mode == 'Envelope':
+            max_reflectance = draw_reflectance_envelope(ax, block, snapshot['selected'], show_legend, sizes['legend'])
+            legend = ax.get_legend()
+        else:
+            _, legend = draw_reflectance_collection(ax, block, snapshot['selected'], show_legend, sizes['legend'])
+            max_reflectance = np.max(block['reflectance'])
+    else:
+        max_reflectance = 0
+        for name, wavelengths, reflectance in zip(snapshot['names'], snapshot['wavelengths'], snapshot['reflectance']):
+            if len(reflectance) > 0:
+                max_reflectance = max(max_reflectance, np.max(reflectance))
+            # Resample when lengths mismatch, same as the on-screen plot
+            if len(wavelengths) != len(reflectance):
+                source_wavelengths = np.linspace(wavelengths[0], wavelengths[-1], len(reflectance))
+                reflectance = np.interp(wavelengths, source_wavelengths, reflectance)
+            ax.plot(wavelengths, reflectance, label=name)
+
+        if len(snapshot['names']) > 1 and show_legend:
+            legend = ax.legend(fontsize=sizes['legend'])
+
+    ax.set_ylim(0, reflectance_upper_limit(max_reflectance))
+
+    if legend is not None:
+        for text in legend.get_texts():
+            text.set_fontfamily(sizes['family'])
+
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontfamily(sizes['family'])
+
+    return figure, sizes['scale_factor']
+
+
+def render_cie_figure(snapshot, dpi, font_settings, background=None):
+    """
+    Build an independent Agg figure of the CIE chromaticity diagram for export
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        dpi: Export DPI
+        font_settings: Font settings (font_settings.json content)
+        background: Optional pre-rendered chromaticity background image
+
+    Returns:
+        (figure, scale_factor)
+    """
+    plot_settings = snapshot['plot']
+    width_px = plot_settings.get('cie_width', 900)
+    height_px = plot_settings.get('cie_height', 900)
+    sizes = export_font_sizes(snapshot, font_settings, 'cie_font_size', dpi)
+
+    print(f"Rendering CIE Plot: {width_px}x{height_px}px ({width_px / dpi:.2f}x{height_px / dpi:.2f} inches), DPI={dpi}")
+
+    figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.set_axisbelow(True)
+
+    draw_chromaticity_diagram(ax, snapshot['gamut'], snapshot['illuminant'],
+                              wavelength_label_size=sizes['tick_label'], background=background)
+
+    if plot_settings.get('cie_show_title', True):
+        ax.set_title(plot_settings.get('cie_title', "CIE 1931 Chromaticity Diagram"),
+                     fontsize=sizes['title'], fontfamily=sizes['family'])
+    ax.set_xlabel("x", fontsize=sizes['axis_label'], fontfamily=sizes['family'])
+    ax.set_ylabel("y", fontsize=sizes['axis_label'], fontfamily=sizes['family'])
+
+    ax.set_xlim(CIE_BOUNDING_BOX[0], CIE_BOUNDING_BOX[1])
+    ax.set_ylim(CIE_BOUNDING_BOX[2], CIE_BOUNDING_BOX[3])
+    ax.set_xticks(np.arange(0, 0.9, 0.1))
+    ax.set_yticks(np.arange(0, 1.0, 0.1))
+    ax.tick_params(axis='both', which='major', labelsize=sizes['tick_label'])
+    ax.grid(False)
+
+    block = {
+        'names': snapshot['result_names'],
+        'index': {name: row for row, name in enumerate(snapshot['result_names'])},
+        'xy': snapshot['xy'],
+        'colors': snapshot['hex_colors']
+    }
+    if resolve_cie_mode(plot_settings.get('cie_render_mode', 'Auto'), len(block['names'])) == 'Density':
+        draw_cie_density(ax, block, snapshot['selected'])
+    else:
+        draw_cie_markers(ax, block)
+
+    if len(snapshot['result_names']) > 0 and plot_settings.get('cie_show_legend', True):
+        legend = ax.legend(fontsize=sizes['legend'], loc='upper right', frameon=True, bbox_to_anchor=(1.0, 1.0))
+        for text in legend.get_texts():
+            text.set_fontfamily(sizes['family'])
+
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontfamily(sizes['family'])
+
+    return figure, sizes['scale_factor']
+
+
+def reflectance_upper_limit(max_reflectance):
+    """
+    Adaptive Y-axis upper limit for reflectance plots
+
+    Parameters:
+        max_reflectance: Maximum plotted reflectance value
+
+    Returns:
+        Upper Y limit
+    """
+    if max_reflectance <= 0:
+        return 1.05
+    if max_reflectance > 1.0:
+        return max_reflectance * 1.05
+    if max_reflectance < 0.1:
+        return max_reflectance * 1.5
+    return min(1.05, max_reflectance * 1.2)
+
+
+def save_figure(figure, file_path, dpi, scale_factor):
+    """
+    Lay out and write an export figure to disk
+
+    The image is written to a temporary file that replaces the target once complete.
+
+    Parameters:
+        figure: Figure built by one of the render_* functions
+        file_path: Output path, format follows the extension
+        dpi: Export DPI
+        scale_factor: Font scale factor of the figure, also used for padding
+    """
+    figure.tight_layout(pad=0.8)
+    with atomic_output(file_path) as temp_path:
+        figure.savefig(temp_path, dpi=dpi, bbox_inches='tight', pad_inches=0.25 * scale_factor)
+
+
+def export_plots(snapshot, jobs, font_settings, progress=None):
+    """
+    Render and save plots one after the other in the calling thread
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        jobs: List of (plot type, output path, dpi), plot type is 'reflectance' or 'cie'
+        font_settings: Font settings (font_settings.json content)
+        progress: Optional callable(plots saved), returning False cancels (raises ExportCancelled)
+
+    Returns:
+        List of written file paths
+    """
+    exported_files = []
+    for plot_type, file_path, dpi in jobs:
+        if plot_type == 'reflectance':
+            figure, scale_factor = render_reflectance_figure(snapshot, dpi, font_settings)
+        else:
+            figure, scale_factor = render_cie_figure(snapshot, dpi, font_settings)
+        save_figure(figure, file_path, dpi, scale_factor)
+        exported_files.append(file_path)
+        print(f"{'Reflectance' if plot_type == 'reflectance' else 'CIE'} Plot exported to: {file_path}")
+        report_progress(progress)
+    return exported_files
+
+
+def subset_snapshot(snapshot, sample_names):
+    """
+    Restrict a plot snapshot to some samples
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        sample_names: Names of the samples to keep
+
+    Returns:
+        New snapshot holding only the given samples (arrays are shared, not copied)
+    """
+    keep = set(sample_names)
+    spectra = [i for i, name in enumerate(snapshot['names']) if name in keep]
+    results = [i for i, name in enumerate(snapshot['result_names']) if name in keep]
+
+    subset = dict(snapshot)
+    subset['names'] = [snapshot['names'][i] for i in spectra]
+    subset['wavelengths'] = [snapshot['wavelengths'][i] for i in spectra]
+    subset['reflectance'] = [snapshot['reflectance'][i] for i in spectra]
+    subset['result_names'] = [snapshot['result_names'][i] for i in results]
+    subset['xy'] = snapshot['xy'][results]
+    subset['hex_colors'] = [snapshot['hex_colors'][i] for i in results]
+    return subset
+
+
+def build_batch_plot_jobs(snapshot, output_dir, base_name, formats, dpis, group_plots=('reflectance', 'cie'),
+                          per_sample=True):
+    """
+    List every plot file of a batch export
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        output_dir: Target directory
+        base_name: File name prefix
+        formats: File extensions, e.g. ['.png', '.pdf']
+        dpis: DPI values, e.g. [150, 300, 600]
+        group_plots: Plot types drawn with all samples ('reflectance' and/or 'cie')
+        per_sample: Add one reflectance plot per sample
+
+    Returns:
+        List of (plot type, sample name or None, output path, dpi)
+    """
+    # File name part of each sample, numbered by sample position where sanitized names collide
+    # (compared case-insensitively for case-insensitive file systems)
+    sample_stems = []
+    used_stems = set()
+    if per_sample:
+        for index, name in enumerate(snapshot['names'], 1):
+            sample_stem = re.sub(r'[^\w.-]+', '_', os.path.splitext(name)[0])
+            unique_stem, suffix = sample_stem, index
+            while unique_stem.lower() in used_stems:
+                unique_stem = f"{sample_stem}_{suffix}"
+                suffix += len(snapshot['names'])
+            used_stems.add(unique_stem.lower())
+            sample_stems.append((name, unique_stem))
+
+    jobs = []
+    for dpi in dpis:
+        for ext in formats:
+            for plot_type in group_plots:
+                jobs.append((plot_type, None, os.path.join(output_dir, f"{base_name}_{plot_type}_{dpi}dpi{ext}"), dpi))
+            for name, sample_stem in sample_stems:
+                file_name = f"{base_name}_{sample_stem}_reflectance_{dpi}dpi{ext}"
+                jobs.append(('reflectance', name, os.path.join(output_dir, file_name), dpi))
+    return jobs
+
+
+def _init_batch_worker(snapshot, font_settings, background, locus):
+    """Process pool initializer: receive the shared snapshot and diagram data once per worker"""
+    _batch_state['snapshot'] = snapshot
+    _batch_state['font_settings'] = font_settings
+    _batch_state['background'] = background
+    _batch_state['locus'] = locus
+
+
+def _run_batch_job(job):
+    """Render and save one batch export job inside a worker process"""
+    plot_type, sample_name, file_path, dpi = job
+    snapshot = _batch_state['snapshot']
+    if sample_name is not None:
+        snapshot = subset_snapshot(snapshot, [sample_name])
+
+    if plot_type == 'reflectance':
+        figure, scale_factor = render_reflectance_figure(snapshot, dpi, _batch_state['font_settings'])
+    else:
+        figure, scale_factor = render_cie_figure(snapshot, dpi, _batch_state['font_settings'])
+    save_figure(figure, file_path, dpi, scale_factor)
+    return file_path
+
+
+def export_plot_batch(snapshot, jobs, font_settings, max_workers=None, progress_callback=None):
+    """
+    Render batch export jobs across a process pool
+
+    The chromaticity background and spectral locus are computed (or taken from the
+    cache) once here and passed to every worker through the pool initializer.
+
+    Parameters:
+        snapshot: Plot snapshot from create_plot_snapshot
+        jobs: Jobs from build_batch_plot_jobs
+        font_settings: Font settings (font_settings.json content)
+        max_workers: Number of worker processes (default: CPU count)
+        progress_callback: Optional callable(done, total, file_path), returning False cancels
+            the jobs that have not started yet (the files written so far are returned)
+
+    Returns:
+        List of written file paths
+    """
+    if not jobs:
+        return []
+
+    background = chromaticity_background()
+    locus = spectral_locus()
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(jobs)))
+
+    # Use spawn so workers never inherit the Qt state of the GUI process
+    context = multiprocessing.get_context('spawn')
+    exported_files = []
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_batch_worker,
+                             initargs=(snapshot, font_settings, background, locus)) as executor:
+        futures = [executor.submit(_run_batch_job, job) for job in jobs]
+        for future in as_completed(futures):
+            try:
+                file_path = future.result()
+            except Exception:
+                # Do not start the remaining jobs once one has failed
+                for pending in futures:
+                    pending.cancel()
+                raise
+            exported_files.append(file_path)
+            if progress_callback is not None and progress_callback(len(exported_files), len(jobs), file_path) is False:
+                print(f"Batch plot export cancelled after {len(exported_files)}/{len(jobs)} files")
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    return exported_files
@@ -1,11 +1,116 @@
 import sys
+import numpy as np
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, 
-    QPushButton, QHBoxLayout, QWidget, QHeaderView, QApplication
+    QDialog, QVBoxLayout, QTableView,
+    QPushButton, QHBoxLayout, QWidget, QHeaderView
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
 from PySide6.QtGui import QClipboard, QFont
 
+from table_text import decimal_mark, include_header, format_numbers, join_table
+from clipboard_copy import copy_text_to_clipboard
+
+
+class ReflectanceTableModel(QAbstractTableModel):
+    """
+    Table model over a wavelength x sample reflectance matrix
+    
+    The datasets are stacked into one numpy array when the data is set, cells are
+    only formatted when the view asks for them, so the cost of showing the table does
+    not depend on the number of samples.
+    
+    Parameters:
+        wavelengths: List of wavelength values (one row each)
+        datasets: Dictionary of dataset names and values (one column each)
+        parent: Parent object
+    """
+    
+    def __init__(self, wavelengths, datasets, parent=None):
+        super().__init__(parent)
+        self.wavelengths = np.empty(0)
+        self.values = np.empty((0, 0))
+        self.headers = ["Lambda (nm)"]
+        self.set_data(wavelengths, datasets)
+    
+    def set_data(self, wavelengths, datasets):
+        """
+        Replace the table content
+        
+        Datasets shorter than the wavelength list leave their remaining cells empty.
+        
+        Parameters:
+            wavelengths: List of wavelength values
+            datasets: Dictionary of dataset names and values
+        """
+        self.beginResetModel()
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        num_rows = len(self.wavelengths)
+        
+        # (rows, datasets) matrix, NaN marks a missing value
+        self.values = np.full((num_rows, len(datasets)), np.nan)
+        for col, dataset_values in enumerate(datasets.values()):
+            dataset_values = np.asarray(dataset_values, dtype=np.float64)[:num_rows]
+            self.values[:len(dataset_values), col] = dataset_values
+        
+        # Headers, remove .csv suffix from filenames
+        self.headers = ["Lambda (nm)"]
+        for filename in datasets.keys():
+            display_name = filename
+            if display_name.lower().endswith('.csv'):
+                display_name = display_name[:-4]
+            self.headers.append(display_name)
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.wavelengths)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def cell_text(self, row, col):
+        """Formatted text of a cell, wavelengths without decimal places"""
+        if col == 0:
+            return f"{int(self.wavelengths[row])}"
+        value = self.values[row, col - 1]
+        return "" if np.isnan(value) else f"{value:.6f}"
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cell_text(index.row(), index.column())
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+    
+    def text_builder(self, decimal='.', header=True, decimal_places=6):
+        """
+        Callable building the tab-separated text of the whole table
+
+        The current arrays are captured, so the text can be built in a background thread.
+        
+        Parameters:
+            decimal: Decimal mark
+            header: Whether to start with the header line
+            decimal_places: Decimal places of the reflectance values
+        
+        Returns:
+            Callable returning the text
+        """
+        wavelengths, values, headers = self.wavelengths, self.values, list(self.headers)
+        
+        def build_text():
+            # The whole reflectance matrix is formatted at once, one string per row
+            wavelength_column = format_numbers(np.trunc(wavelengths), '%d')
+            value_rows = format_numbers(values, f'%.{decimal_places}f', decimal)
+            return join_table(headers, [wavelength_column, value_rows], header)
+        return build_text
+
 
 class ReflectanceDataDialog(QDialog):
     def __init__(self, wavelengths, datasets, parent=None):
@@ -40,8 +145,10 @@ class ReflectanceDataDialog(QDialog):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)  # Set more suitable margins
         
-        # Create table
-        self.table = QTableWidget()
+        # Create table, cells are read from the model on demand
+        self.model = ReflectanceTableModel([], {}, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.setup_table_style()  # Set table style
         self.populate_table()
         layout.addWidget(self.table)
@@ -71,7 +178,7 @@ class ReflectanceDataDialog(QDialog):
         
         # Set table style
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 font-size: 10pt;
             }
@@ -81,7 +188,7 @@ class ReflectanceDataDialog(QDialog):
                 font-size: 10pt;
                 border: 1px solid #d0d0d0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 3px;
             }
         """)
@@ -95,38 +202,7 @@ class ReflectanceDataDialog(QDialog):
         """
         Populate table data.
         """
-        # Set number of columns (Lambda + number of datasets)
-        num_columns = 1 + len(self.datasets)
-        self.table.setColumnCount(num_columns)
-        
-        # Set number of rows (number of wavelengths)
-        num_rows = len(self.wavelengths)
-        self.table.setRowCount(num_rows)
-        
-        # Set headers, remove .csv suffix from filenames
-        headers = ["Lambda (nm)"]
-        for filename in self.datasets.keys():
-            # Remove filename suffix
-            display_name = filename
-            if display_name.lower().endswith('.csv'):
-                display_name = display_name[:-4]
-            headers.append(display_name)
-        
-        self.table.setHorizontalHeaderLabels(headers)
-        
-        # Fill wavelength data, don't show decimal places
-        for row, wavelength in enumerate(self.wavelengths):
-            # Display wavelength as integer
-            wavelength_item = QTableWidgetItem(f"{int(wavelength)}")
-            wavelength_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 0, wavelength_item)
-            
-            # Fill reflectance data for each dataset
-            for col, (dataset_name, dataset_values) in enumerate(self.datasets.items(), start=1):
-                if row < len(dataset_values):
-                    value_item = QTableWidgetItem(f"{dataset_values[row]:.6f}")
-                    value_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                    self.table.setItem(row, col, value_item)
+        self.model.set_data(self.wavelengths, self.datasets)
         
         # Initial setup of wavelength column width
         self.table.setColumnWidth(0, 85)
@@ -172,37 +248,17 @@ class ReflectanceDataDialog(QDialog):
             if remaining_width > 0 and num_data_columns > 0:
                 data_column_width = max(100, remaining_width // num_data_columns)
                 
-                for col in range(1, self.table.columnCount()):
+                for col in range(1, self.model.columnCount()):
                     self.table.setColumnWidth(col, data_column_width)
     
     def copy_to_clipboard(self):
         """
         Copy table data to clipboard.
         """
-        clipboard = QApplication.clipboard()
-        
-        # Build text representation of table data
-        text = ""
-        
-        # Add headers
-        headers = []
-        for col in range(self.table.columnCount()):
-            headers.append(self.table.horizontalHeaderItem(col).text())
-        text += "\t".join(headers) + "\n"
-        
-        # Add data rows
-        for row in range(self.table.rowCount()):
-            row_data = []
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item is not None:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            text += "\t".join(row_data) + "\n"
-        
-        # Set clipboard content
-        clipboard.setText(text)
+        settings = getattr(self.parent(), 'settings', {})
+        build_text = self.model.text_builder(decimal_mark(settings), include_header(settings),
+                                             settings.get('export', {}).get('decimal_places', 6))
+        copy_text_to_clipboard(self, build_text, self.model.values.size)
     
     def resizeEvent(self, event):
         """Window resize event"""
@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import struct
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+from color_calculator import (CALCULATION_VERSION, compute_color, resample_to_1nm_step, rgb_to_hex, hex_colors)
+from batch_runner import OUTPUT_COLUMNS, OUTPUT_WIDTH, run_batch
+from file_output import user_data_directory
+
+
+# Cache file in the user data directory
+CACHE_FILE_NAME = 'result_cache.sqlite'
+
+# Default size limit of the cached results
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Eviction removes the least recently used results down to this fraction of the limit
+EVICT_TO_FRACTION = 0.9
+
+# Keys per SQL statement, below SQLite's parameter limit
+KEYS_PER_QUERY = 500
+
+
+def default_cache_path():
+    """Path of the result cache in the user data directory"""
+    return os.path.join(user_data_directory(), CACHE_FILE_NAME)
+
+
+def _update_array(digest, values):
+    """Add a length-prefixed float64 array to a hash"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    digest.update(struct.pack('!Q', values.size))
+    digest.update(values.tobytes())
+
+
+class ResultKeys:
+    """
+    Content-addressed cache keys of samples calculated with one configuration
+
+    A key is the SHA-256 of the calculation version, the observer and illuminant
+    tables, the illuminant name, rho_lambda and the black and white references,
+    followed by the raw measurement values, their wavelengths and the wavelength grid
+    the sample is calculated on. The settings part is hashed once per configuration.
+
+    Parameters:
+        config: CalculationConfig
+        tables: SpectralTables
+    """
+
+    def __init__(self, config, tables):
+        fingerprints = tables.fingerprints
+        settings = {
+            'version': CALCULATION_VERSION,
+            'observer': fingerprints['observer'],
+            'illuminant': config.illuminant,
+            'illuminant_spectrum': fingerprints['illuminants'].get(config.illuminant),
+            'rho_lambda': config.rho_lambda
+        }
+        self.prefix = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        for reference in config.reference_arrays if config.calibrated else (None, None):
+            if reference is None:
+                self.prefix.update(b'-')
+            else:
+                _update_array(self.prefix, reference)
+
+    def key(self, values, wavelengths, grid=None):
+        """
+        Cache key of one sample
+
+        Parameters:
+            values: Raw measurement values
+            wavelengths: Wavelengths of the values
+            grid: Wavelength grid the sample is calculated on, default its own wavelengths
+        """
+        digest = self.prefix.copy()
+        _update_array(digest, values)
+        _update_array(digest, wavelengths)
+        _update_array(digest, wavelengths if grid is None else grid)
+        return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of calculated samples, keyed by ResultKeys
+
+    Each entry holds the colour values (in the OUTPUT_COLUMNS layout of the batch
+    runner) and the reflectance spectrum. Entries are stored in an SQLite file which
+    several processes can share; once the stored results exceed max_bytes, the least
+    recently used are removed. A cache that cannot be opened, read or written is
+    reported once and then disabled, so the calculation always goes on without it.
+
+    Parameters:
+        path: Cache file, default in the user data directory
+        max_bytes: Size limit of the stored results
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.connection = None
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        """Open the cache file on first use"""
+        if self.connection is None:
+            if self.path is None:
+                self.path = default_cache_path()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+                               "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            connection.commit()
+            self.connection = connection
+        return self.connection
+
+    def _disable(self, error):
+        """Stop using a broken cache"""
+        print(f"Warning: Result cache {self.path or 'in the user data directory'} disabled: {error}")
+        self.enabled = False
+
+    def get_many(self, keys):
+        """
+        Look up cached samples
+
+        Parameters:
+            keys: Cache keys
+
+        Returns:
+            {key: (colour values (OUTPUT_WIDTH,), reflectance)} of the keys found
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not self.enabled or not keys:
+            return found
+        try:
+            with self.lock:
+                connection = self._connect()
+                now = time.time()
+                for start in range(0, len(keys), KEYS_PER_QUERY):
+                    batch = keys[start:start + KEYS_PER_QUERY]
+                    placeholders = ','.join('?' * len(batch))
+                    rows = connection.execute(f"SELECT key, payload FROM results WHERE key IN ({placeholders})",
+                                              batch).fetchall()
+                    for key, payload in rows:
+                        values = np.frombuffer(payload, dtype=np.float64)
+                        found[key] = (values[:OUTPUT_WIDTH], values[OUTPUT_WIDTH:])
+                    if rows:
+                        connection.execute(f"UPDATE results SET accessed = ? WHERE key IN ({placeholders})",
+                                           [now] + batch)
+                connection.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return {}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """
+        Store calculated samples and evict the least recently used beyond the size limit
+
+        Parameters:
+            entries: Iterable of (key, colour values (OUTPUT_WIDTH,), reflectance)
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = []
+        for key, output, reflectance in entries:
+            payload = np.concatenate([np.asarray(output, dtype=np.float64).ravel(),
+                                      np.asarray(reflectance, dtype=np.float64).ravel()]).tobytes()
+            rows.append((key, payload, len(payload), now))
+        if not rows:
+            return
+        try:
+            with self.lock:
+                connection = self._connect()
+                connection.executemany("INSERT OR REPLACE INTO results (key, payload, size, accessed) VALUES (?, ?, ?, ?)",
+                                       rows)
+                self._evict(connection)
+                connection.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def _evict(self, connection):
+        """Remove the least recently used results once the size limit is exceeded"""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO_FRACTION)
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY accessed"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        print(f"Result cache: evicted {len(evicted)} least recently used results")
+
+    def stats(self):
+        """{'entries', 'bytes', 'hits', 'misses'} of the cache"""
+        entries = size = 0
+        if self.enabled:
+            try:
+                with self.lock:
+                    entries, size = self._connect().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """Remove all cached results"""
+        if not self.enabled:
+            return
+        try:
+            with self.lock:
+                connection = self._connect()
+                connection.execute("DELETE FROM results")
+                connection.commit()
+                connection.execute("VACUUM")
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def close(self):
+        """Close the cache file"""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+def cached_color_result(output, reflectance, wavelengths):
+    """
+    compute_color style result dictionary of a cached sample
+
+    The 1nm resampled reflectance for display is derived again, calibration and
+    integration are skipped.
+    """
+    output = np.array(output)
+    wavelengths = np.array(wavelengths, dtype=np.float64)
+    reflectance = np.array(reflectance)
+    wavelengths_1nm, reflectance_1nm = resample_to_1nm_step(wavelengths, reflectance)
+    result = {key: output[columns] for key, columns in OUTPUT_COLUMNS.items()}
+    result.update({
+        'reflectance': reflectance,
+        'wavelengths': wavelengths,
+        'reflectance_1nm': reflectance_1nm,
+        'wavelengths_1nm': wavelengths_1nm,
+        'hex_color': rgb_to_hex(result['rgb_gamma'])
+    })
+    return result
+
+
+def compute_colors_cached(measurements, config, tables, cache):
+    """
+    compute_color of several samples, taking the cached ones from the cache
+
+    Parameters:
+        measurements: List of (values, wavelengths)
+        config: CalculationConfig
+        tables: SpectralTables
+        cache: ResultCache, or None to compute everything
+
+    Returns:
+        (list of result dictionaries in measurement order, number of cached results)
+    """
+    if cache is None:
+        return [compute_color(values, wavelengths, config, tables) for values, wavelengths in measurements], 0
+
+    result_keys = ResultKeys(config, tables)
+    keys = [result_keys.key(values, wavelengths) for values, wavelengths in measurements]
+    found = cache.get_many(keys)
+
+    results = []
+    computed = []
+    for key, (values, wavelengths) in zip(keys, measurements):
+        if key in found:
+            output, reflectance = found[key]
+            results.append(cached_color_result(output, reflectance, wavelengths))
+            continue
+        result = compute_color(values, wavelengths, config, tables)
+        output = np.concatenate([result[name] for name in OUTPUT_COLUMNS])
+        computed.append((key, output, result['reflectance']))
+        results.append(result)
+    cache.put_many(computed)
+    return results, len(keys) - len(computed)
+
+
+def run_batch_cached(measurements, block, config, tables, cache, max_workers=None):
+    """
+    run_batch over the samples that are not cached yet
+
+    Parameters:
+        measurements: List of raw (values, wavelengths) per row of the block
+        block: Spectral block of the measurements (see spectral_data.build_spectral_block)
+        config: CalculationConfig
+        tables: SpectralTables
+        cache: ResultCache
+        max_workers: See run_batch
+
+    Returns:
+        Dictionary of run_batch, the stats with 'cache_hits'
+    """
+    start_time = time.perf_counter()
+    grid = block['wavelengths']
+    result_keys = ResultKeys(config, tables)
+    keys = [result_keys.key(values, wavelengths, grid) for values, wavelengths in measurements]
+    found = cache.get_many(keys)
+    missing = [row for row, key in enumerate(keys) if key not in found]
+
+    count = len(keys)
+    output = np.empty((count, OUTPUT_WIDTH), dtype=np.float64)
+    reflectance = np.empty((count, len(grid)), dtype=np.float64)
+    for row, key in enumerate(keys):
+        if key in found:
+            output[row], reflectance[row] = found[key]
+
+    workers = 0
+    if missing:
+        computed = run_batch(block['reflectance'][missing], grid, config, tables, max_workers=max_workers)
+        workers = computed['stats']['workers']
+        for key, columns in OUTPUT_COLUMNS.items():
+            output[missing, columns] = computed[key]
+        reflectance[missing] = computed['reflectance']
+        cache.put_many((keys[row], output[row], reflectance[row]) for row in missing)
+
+    seconds = time.perf_counter() - start_time
+    results = {key: output[:, columns] for key, columns in OUTPUT_COLUMNS.items()}
+    results.update({
+        'wavelengths': grid,
+        'reflectance': reflectance,
+        'hex_color': hex_colors(results['rgb_gamma']),
+        'stats': {
+            'samples': count,
+            'workers': workers,
+            'seconds': seconds,
+            'spectra_per_second': count / seconds if seconds > 0 else float('inf'),
+            'cache_hits': count - len(missing)
+        }
+    })
+    print(f"Result cache: {count - len(missing)}/{count} samples cached, {len(missing)} calculated")
+    return results
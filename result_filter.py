@@ -0,0 +1,235 @@
+import re
+import fnmatch
+from datetime import datetime
+import numpy as np
+
+
+# Syntax help shown on the filter field
+FILTER_SYNTAX = (
+    "Filter the results, all terms must match:\n"
+    "  tu-berlin*            name pattern (* and ? wildcards, plain text matches anywhere)\n"
+    "  x:0.3..0.5  y:..0.4   chromaticity range (either bound may be omitted)\n"
+    "  color:#FF62           hex colour prefix\n"
+    "  color:#FF6200~20      hex colour within an RGB distance (0-255 units)\n"
+    "  date:2023-04-01..2023-04-30   measurement date from the file header\n"
+    "  time:50..100          integration time [ms] from the file header"
+)
+
+# Metadata keys of the measurement file headers used by the filters
+DATE_KEY = 'Date'
+INTEGRATION_TIME_KEY = 'Integration Time [ms]'
+
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y')
+
+
+def parse_date(text):
+    """
+    Parse a date from a query or a file header
+
+    Parameters:
+        text: Date as YYYY-MM-DD, MM/DD/YYYY (spectrometer headers) or DD.MM.YYYY
+
+    Returns:
+        numpy datetime64[D]
+
+    Raises:
+        ValueError: If the text is not a supported date
+    """
+    text = text.strip()
+    for date_format in _DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(text, date_format).date(), 'D')
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{text}'")
+
+
+def _parse_range(text, parse_value):
+    """Parse 'a..b', 'a..', '..b' or a single value into (low, high), None for an open bound"""
+    if '..' in text:
+        low, high = text.split('..', 1)
+        return (parse_value(low) if low.strip() else None, parse_value(high) if high.strip() else None)
+    value = parse_value(text)
+    return (value, value)
+
+
+def parse_filter_query(query):
+    """
+    Parse a filter query (see FILTER_SYNTAX)
+
+    Parameters:
+        query: Query text
+
+    Returns:
+        Criteria dictionary with any of the keys names, x, y, color, date, integration_time
+        (empty if the query is blank)
+
+    Raises:
+        ValueError: If a term cannot be parsed
+    """
+    criteria = {}
+    for term in query.split():
+        key, separator, value = term.partition(':')
+        key = key.lower()
+        if not separator or key not in ('name', 'x', 'y', 'color', 'colour', 'date', 'time'):
+            # Plain words are name patterns
+            criteria.setdefault('names', []).append(term.lower())
+            continue
+        if not value:
+            raise ValueError(f"Missing value in '{term}'")
+        if key == 'name':
+            criteria.setdefault('names', []).append(value.lower())
+        elif key in ('x', 'y'):
+            criteria[key] = _parse_range(value, float)
+        elif key == 'time':
+            criteria['integration_time'] = _parse_range(value, float)
+        elif key == 'date':
+            criteria['date'] = _parse_range(value, parse_date)
+        else:
+            hex_part, separator, tolerance = value.partition('~')
+            hex_part = hex_part.upper()
+            if not hex_part.startswith('#'):
+                hex_part = '#' + hex_part
+            if not re.fullmatch(r'#[0-9A-F]{0,6}', hex_part):
+                raise ValueError(f"Invalid colour '{value}'")
+            if tolerance and len(hex_part) != 7:
+                raise ValueError(f"A colour distance needs a full #RRGGBB colour: '{value}'")
+            criteria['color'] = (hex_part, float(tolerance) if tolerance else None)
+    return criteria
+
+
+def _in_range(values, bounds):
+    """Boolean mask of values within (low, high), NaN/NaT never match"""
+    low, high = bounds
+    mask = ~np.isnan(values) if values.dtype.kind == 'f' else ~np.isnat(values)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def _metadata_number(metadata, key):
+    """Numeric metadata value, NaN if missing or not a number"""
+    try:
+        return float(metadata.get(key, ''))
+    except ValueError:
+        return np.nan
+
+
+def _metadata_date(metadata, key):
+    """Date metadata value, NaT if missing or not a date"""
+    try:
+        return parse_date(metadata.get(key, ''))
+    except ValueError:
+        return np.datetime64('NaT', 'D')
+
+
+class ResultsIndex:
+    """
+    Precomputed search and sort keys of the color results
+
+    The keys are built once per results change, so filtering is a few vectorized
+    comparisons and sorting only looks up a cached order.
+
+    Parameters:
+        block: Results block from spectral_data.build_results_block
+        metadata: Optional {file name: {header key: value}} from the measurement files
+    """
+
+    def __init__(self, block, metadata=None):
+        metadata = metadata or {}
+        names = block['names']
+        self.size = len(names)
+        self.block = block
+
+        # Name index: lower-case names, and the same sorted for prefix lookups
+        self.names_lower = np.array([name.lower() for name in names], dtype=str)
+        self.name_order = np.argsort(self.names_lower, kind='stable')
+        self.sorted_names = self.names_lower[self.name_order]
+
+        # Colours as upper-case hex strings and as 0-255 RGB
+        self.hex_colors = np.array([color.upper() for color in block['colors']], dtype=str)
+        self.rgb255 = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] if len(color) == 7 else [-1000] * 3
+                                for color in self.hex_colors], dtype=np.float64).reshape(-1, 3)
+
+        # Header metadata
+        self.dates = np.array([_metadata_date(metadata.get(name, {}), DATE_KEY) for name in names],
+                              dtype='datetime64[D]')
+        self.integration_times = np.array([_metadata_number(metadata.get(name, {}), INTEGRATION_TIME_KEY) for name in names],
+                                          dtype=np.float64)
+
+        self.sort_orders = {}
+
+    def _name_mask(self, pattern):
+        """Rows whose name matches one name pattern"""
+        if any(char in pattern for char in '*?['):
+            prefix = pattern[:-1]
+            if pattern.endswith('*') and not any(char in prefix for char in '*?['):
+                # Prefix pattern: binary search in the sorted names
+                start = np.searchsorted(self.sorted_names, prefix, side='left')
+                end = np.searchsorted(self.sorted_names, prefix + '\U0010ffff', side='left')
+                mask = np.zeros(self.size, dtype=bool)
+                mask[self.name_order[start:end]] = True
+                return mask
+            regex = re.compile(fnmatch.translate(pattern))
+            return np.fromiter((regex.match(name) is not None for name in self.names_lower), dtype=bool, count=self.size)
+        return np.char.find(self.names_lower, pattern) >= 0
+
+    def match(self, criteria):
+        """
+        Rows matching all criteria
+
+        Parameters:
+            criteria: Criteria dictionary from parse_filter_query
+
+        Returns:
+            Boolean mask over the block rows
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for pattern in criteria.get('names', []):
+            mask &= self._name_mask(pattern)
+        if 'x' in criteria:
+            mask &= _in_range(self.block['xy'][:, 0], criteria['x'])
+        if 'y' in criteria:
+            mask &= _in_range(self.block['xy'][:, 1], criteria['y'])
+        if 'color' in criteria:
+            hex_color, tolerance = criteria['color']
+            if tolerance is None:
+                mask &= np.char.startswith(self.hex_colors, hex_color)
+            else:
+                target = np.array([int(hex_color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+                mask &= np.linalg.norm(self.rgb255 - target, axis=1) <= tolerance
+        if 'date' in criteria:
+            mask &= _in_range(self.dates, criteria['date'])
+        if 'integration_time' in criteria:
+            mask &= _in_range(self.integration_times, criteria['integration_time'])
+        return mask
+
+    def sort_order(self, key):
+        """
+        Block rows in ascending order of a sort key, computed once per key
+
+        Parameters:
+            key: 'name', 'x', 'y', 'rgb_linear', 'rgb_gamma', 'date', 'integration_time',
+                 anything else keeps the import order
+
+        Returns:
+            Array of block rows
+        """
+        if key not in self.sort_orders:
+            if key == 'name':
+                order = np.argsort(np.array(self.block['names'], dtype=str), kind='stable')
+            elif key in ('x', 'y'):
+                order = np.argsort(self.block['xy'][:, 0 if key == 'x' else 1], kind='stable')
+            elif key in ('rgb_linear', 'rgb_gamma'):
+                values = self.block[key]
+                order = np.lexsort((values[:, 2], values[:, 1], values[:, 0]))
+            elif key == 'date':
+                order = np.argsort(self.dates, kind='stable')
+            elif key == 'integration_time':
+                order = np.argsort(self.integration_times, kind='stable')
+            else:
+                order = np.arange(self.size)
+            self.sort_orders[key] = order
+        return self.sort_orders[key]
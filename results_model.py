@@ -0,0 +1,379 @@
+import numpy as np
+from PySide6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+from PySide6.QtGui import QColor
+
+from spectral_data import build_results_block
+from table_text import results_columns, join_table
+from result_filter import ResultsIndex
+
+
+# Results table columns
+RESULTS_HEADERS = ["CLR", "File Name", "x", "y", "sRGB Linear", "sRGB Gamma"]
+COLOR_COLUMN = 0
+NAME_COLUMN = 1
+RGB_GAMMA_COLUMN = 5
+
+# Sort key of each results column (see result_filter.ResultsIndex.sort_order),
+# the color column keeps the import order
+COLUMN_SORT_KEYS = {1: 'name', 2: 'x', 3: 'y', 4: 'rgb_linear', 5: 'rgb_gamma'}
+
+
+def format_rgb_gamma(rgb_gamma, rgb_format):
+    """
+    Format gamma-corrected sRGB values for display
+
+    Parameters:
+        rgb_gamma: (r, g, b) in range 0..1
+        rgb_format: '0 ... 255' for integer values, otherwise values in range 0..1
+
+    Returns:
+        Formatted string
+    """
+    if rgb_format == '0 ... 255':
+        # Format to 0-255 range
+        r_gamma, g_gamma, b_gamma = (value * 255 for value in rgb_gamma)
+        return f"({int(r_gamma) if r_gamma <= 255 else 255}, {int(g_gamma) if g_gamma <= 255 else 255}, {int(b_gamma) if b_gamma <= 255 else 255})"
+    return f"({rgb_gamma[0]:.4f}, {rgb_gamma[1]:.4f}, {rgb_gamma[2]:.4f})"
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Table model of the main window results, backed by columnar arrays
+
+    The results are kept as a results block (see spectral_data.build_results_block).
+    Cell text is formatted in data() when the view asks for a visible cell, so
+    refreshing the table does not create any per-cell objects. Rows are in import
+    order, sorting and filtering are done by ResultsFilterProxyModel.
+
+    Parameters:
+        parent: Parent object
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rgb_format = '0 ... 1'
+        self.source = None
+        self.block = build_results_block([])
+        self.color_cache = {}
+
+    def update_results(self, results):
+        """
+        Show a results list
+
+        When the list is the one already shown and has only grown, just the new rows
+        are inserted. Any other change resets the model.
+
+        Parameters:
+            results: Main window results list
+        """
+        count = len(self.block['names'])
+        if results is self.source and len(results) > count:
+            self.append_results(results[count:])
+        elif results is not self.source or len(results) != count:
+            self.beginResetModel()
+            self.source = results
+            self.block = build_results_block(results)
+            self.endResetModel()
+
+    def append_results(self, results):
+        """
+        Append rows to the end of the table
+
+        Parameters:
+            results: New results (continuing the shown results list)
+        """
+        if not results:
+            return
+        new_block = build_results_block(results)
+        first = len(self.block['names'])
+        last = first + len(results) - 1
+
+        self.beginInsertRows(QModelIndex(), first, last)
+        names = self.block['names'] + new_block['names']
+        self.block = {
+            'names': names,
+            'index': {name: row for row, name in enumerate(names)},
+            'xy': np.concatenate([self.block['xy'], new_block['xy']]),
+            'colors': self.block['colors'] + new_block['colors'],
+            'rgb_linear': np.concatenate([self.block['rgb_linear'], new_block['rgb_linear']]),
+            'rgb_gamma': np.concatenate([self.block['rgb_gamma'], new_block['rgb_gamma']])
+        }
+        self.endInsertRows()
+
+    def clear(self):
+        """Remove all rows"""
+        self.beginResetModel()
+        self.source = None
+        self.block = build_results_block([])
+        self.endResetModel()
+
+    def set_rgb_format(self, rgb_format):
+        """
+        Set the display range of the gamma-corrected sRGB column
+
+        Parameters:
+            rgb_format: '0 ... 1' or '0 ... 255'
+        """
+        if rgb_format == self.rgb_format:
+            return
+        self.rgb_format = rgb_format
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, RGB_GAMMA_COLUMN),
+                                  self.index(self.rowCount() - 1, RGB_GAMMA_COLUMN),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+    def file_name(self, row):
+        """File name of a row"""
+        return self.block['names'][row]
+
+    def row_of(self, file_name):
+        """Row of a file name, or None if it is not in the table"""
+        return self.block['index'].get(file_name)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.block['names'])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(RESULTS_HEADERS)
+
+    def cell_text(self, row, column):
+        """Formatted text of a cell (the color column has no text)"""
+        if column == NAME_COLUMN:
+            return self.block['names'][row]
+        if column == 2:
+            return f"{self.block['xy'][row, 0]:.6f}"
+        if column == 3:
+            return f"{self.block['xy'][row, 1]:.6f}"
+        if column == 4:
+            rgb_linear = self.block['rgb_linear'][row]
+            return f"({rgb_linear[0]:.4f}, {rgb_linear[1]:.4f}, {rgb_linear[2]:.4f})"
+        if column == RGB_GAMMA_COLUMN:
+            return format_rgb_gamma(self.block['rgb_gamma'][row], self.rgb_format)
+        return ""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cell_text(row, column) if column != COLOR_COLUMN else None
+        if role == Qt.ItemDataRole.BackgroundRole and column == COLOR_COLUMN:
+            hex_color = self.block['colors'][row]
+            if hex_color not in self.color_cache:
+                self.color_cache[hex_color] = QColor(hex_color)
+            return self.color_cache[hex_color]
+        if role == Qt.ItemDataRole.TextAlignmentRole and column > NAME_COLUMN:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return RESULTS_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def text_builder(self, decimal='.', header=True, rows=None):
+        """
+        Callable building the tab-separated text of the table
+
+        The current arrays are captured, so the text can be built in a background
+        thread while the model changes. The color column is skipped.
+
+        Parameters:
+            decimal: Decimal mark
+            header: Whether to start with the header line
+            rows: Rows in the order to copy (e.g. the sorted and filtered rows), default all rows
+
+        Returns:
+            Callable returning the text
+        """
+        block, rgb_format = self.block, self.rgb_format
+        rows = np.arange(len(block['names'])) if rows is None else np.array(rows)
+        headers = RESULTS_HEADERS[NAME_COLUMN:]
+
+        def build_text():
+            columns = results_columns(block, rows, rgb_format, decimal)
+            return join_table(headers, [columns[name] for name in headers], header)
+        return build_text
+
+
+class ResultsFilterProxyModel(QAbstractProxyModel):
+    """
+    Sorted and filtered view of a ResultsTableModel
+
+    The shown source rows are kept as an index array (and its inverse), computed
+    from the precomputed keys of a ResultsIndex. Changing the filter or the sort
+    order is a few numpy operations plus one model reset or layout change, the
+    view then only queries the visible rows, independent of the number of results.
+
+    Parameters:
+        parent: Parent object
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.metadata = {}
+        self.criteria = {}
+        self.search_index = None
+        # Proxy row -> source row, and source row -> proxy row (-1 if filtered out)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.rowsInserted.connect(self._on_source_rows_inserted)
+        model.dataChanged.connect(self._on_source_data_changed)
+        self._update_rows()
+        self.endResetModel()
+
+    def set_metadata(self, metadata):
+        """
+        Set the measurement file header metadata used by date and integration time filters
+
+        Parameters:
+            metadata: {file name: {header key: value}}
+        """
+        self.metadata = metadata
+        self.search_index = None
+
+    def get_search_index(self):
+        """Search and sort keys of the source results, built once per results change"""
+        if self.search_index is None:
+            self.search_index = ResultsIndex(self.sourceModel().block, self.metadata)
+        return self.search_index
+
+    def set_filter(self, criteria):
+        """
+        Show only the results matching the criteria
+
+        Parameters:
+            criteria: Criteria dictionary from result_filter.parse_filter_query (empty shows all)
+        """
+        self.criteria = criteria
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+
+    def is_filtered(self):
+        """Whether a filter is active"""
+        return bool(self.criteria)
+
+    def accepted_names(self):
+        """File names passing the filter, or None if no filter is active"""
+        if not self.criteria:
+            return None
+        names = self.sourceModel().block['names']
+        return {names[row] for row in self.rows}
+
+    def _compute_rows(self):
+        """Source rows passing the filter, in display order"""
+        size = self.sourceModel().rowCount()
+        key = COLUMN_SORT_KEYS.get(self.sort_column)
+        if key is None and not self.criteria:
+            return np.arange(size)
+
+        search_index = self.get_search_index()
+        order = search_index.sort_order(key) if key is not None else np.arange(size)
+        if key is not None and self.sort_order == Qt.SortOrder.DescendingOrder:
+            order = order[::-1]
+        if self.criteria:
+            order = order[search_index.match(self.criteria)[order]]
+        return np.ascontiguousarray(order)
+
+    def _update_rows(self, rows=None):
+        """Set the shown source rows and their inverse mapping"""
+        self.rows = self._compute_rows() if rows is None else rows
+        self.positions = np.full(self.sourceModel().rowCount(), -1, dtype=np.int64)
+        self.positions[self.rows] = np.arange(len(self.rows))
+
+    def _on_source_reset(self):
+        self.search_index = None
+        self._update_rows()
+        self.endResetModel()
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        """Append the new source rows that pass the filter, then re-sort if sorted"""
+        self.search_index = None
+        new_rows = np.arange(first, last + 1)
+        if self.criteria:
+            new_rows = new_rows[self.get_search_index().match(self.criteria)[first:last + 1]]
+
+        if len(new_rows) > 0:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+            self._update_rows(np.concatenate([self.rows, new_rows]))
+            self.endInsertRows()
+            if self.sort_column in COLUMN_SORT_KEYS:
+                self.sort(self.sort_column, self.sort_order)
+        else:
+            self._update_rows(self.rows)
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        if len(self.rows) > 0:
+            self.dataChanged.emit(self.index(0, top_left.column()),
+                                  self.index(len(self.rows) - 1, bottom_right.column()), roles)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sort the rows by a column, keeping selections on the same samples"""
+        self.sort_column = column
+        self.sort_order = order
+        if len(self.rows) == 0:
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self.rows
+        self._update_rows()
+
+        # Move persistent indexes (selection, current index) along with their rows
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(int(self.positions[old_rows[index.row()]]), index.column())
+                       for index in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def source_row(self, row):
+        """Source row of a proxy row"""
+        return int(self.rows[row])
+
+    def proxy_row(self, source_row):
+        """Proxy row of a source row, or None if it is filtered out"""
+        row = int(self.positions[source_row])
+        return None if row < 0 else row
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self.proxy_row(source_index.row())
+        return QModelIndex() if row is None else self.index(row, source_index.column())
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < len(RESULTS_HEADERS)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        # Without an index this is QObject.parent()
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def hasChildren(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.rows) > 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(RESULTS_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
@@ -11,6 +11,7 @@ from PySide6.QtCore import Qt, QSettings
 from PySide6.QtGui import QColor
 from PySide6 import QtWidgets, QtCore
 from ui_Settings import Ui_Dialog_settings  # Import newly generated UI class
+from plot_renderer import REFLECTANCE_RENDER_MODES, CIE_RENDER_MODES
 
 
 class SettingsDialog(QDialog):
@@ -37,9 +38,40 @@ class SettingsDialog(QDialog):
         
         # Add color selection feature - Since there's no color button in UI file, we need to manually add or process
         
+        # Render mode selection is not part of the UI file, add it to the plot forms
+        self.setup_render_mode_controls()
+        
         # Initialize UI
         self.load_settings_to_ui()
         
+    def setup_render_mode_controls(self):
+        """Add the render mode combo boxes to the plot settings forms"""
+        self.label_Plot_Reflectance_Render_Mode = QLabel("Render Mode", self.ui.widget_reflectance)
+        self.comboBox_Plot_Reflectance_Render_Mode = QComboBox(self.ui.widget_reflectance)
+        self.comboBox_Plot_Reflectance_Render_Mode.addItems(REFLECTANCE_RENDER_MODES)
+        self.comboBox_Plot_Reflectance_Render_Mode.setToolTip(
+            "Lines: one line per sample\n"
+            "Collection: all spectra in a single line collection, legend only for selected samples\n"
+            "Envelope: mean, median, percentile and min/max bands, selected samples highlighted\n"
+            "Auto: Envelope above 2000 samples, Collection above 200 samples, Lines otherwise")
+        self.ui.formLayout_Reflectance.addRow(self.label_Plot_Reflectance_Render_Mode, self.comboBox_Plot_Reflectance_Render_Mode)
+        
+        self.label_Plot_CIExy_Render_Mode = QLabel("Render Mode", self.ui.widget_ciexy)
+        self.comboBox_Plot_CIExy_Render_Mode = QComboBox(self.ui.widget_ciexy)
+        self.comboBox_Plot_CIExy_Render_Mode.addItems(CIE_RENDER_MODES)
+        self.comboBox_Plot_CIExy_Render_Mode.setToolTip(
+            "Markers: one marker per sample\n"
+            "Density: hexbin density of all samples, markers only for selected samples\n"
+            "Auto: Density above 2000 samples, Markers otherwise")
+        self.ui.formLayout_CIExy.addRow(self.label_Plot_CIExy_Render_Mode, self.comboBox_Plot_CIExy_Render_Mode)
+    
+    def set_render_modes_to_ui(self):
+        """Show the render mode settings in the combo boxes"""
+        mode_index = self.comboBox_Plot_Reflectance_Render_Mode.findText(self.settings['plot'].get('reflectance_render_mode', 'Auto'))
+        self.comboBox_Plot_Reflectance_Render_Mode.setCurrentIndex(max(mode_index, 0))
+        mode_index = self.comboBox_Plot_CIExy_Render_Mode.findText(self.settings['plot'].get('cie_render_mode', 'Auto'))
+        self.comboBox_Plot_CIExy_Render_Mode.setCurrentIndex(max(mode_index, 0))
+    
     def load_settings_to_ui(self):
         """Load settings to UI controls"""
         # General tab
@@ -116,6 +148,9 @@ class SettingsDialog(QDialog):
                 self.ui.comboBox_Plot_CIExy_Font_Size.setCurrentIndex(2)
             else:  # Medium is default value
                 self.ui.comboBox_Plot_CIExy_Font_Size.setCurrentIndex(1)
+            
+            # Set render modes
+            self.set_render_modes_to_ui()
         
         # Export tab
         if 'export' in self.settings:
@@ -205,7 +240,9 @@ class SettingsDialog(QDialog):
                 'reflectance_show_legend': self.ui.comboBox_Plot_Reflectance_Insert_Legend.currentIndex() == 0,
                 'cie_show_legend': self.ui.comboBox_Plot_CIExy_Insert_Legend.currentIndex() == 0,
                 'reflectance_font_size': reflectance_font_size,
-                'cie_font_size': cie_font_size
+                'cie_font_size': cie_font_size,
+                'reflectance_render_mode': self.comboBox_Plot_Reflectance_Render_Mode.currentText(),
+                'cie_render_mode': self.comboBox_Plot_CIExy_Render_Mode.currentText()
         })
         
         # 如果plot设置中已有reflectance_color，保留它，否则设为默认值
@@ -289,7 +326,9 @@ class SettingsDialog(QDialog):
                 'cie_show_legend': True,
                 'reflectance_color': '#1f77b4',  # 默认蓝色
                 'reflectance_font_size': 'Small',  # 改为Small
-                'cie_font_size': 'Small'  # 改为Small
+                'cie_font_size': 'Small',  # 改为Small
+                'reflectance_render_mode': 'Auto',
+                'cie_render_mode': 'Auto'
             },
             'export': {
                 'separator': 'Point',  # 改为Point
@@ -399,6 +438,9 @@ class SettingsDialog(QDialog):
             else:  # Medium is default value
                 self.ui.comboBox_Plot_CIExy_Font_Size.setCurrentIndex(1)
             
+            # Set render modes
+            self.set_render_modes_to_ui()
+            
             print("Default settings for Plot tab restored")
             
         elif current_tab_index == 2:  # Export标签页
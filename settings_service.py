@@ -0,0 +1,138 @@
+import os
+import json
+import traceback
+from PySide6.QtCore import QObject, QTimer
+
+from file_output import atomic_output, user_data_directory
+
+
+# Delay between the last change and writing the settings file
+SAVE_DELAY_MS = 500
+
+
+def user_settings_path():
+    """
+    Path of the settings file in the user data directory (created if missing)
+
+    Returns:
+        app_settings.json in the directory of file_output.user_data_directory
+    """
+    return os.path.join(user_data_directory(), "app_settings.json")
+
+
+class SettingsService(QObject):
+    """
+    Application settings held in memory and written to disk in batches
+
+    The settings dictionary is parsed once and shared by every window and dialog,
+    reads never touch the disk. Changes are written together once no further change
+    arrived for SAVE_DELAY_MS, through a temporary file that replaces the settings file.
+
+    Parameters:
+        file_path: Settings file
+        defaults: Default settings dictionary {category: {key: value}}
+        parent: Parent object
+    """
+    def __init__(self, file_path, defaults, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.defaults = defaults
+        self.settings = {}
+        self.dirty = False
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.flush)
+
+        self.load()
+
+    def load(self):
+        """
+        Load the settings file on top of the defaults, in place
+
+        A missing, empty or unreadable file is replaced by the defaults.
+        """
+        settings = {category: dict(values) if isinstance(values, dict) else values
+                    for category, values in self.defaults.items()}
+        write_defaults = False
+        try:
+            if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
+                with open(self.file_path, 'r') as f:
+                    loaded_settings = json.loads(f.read())
+
+                # Override defaults with loaded settings
+                for category in loaded_settings:
+                    if isinstance(settings.get(category), dict) and isinstance(loaded_settings[category], dict):
+                        settings[category].update(loaded_settings[category])
+                    else:
+                        settings[category] = loaded_settings[category]
+                print(f"Settings loaded from {self.file_path}")
+            else:
+                print(f"Settings file {self.file_path} does not exist or is empty, using default settings")
+                write_defaults = True
+        except Exception as e:
+            print(f"Error loading settings: {str(e)}")
+            traceback.print_exc()
+            write_defaults = True
+
+        # Keep the dictionary object, windows and dialogs hold references to it
+        self.settings.clear()
+        self.settings.update(settings)
+        if write_defaults:
+            self.dirty = True
+            self.flush()
+
+    def get(self, category, key, default=None):
+        """Value of a setting, default if it is not set"""
+        values = self.settings.get(category)
+        if isinstance(values, dict):
+            return values.get(key, default)
+        return default
+
+    def set(self, category, key, value):
+        """Change a setting and schedule a save if the value changed"""
+        values = self.settings.setdefault(category, {})
+        if key in values and values[key] == value:
+            return
+        values[key] = value
+        self.schedule_save()
+
+    def update(self, new_settings):
+        """
+        Merge settings into the current ones (other keys of a category are kept)
+
+        Parameters:
+            new_settings: {category: {key: value}}
+        """
+        for category, values in new_settings.items():
+            if isinstance(self.settings.get(category), dict) and isinstance(values, dict):
+                self.settings[category].update(values)
+            else:
+                self.settings[category] = values
+        self.schedule_save()
+
+    def mark_changed(self):
+        """Schedule a save of settings changed in place in the dictionary"""
+        self.schedule_save()
+
+    def schedule_save(self):
+        """Write the settings once no further change arrives within SAVE_DELAY_MS"""
+        self.dirty = True
+        self.save_timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        self.save_timer.stop()
+        if not self.dirty:
+            return
+        try:
+            text = json.dumps(self.settings, indent=4)
+            with atomic_output(self.file_path) as temp_path:
+                with open(temp_path, 'w') as f:
+                    f.write(text)
+            self.dirty = False
+            print(f"Settings saved to {self.file_path}")
+        except Exception as e:
+            print(f"Error saving settings: {str(e)}")
+            traceback.print_exc()
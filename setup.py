@@ -55,6 +55,9 @@ OPTIONS = {
         'settings_dialog',
         'import_dialog',
         'plot_dialog',
+        'plot_renderer',
+        'spectral_data',
+        'plot_picking', 'startup_timing', 'results_model', 'table_text', 'clipboard_copy', 'result_filter', 'export_tables', 'file_output', 'export_jobs', 'settings_service', 'measurement_files', 'result_cache', 'batch_runner',
         'export_dialog',
         'cmath',  # 确保包含cmath标准库
         'math',   # 确保包含math标准库
@@ -0,0 +1,524 @@
+import os
+import json
+import time
+import socket
+import struct
+import hmac
+import ipaddress
+import threading
+import socketserver
+from collections import deque
+
+import numpy as np
+
+from color_calculator import CalculationConfig, hex_colors
+from measurement_files import load_measurement_entries
+from spectral_data import build_spectral_block
+from batch_runner import OUTPUT_COLUMNS, OUTPUT_WIDTH, process_rows
+
+
+# Default coordinator port
+DEFAULT_PORT = 9876
+
+# Measurement files per shard
+SHARD_SIZE = 1000
+
+# Shards a worker takes from the shared pool at once, neighbouring shards keep archive reads local
+LEASE_SHARDS = 4
+
+# Seconds an idle worker waits before asking again while the last shards are running
+WAIT_SECONDS = 0.5
+
+# Largest accepted message header
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+
+# Largest accepted array data of one message (a shard result)
+MAX_ARRAY_BYTES = 4 * 1024 * 1024 * 1024
+
+# Largest accepted hello message, read before the worker's token is checked
+MAX_HELLO_BYTES = 64 * 1024
+
+# Array types accepted in messages
+ARRAY_KINDS = 'biuf'
+
+
+def _receive_exactly(sock, size):
+    """Read exactly size bytes from a socket"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return buffer
+
+
+def send_message(sock, header, arrays=None):
+    """
+    Send a message: a length-prefixed JSON header followed by the raw bytes of numpy arrays
+
+    Parameters:
+        sock: Connected socket
+        header: JSON serializable dictionary
+        arrays: Optional {name: numpy array}, described in the header and sent without copying
+    """
+    arrays = {name: np.ascontiguousarray(values) for name, values in (arrays or {}).items()}
+    header = dict(header, arrays=[[name, values.dtype.str, list(values.shape)] for name, values in arrays.items()])
+    payload = json.dumps(header).encode('utf-8')
+    sock.sendall(struct.pack('!I', len(payload)) + payload)
+    for values in arrays.values():
+        if values.size:
+            sock.sendall(memoryview(values).cast('B'))
+
+
+def _array_layout(description):
+    """
+    Validated (name, dtype, shape, byte size) of an array described in a message header
+
+    Raises:
+        ValueError: If the description is not a numeric array
+    """
+    try:
+        name, dtype, shape = description
+        dtype = np.dtype(dtype)
+        shape = tuple(int(extent) for extent in shape)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid array description {description!r}: {e}") from None
+    if dtype.kind not in ARRAY_KINDS or any(extent < 0 for extent in shape):
+        raise ValueError(f"Invalid array description {description!r}")
+    return str(name), dtype, shape, dtype.itemsize * int(np.prod(shape, dtype=object))
+
+
+def receive_message(sock, max_header_bytes=MAX_HEADER_BYTES, max_array_bytes=MAX_ARRAY_BYTES):
+    """
+    Receive a message sent with send_message
+
+    The declared sizes are checked against the limits before anything is allocated.
+
+    Parameters:
+        sock: Connected socket
+        max_header_bytes: Largest accepted JSON header
+        max_array_bytes: Largest accepted total size of the arrays
+
+    Returns:
+        (header dictionary, {name: numpy array})
+
+    Raises:
+        ValueError: If the message is malformed or exceeds the limits
+    """
+    length = struct.unpack('!I', _receive_exactly(sock, 4))[0]
+    if length > max_header_bytes:
+        raise ValueError(f"Message header of {length} bytes is too large")
+    header = json.loads(_receive_exactly(sock, length))
+    if not isinstance(header, dict):
+        raise ValueError("Message header is not an object")
+    descriptions = header.pop('arrays', [])
+    if not isinstance(descriptions, list):
+        raise ValueError("Invalid array list")
+    layouts = [_array_layout(description) for description in descriptions]
+    total = sum(size for *_, size in layouts)
+    if total > max_array_bytes:
+        raise ValueError(f"Message arrays of {total} bytes are too large")
+
+    arrays = {}
+    for name, dtype, shape, size in layouts:
+        arrays[name] = np.frombuffer(_receive_exactly(sock, size), dtype=dtype).reshape(shape)
+    return header, arrays
+
+
+def is_loopback(host):
+    """Whether a listening address only accepts connections from this host"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ShardQueue:
+    """
+    Shard bookkeeping of the coordinator, with work stealing between workers
+
+    Each worker owns a queue of shards. An empty queue is refilled with a lease of
+    neighbouring shards from the shared pool; once the pool is empty, the worker
+    steals the later half of the longest queue of another worker. When nothing is left
+    to start, an idle worker gets a second copy of the longest running shard, so a
+    slow or stuck worker does not hold up the end of the run (the first result wins).
+    Shards of a worker that disconnects go back to the pool.
+    """
+
+    def __init__(self, shard_count, lease=LEASE_SHARDS):
+        self.shard_count = shard_count
+        self.lease = lease
+        self.pool = deque(range(shard_count))
+        self.owned = {}
+        self.running = {}
+        self.duplicated = set()
+        self.finished = set()
+        self.results = {}
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.stats = {'steals': 0, 'duplicates': 0, 'requeued': 0, 'shards': {}}
+        if shard_count == 0:
+            self.done.set()
+
+    def add_worker(self, worker):
+        """Register a connected worker"""
+        with self.lock:
+            self.owned[worker] = deque()
+            self.stats['shards'].setdefault(worker, 0)
+
+    def next_shard(self, worker):
+        """
+        Next shard for a worker
+
+        Returns:
+            Shard index, None to wait (the last shards are running elsewhere), or -1 when all are done
+        """
+        with self.lock:
+            if len(self.finished) == self.shard_count:
+                return -1
+            own = self.owned[worker]
+            if not own:
+                if self.pool:
+                    for _ in range(min(self.lease, len(self.pool))):
+                        own.append(self.pool.popleft())
+                else:
+                    victim = max(self.owned.values(), key=len)
+                    if len(victim) > 0:
+                        stolen = [victim.pop() for _ in range((len(victim) + 1) // 2)]
+                        own.extend(reversed(stolen))
+                        self.stats['steals'] += 1
+            if own:
+                shard = own.popleft()
+                self.running.setdefault(shard, {})[worker] = time.monotonic()
+                return shard
+
+            # Nothing left to start: run a copy of the longest running shard
+            candidates = [(min(workers.values()), shard) for shard, workers in self.running.items()
+                          if shard not in self.duplicated and worker not in workers]
+            if candidates:
+                shard = min(candidates)[1]
+                self.duplicated.add(shard)
+                self.running[shard][worker] = time.monotonic()
+                self.stats['duplicates'] += 1
+                return shard
+            return None
+
+    def complete(self, worker, shard, result):
+        """
+        Record a finished shard and keep its result
+
+        The result is stored before the run is flagged done, so every result is in
+        results once done is set. Results of shards the worker was not running are ignored.
+
+        Returns:
+            True if this is the first result of the shard
+        """
+        with self.lock:
+            if worker not in self.running.get(shard, {}):
+                return False
+            self.running[shard].pop(worker)
+            if shard in self.finished:
+                return False
+            self.results[shard] = result
+            self.finished.add(shard)
+            self.running.pop(shard, None)
+            self.stats['shards'][worker] += 1
+            if len(self.finished) == self.shard_count:
+                self.done.set()
+            return True
+
+    def remove_worker(self, worker):
+        """Return the queued and running shards of a disconnected worker to the pool"""
+        with self.lock:
+            returned = list(self.owned.pop(worker, ()))
+            for shard, workers in list(self.running.items()):
+                if workers.pop(worker, None) is not None and not workers and shard not in self.finished:
+                    del self.running[shard]
+                    self.duplicated.discard(shard)
+                    returned.append(shard)
+            if returned:
+                self.stats['requeued'] += len(returned)
+                self.pool = deque(sorted(set(self.pool) | set(returned)))
+
+
+class _CoordinatorHandler(socketserver.BaseRequestHandler):
+    """One worker connection of the coordinator"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = None
+        try:
+            # Nothing larger than a hello is read before the token is checked
+            hello, _ = receive_message(self.request, MAX_HELLO_BYTES, 0)
+            token = str(hello.get('token', '')).encode('utf-8')
+            if hello.get('type') != 'hello' or not hmac.compare_digest(token, coordinator.token.encode('utf-8')):
+                send_message(self.request, {'type': 'error', 'message': "Invalid token"})
+                return
+            worker = f"{hello.get('worker', 'worker')}@{self.client_address[0]}:{self.client_address[1]}"
+            coordinator.shards.add_worker(worker)
+            print(f"Worker connected: {worker}")
+            send_message(self.request, coordinator.setup, coordinator.setup_arrays)
+
+            while True:
+                message, arrays = receive_message(self.request)
+                if message.get('type') == 'result':
+                    coordinator.store_result(worker, message, arrays)
+                elif message.get('type') == 'error':
+                    coordinator.fail(f"Worker {worker} failed on shard {message.get('shard')}: {message.get('message')}")
+                    return
+
+                shard = -1 if coordinator.error else coordinator.shards.next_shard(worker)
+                if shard == -1:
+                    send_message(self.request, {'type': 'done'})
+                    return
+                if shard is None:
+                    send_message(self.request, {'type': 'wait', 'seconds': WAIT_SECONDS})
+                else:
+                    send_message(self.request, {'type': 'shard', 'shard': shard, 'files': coordinator.shard_entries[shard]})
+        except (ConnectionError, OSError, ValueError, KeyError, TypeError, MemoryError) as e:
+            if worker is None:
+                print(f"Rejected connection from {self.client_address[0]}: {e}")
+            else:
+                print(f"Worker {worker} disconnected: {e}")
+        finally:
+            if worker is not None:
+                coordinator.shards.remove_worker(worker)
+
+
+class ShardCoordinator:
+    """
+    Coordinator of a sharded batch run
+
+    Splits the listed measurement files into shards, hands them to worker
+    processes connecting over TCP (see run_shard_worker) and merges their results in
+    shard order, so the merged result does not depend on which worker ran which shard.
+    Workers read the measurement files themselves, the paths must be valid on their
+    hosts (shared storage).
+
+    Parameters:
+        entries: Measurement entries from measurement_files.list_measurement_entries
+        config: CalculationConfig
+        wavelengths: Wavelength grid all samples are put on
+        include_reflectance: Whether workers send back the reflectance spectra
+        token: Shared secret workers must present, required unless listening on loopback only
+        host, port: Listening address, port 0 picks a free port
+        shard_size: Measurement files per shard
+
+    Raises:
+        ValueError: If the coordinator would accept workers from other hosts without a token
+    """
+
+    def __init__(self, entries, config, wavelengths, include_reflectance=True, token='', host='127.0.0.1',
+                 port=DEFAULT_PORT, shard_size=SHARD_SIZE):
+        if not token and not is_loopback(host):
+            raise ValueError(f"Listening on {host or 'all interfaces'} needs a token")
+        self.shard_entries = [[list(entry) for entry in entries[start:start + shard_size]]
+                              for start in range(0, len(entries), shard_size)]
+        self.shards = ShardQueue(len(self.shard_entries))
+        self.error = None
+        self.token = token
+        self.setup = {
+            'type': 'setup',
+            'illuminant': config.illuminant,
+            'rho_lambda': config.rho_lambda,
+            'include_reflectance': include_reflectance
+        }
+        self.setup_arrays = {'wavelengths': np.asarray(wavelengths, dtype=np.float64)}
+        if config.calibrated:
+            self.setup_arrays['black_reference'], self.setup_arrays['white_reference'] = config.reference_arrays
+
+        self.server = socketserver.ThreadingTCPServer((host, port), _CoordinatorHandler, bind_and_activate=False)
+        self.server.daemon_threads = True
+        self.server.allow_reuse_address = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self.server.coordinator = self
+
+    @property
+    def address(self):
+        """(host, port) the coordinator listens on"""
+        return self.server.server_address[:2]
+
+    def store_result(self, worker, message, arrays):
+        """Keep the first result of a shard"""
+        if self.shards.complete(worker, message.get('shard'), (message['names'], message['skipped'], arrays)):
+            print(f"Shard {message['shard'] + 1}/{len(self.shard_entries)} done by {worker} "
+                  f"({len(self.shards.finished)}/{len(self.shard_entries)})")
+
+    def fail(self, message):
+        """Stop the run with an error"""
+        print(f"Error: {message}")
+        self.error = message
+        self.shards.done.set()
+
+    def run(self, timeout=None):
+        """
+        Serve workers until all shards are done, then merge the results
+
+        Parameters:
+            timeout: Optional seconds to wait for the shards
+
+        Returns:
+            (names, results in the layout of batch_runner.run_batch, skipped file names)
+
+        Raises:
+            RuntimeError: If a worker failed or the timeout expired
+        """
+        start_time = time.perf_counter()
+        thread = threading.Thread(target=self.server.serve_forever, name="shard-coordinator", daemon=True)
+        thread.start()
+        host, port = self.address
+        print(f"Coordinator listening on {host}:{port}, {len(self.shard_entries)} shards")
+        try:
+            if not self.shards.done.wait(timeout):
+                raise RuntimeError(f"Timeout, {len(self.shards.finished)}/{len(self.shard_entries)} shards done")
+            if self.error:
+                raise RuntimeError(self.error)
+            # Courtesy delay so connected workers get their 'done' instead of a closed
+            # connection; all results are already stored (see ShardQueue.complete)
+            time.sleep(min(WAIT_SECONDS * 2, 1.0))
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+
+        names, skipped, results = self.merge()
+        seconds = time.perf_counter() - start_time
+        stats = self.shards.stats
+        results['stats'] = {
+            'samples': len(names),
+            'workers': len(stats['shards']),
+            'seconds': seconds,
+            'spectra_per_second': len(names) / seconds if seconds > 0 else float('inf'),
+            'steals': stats['steals'],
+            'duplicates': stats['duplicates'],
+            'requeued': stats['requeued'],
+            'shards_per_worker': dict(stats['shards'])
+        }
+        print(f"Sharded batch processed {len(names)} spectra with {len(stats['shards'])} worker(s) in {seconds:.3f} s "
+              f"({results['stats']['spectra_per_second']:,.0f} spectra/s), {stats['steals']} steals, "
+              f"{stats['duplicates']} duplicate shards, {stats['requeued']} requeued")
+        return names, results, skipped
+
+    def merge(self):
+        """Concatenate the shard results in shard order"""
+        names = []
+        skipped = []
+        outputs = []
+        reflectances = []
+        for shard in range(len(self.shard_entries)):
+            shard_names, shard_skipped, arrays = self.shards.results[shard]
+            names.extend(shard_names)
+            skipped.extend(shard_skipped)
+            outputs.append(arrays['output'])
+            if 'reflectance' in arrays:
+                reflectances.append(arrays['reflectance'])
+
+        wavelengths = self.setup_arrays['wavelengths']
+        output = np.concatenate(outputs) if outputs else np.empty((0, OUTPUT_WIDTH))
+        results = {key: output[:, columns] for key, columns in OUTPUT_COLUMNS.items()}
+        results.update({
+            'wavelengths': wavelengths,
+            'reflectance': np.concatenate(reflectances) if self.setup['include_reflectance'] and reflectances else None,
+            'hex_color': hex_colors(results['rgb_gamma'])
+        })
+        return names, skipped, results
+
+
+def compute_shard(entries, wavelengths, config, tables, include_reflectance=True):
+    """
+    Load and calculate the measurement files of one shard
+
+    Returns:
+        (names, skipped file names, {'output': (N, OUTPUT_WIDTH) colour values, 'reflectance': (N, W)})
+    """
+    names = []
+    wavelengths_list = []
+    values_list = []
+    skipped_indices = []
+    for file_name, measurement in load_measurement_entries([tuple(entry) for entry in entries],
+                                                           skipped=skipped_indices):
+        names.append(file_name)
+        wavelengths_list.append(measurement['wavelengths'])
+        values_list.append(measurement['values'])
+    skipped = [entries[index][1] or os.path.basename(entries[index][0]) for index in skipped_indices]
+
+    output = np.empty((len(names), OUTPUT_WIDTH), dtype=np.float64)
+    if names:
+        spectra = build_spectral_block(names, wavelengths_list, values_list, grid=wavelengths)['reflectance']
+        process_rows(spectra, output, 0, len(names), wavelengths, config, tables)
+    else:
+        # Every file of the shard was skipped
+        spectra = np.empty((0, len(wavelengths)), dtype=np.float64)
+    arrays = {'output': output}
+    if include_reflectance:
+        arrays['reflectance'] = spectra
+    return names, skipped, arrays
+
+
+def run_shard_worker(host, port, token='', name=None, tables=None, connect_timeout=30):
+    """
+    Work on shards of a coordinator until it reports that all are done
+
+    Parameters:
+        host, port: Coordinator address
+        token: Shared secret of the coordinator
+        name: Worker name shown by the coordinator (default: host name and process id)
+        tables: SpectralTables, loaded here if None
+        connect_timeout: Seconds to keep retrying the connection while the coordinator starts
+
+    Returns:
+        Number of shards computed
+
+    Raises:
+        RuntimeError: If the coordinator rejected the worker
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    with sock:
+        send_message(sock, {'type': 'hello', 'token': token, 'worker': name or f"{socket.gethostname()}-{os.getpid()}"})
+        setup, arrays = receive_message(sock)
+        if setup.get('type') != 'setup':
+            raise RuntimeError(setup.get('message', "Coordinator rejected the worker"))
+
+        if tables is None:
+            from color_calculator import ColorCalculator
+            tables = ColorCalculator().tables
+        wavelengths = arrays['wavelengths']
+        config = CalculationConfig(illuminant=setup['illuminant'], rho_lambda=setup['rho_lambda'],
+                                   black_reference=arrays.get('black_reference'),
+                                   white_reference=arrays.get('white_reference'))
+
+        computed = 0
+        send_message(sock, {'type': 'ready'})
+        while True:
+            message, _ = receive_message(sock)
+            if message['type'] == 'done':
+                print(f"Worker finished after {computed} shards")
+                return computed
+            if message['type'] == 'wait':
+                time.sleep(message['seconds'])
+                send_message(sock, {'type': 'ready'})
+                continue
+
+            shard = message['shard']
+            try:
+                names, skipped, result_arrays = compute_shard(message['files'], wavelengths, config, tables,
+                                                              setup['include_reflectance'])
+            except Exception as e:
+                send_message(sock, {'type': 'error', 'shard': shard, 'message': str(e)})
+                raise
+            send_message(sock, {'type': 'result', 'shard': shard, 'names': names, 'skipped': skipped}, result_arrays)
+            computed += 1
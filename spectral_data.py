@@ -0,0 +1,199 @@
+import numpy as np
+
+
+def sample_spectrum(result_data, default_wavelengths=None):
+    """
+    Get the plotted spectrum of one sample, preferring the 1nm resampled data
+
+    Parameters:
+        result_data: Result dictionary from ColorCalculator.process_measurement
+        default_wavelengths: Wavelengths used when the result has none
+
+    Returns:
+        (wavelengths, reflectance) arrays, or (None, None) if the result has no reflectance
+    """
+    if 'reflectance_1nm' in result_data and 'wavelengths_1nm' in result_data:
+        return np.asarray(result_data['wavelengths_1nm'], dtype=np.float64), np.asarray(result_data['reflectance_1nm'], dtype=np.float64)
+    if result_data.get('reflectance') is None:
+        return None, None
+    wavelengths = result_data['wavelengths'] if 'wavelengths' in result_data else default_wavelengths
+    return np.asarray(wavelengths, dtype=np.float64), np.asarray(result_data['reflectance'], dtype=np.float64)
+
+
+def build_spectral_block(names, wavelengths_list, reflectance_list, hex_colors=None, grid=None):
+    """
+    Stack per-sample spectra into one columnar array on a common wavelength grid
+
+    Samples that are already on the grid (the usual case, all 1nm data share 380-780nm)
+    are copied as-is, the others are linearly interpolated onto it.
+
+    Parameters:
+        names: Sample names
+        wavelengths_list: Wavelength array per sample
+        reflectance_list: Reflectance array per sample
+        hex_colors: Optional {name: hex color} mapping
+        grid: Optional common wavelength grid, default the wavelengths of the first sample
+
+    Returns:
+        Dictionary with:
+            - names: list of sample names (row order)
+            - index: {name: row}
+            - wavelengths: common wavelength grid (W,)
+            - reflectance: reflectance matrix (N, W)
+            - colors: hex color per row ('#1f77b4' when unknown)
+    """
+    if not names:
+        return {
+            'names': [],
+            'index': {},
+            'wavelengths': np.empty(0) if grid is None else np.asarray(grid, dtype=np.float64),
+            'reflectance': np.empty((0, 0)),
+            'colors': []
+        }
+
+    if grid is None:
+        grid = wavelengths_list[0]
+    matrix = np.empty((len(names), len(grid)), dtype=np.float64)
+    for row, (wavelengths, reflectance) in enumerate(zip(wavelengths_list, reflectance_list)):
+        if len(wavelengths) == len(grid) and len(reflectance) == len(grid) and np.array_equal(wavelengths, grid):
+            matrix[row] = reflectance
+        else:
+            # Spectra with a length mismatch are spread over their wavelength range first
+            if len(wavelengths) != len(reflectance):
+                wavelengths = np.linspace(wavelengths[0], wavelengths[-1], len(reflectance))
+            matrix[row] = np.interp(grid, wavelengths, reflectance)
+
+    hex_colors = hex_colors or {}
+    return {
+        'names': list(names),
+        'index': {name: row for row, name in enumerate(names)},
+        'wavelengths': np.asarray(grid, dtype=np.float64),
+        'reflectance': matrix,
+        'colors': [hex_colors.get(name, '#1f77b4') for name in names]
+    }
+
+
+def build_spectral_block_from_data(data):
+    """
+    Build the columnar spectral block from the main window data dictionary
+
+    Parameters:
+        data: Main window data dictionary
+
+    Returns:
+        Spectral block, see build_spectral_block
+    """
+    names = []
+    wavelengths_list = []
+    reflectance_list = []
+    for file_name, result_data in data.get('reflectance', {}).items():
+        if not isinstance(result_data, dict):
+            continue
+        wavelengths, reflectance = sample_spectrum(result_data, data.get('wavelengths'))
+        if reflectance is None or len(reflectance) == 0:
+            continue
+        names.append(file_name)
+        wavelengths_list.append(wavelengths)
+        reflectance_list.append(reflectance)
+
+    hex_colors = {result['file_name']: result['hex_color'] for result in data.get('results', [])}
+    return build_spectral_block(names, wavelengths_list, reflectance_list, hex_colors)
+
+
+def build_chromaticity_block(results):
+    """
+    Collect the chromaticity results into columnar arrays
+
+    Parameters:
+        results: Main window results list ({'file_name', 'x', 'y', 'hex_color', ...} per sample)
+
+    Returns:
+        Dictionary with:
+            - names: list of sample names (row order)
+            - index: {name: row}
+            - xy: chromaticity coordinates (N, 2)
+            - colors: hex color per row
+    """
+    names = [result['file_name'] for result in results]
+    xy = np.fromiter((value for result in results for value in (result['x'], result['y'])),
+                     dtype=np.float64, count=2 * len(results)).reshape(-1, 2)
+    return {
+        'names': names,
+        'index': {name: row for row, name in enumerate(names)},
+        'xy': xy,
+        'colors': [result['hex_color'] for result in results]
+    }
+
+
+def build_results_block(results):
+    """
+    Collect the full color results (chromaticity and sRGB values) into columnar arrays
+
+    Parameters:
+        results: Main window results list
+
+    Returns:
+        Chromaticity block (see build_chromaticity_block) with additionally:
+            - rgb_linear: linear sRGB values (N, 3)
+            - rgb_gamma: gamma-corrected sRGB values (N, 3), range 0..1
+    """
+    block = build_chromaticity_block(results)
+    block['rgb_linear'] = np.array([result['rgb_linear'] for result in results], dtype=np.float64).reshape(-1, 3)
+    block['rgb_gamma'] = np.array([result['rgb_gamma'] for result in results], dtype=np.float64).reshape(-1, 3)
+    return block
+
+
+def subset_block(block, rows):
+    """
+    Take some rows of a spectral, chromaticity or results block
+
+    Parameters:
+        block: Block from one of the build_*_block functions
+        rows: Row indices to keep, in the new row order
+
+    Returns:
+        New block of the same kind (cached statistics are not carried over)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    subset = {}
+    for key, value in block.items():
+        if key in ('names', 'colors'):
+            subset[key] = [value[row] for row in rows]
+        elif key == 'wavelengths':
+            subset[key] = value
+        elif isinstance(value, np.ndarray):
+            subset[key] = value[rows]
+    subset['index'] = {name: row for row, name in enumerate(subset['names'])}
+    return subset
+
+
+# Percentiles of the envelope bands (outer band, inner band)
+ENVELOPE_PERCENTILES = (5, 25, 75, 95)
+
+
+def spectral_statistics(block):
+    """
+    Per-wavelength statistics over all spectra of a block
+
+    Computed in one vectorized pass over the (N, W) matrix and stored in the block,
+    so redrawing (e.g. on selection changes) does not recompute them.
+
+    Parameters:
+        block: Spectral block from build_spectral_block
+
+    Returns:
+        Dictionary of (W,) arrays: mean, median, min, max and p5, p25, p75, p95
+    """
+    if 'statistics' not in block:
+        reflectance = block['reflectance']
+        percentiles = np.percentile(reflectance, (50,) + ENVELOPE_PERCENTILES, axis=0)
+        statistics = {
+            'mean': reflectance.mean(axis=0),
+            'median': percentiles[0],
+            'min': reflectance.min(axis=0),
+            'max': reflectance.max(axis=0)
+        }
+        for q, values in zip(ENVELOPE_PERCENTILES, percentiles[1:]):
+            statistics[f'p{q}'] = values
+        block['statistics'] = statistics
+    return block['statistics']
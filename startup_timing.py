@@ -0,0 +1,43 @@
+import time
+
+
+class StartupTimer:
+    """
+    Collect the duration of named startup steps and print a breakdown
+
+    Each mark() records the time since the previous mark, so the report shows
+    where the time between process start and the first shown window went.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.steps = []
+        self.deferred_steps = []
+
+    def mark(self, label):
+        """Record the time since the previous mark under a label"""
+        now = time.perf_counter()
+        self.steps.append((label, now - self.last_time))
+        self.last_time = now
+
+    def record_deferred(self, label, duration):
+        """Record a step that runs after the window is shown (not part of the startup time)"""
+        self.deferred_steps.append((label, duration))
+        print(f"Deferred loading: {label} took {duration * 1000:.1f} ms")
+
+    def elapsed(self):
+        """Time since the timer was created, in seconds"""
+        return time.perf_counter() - self.start_time
+
+    def report(self):
+        """Print the startup breakdown"""
+        print("\n====== Startup Timing ======")
+        for label, duration in self.steps:
+            print(f"  {label:<34s}{duration * 1000:9.1f} ms")
+        print(f"  {'Total until window shown':<34s}{(self.last_time - self.start_time) * 1000:9.1f} ms")
+        print("============================\n")
+
+
+# Shared timer, created when the entry point first imports this module
+startup_timer = StartupTimer()
@@ -0,0 +1,213 @@
+import io
+import csv
+import json
+import numpy as np
+
+from color_calculator import reflectance_block, compute_color_block, hex_colors
+
+
+# Input formats of the stream mode
+STREAM_INPUT_FORMATS = ['csv', 'ndjson', 'binary']
+
+# Output formats of the stream mode
+STREAM_OUTPUT_FORMATS = ['ndjson', 'csv']
+
+# Columns of the CSV output, after the sample name
+STREAM_CSV_HEADERS = ["X", "Y", "Z", "x", "y", "R (lin)", "G (lin)", "B (lin)",
+                      "R (gamma)", "G (gamma)", "B (gamma)", "Hex"]
+
+
+def parse_wavelength_range(text):
+    """
+    Parse a wavelength grid given as 'start:stop:step' (stop included) or a comma separated list
+
+    Returns:
+        Wavelength array
+    """
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(part) for part in text.split(',')])
+
+
+def read_csv_spectra(lines, wavelengths=None):
+    """
+    Read spectra from CSV rows, one spectrum per row
+
+    A row holds the values on the wavelength grid, optionally preceded by a sample name.
+    Without a given grid the first row is a header whose numeric cells are the
+    wavelengths, e.g. "name,380,385,...,780".
+
+    Parameters:
+        lines: Iterable of text lines
+        wavelengths: Wavelength grid, None to read it from the header row
+
+    Yields:
+        (name, wavelengths, values); rows that cannot be parsed yield (name, None, error message)
+    """
+    count = 0
+    for line in lines:
+        cells = [cell.strip() for cell in line.strip().split(',')]
+        if cells == ['']:
+            continue
+        if wavelengths is None:
+            header = []
+            for cell in cells:
+                try:
+                    header.append(float(cell))
+                except ValueError:
+                    pass
+            wavelengths = np.array(header)
+            continue
+
+        count += 1
+        if len(cells) == len(wavelengths) + 1:
+            name, cells = cells[0], cells[1:]
+        else:
+            name = f"sample{count}"
+        try:
+            values = np.array(cells, dtype=np.float64)
+        except ValueError as e:
+            yield name, None, str(e)
+            continue
+        if len(values) != len(wavelengths):
+            yield name, None, f"{len(values)} values for {len(wavelengths)} wavelengths"
+            continue
+        yield name, wavelengths, values
+
+
+def read_ndjson_spectra(lines, wavelengths=None):
+    """
+    Read spectra from NDJSON lines: {"name": ..., "values": [...], "wavelengths": [...]}
+
+    The name and wavelengths are optional, records without wavelengths use the given grid.
+
+    Yields:
+        (name, wavelengths, values); records that cannot be parsed yield (name, None, error message)
+    """
+    count = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        count += 1
+        name = f"sample{count}"
+        try:
+            record = json.loads(line)
+            name = str(record.get('name', name))
+            values = np.array(record['values'], dtype=np.float64)
+            record_wavelengths = wavelengths if 'wavelengths' not in record else np.array(record['wavelengths'], dtype=np.float64)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            yield name, None, f"Invalid record: {e}"
+            continue
+        if record_wavelengths is None:
+            yield name, None, "No wavelength grid (record wavelengths or --wavelengths)"
+        elif len(values) != len(record_wavelengths):
+            yield name, None, f"{len(values)} values for {len(record_wavelengths)} wavelengths"
+        else:
+            yield name, record_wavelengths, values
+
+
+def read_binary_spectra(stream):
+    """
+    Read spectra from a binary stream
+
+    The stream starts with one JSON header line, {"wavelengths": [...], "dtype": "<f8"}
+    (dtype optional, default little-endian float64), followed by one record of
+    len(wavelengths) values per spectrum, e.g. written with numpy's tofile.
+
+    Parameters:
+        stream: Binary stream
+
+    Yields:
+        (name, wavelengths, values), names are sample1, sample2, ...
+
+    Raises:
+        ValueError: If the header is invalid
+    """
+    try:
+        header = json.loads(stream.readline())
+        wavelengths = np.array(header['wavelengths'], dtype=np.float64)
+        dtype = np.dtype(header.get('dtype', '<f8'))
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid binary stream header, expected {{\"wavelengths\": [...], \"dtype\": \"<f8\"}}: {e}") from None
+    if wavelengths.ndim != 1 or len(wavelengths) == 0:
+        raise ValueError("Invalid binary stream header: 'wavelengths' must be a non-empty list of numbers")
+    if dtype.kind not in 'iuf':
+        raise ValueError(f"Invalid binary stream header: unsupported dtype {dtype.str}")
+    record_size = len(wavelengths) * dtype.itemsize
+
+    count = 0
+    while True:
+        record = stream.read(record_size)
+        if len(record) < record_size:
+            if record:
+                print(f"Warning: Ignoring incomplete record of {len(record)} bytes at the end of the stream")
+            return
+        count += 1
+        yield f"sample{count}", wavelengths, np.frombuffer(record, dtype=dtype).astype(np.float64)
+
+
+def csv_line(cells):
+    """One CSV output line, cells quoted as needed by the csv module"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(cells)
+    return buffer.getvalue()
+
+
+def stream_record(name, values, output_format):
+    """Output line of one sample's colour values"""
+    xyz, xy, rgb_linear, rgb_gamma = values['xyz'][0], values['xy'][0], values['rgb_linear'][0], values['rgb_gamma'][0]
+    hex_color = hex_colors(values['rgb_gamma'])[0]
+    if output_format == 'csv':
+        numbers = [f"{value:.6f}" for value in (*xyz, *xy, *rgb_linear, *rgb_gamma)]
+        return csv_line([name, *numbers, hex_color])
+    return json.dumps({
+        'name': name,
+        'xyz': xyz.tolist(),
+        'xy': xy.tolist(),
+        'rgb_linear': rgb_linear.tolist(),
+        'rgb_gamma': rgb_gamma.tolist(),
+        'hex_color': hex_color
+    }) + "\n"
+
+
+def stream_colors(spectra, output, config, tables, output_format='ndjson', flush=True):
+    """
+    Calculate the colour values of a stream of spectra and write one line per sample
+
+    Each sample is written (and flushed) as soon as it is read; only the current sample
+    is held in memory, so memory use does not grow with the stream length. The weight
+    tables are prepared once per wavelength grid (see color_weights).
+
+    Parameters:
+        spectra: Iterable of (name, wavelengths, values) from one of the read_*_spectra readers
+        output: Text stream receiving the results
+        config: CalculationConfig, the references must be on the sample wavelength grid
+        tables: SpectralTables
+        output_format: 'ndjson' or 'csv'
+        flush: Flush the output after every sample
+
+    Returns:
+        (processed sample count, failed sample count)
+    """
+    if output_format == 'csv':
+        output.write(csv_line(["Name"] + STREAM_CSV_HEADERS))
+
+    processed = failed = 0
+    for name, wavelengths, values in spectra:
+        try:
+            if wavelengths is None:
+                raise ValueError(values)
+            reflectance = reflectance_block(values[None, :], config)
+            line = stream_record(name, compute_color_block(reflectance, wavelengths, config, tables), output_format)
+            processed += 1
+        except ValueError as e:
+            failed += 1
+            print(f"Error in sample {name}: {e}")
+            if output_format != 'ndjson':
+                continue
+            line = json.dumps({'name': name, 'error': str(e)}) + "\n"
+        output.write(line)
+        if flush:
+            output.flush()
+    return processed, failed
@@ -0,0 +1,132 @@
+import re
+import numpy as np
+
+
+# Column separator of copied tables (spreadsheets split pasted text on tabs)
+COLUMN_SEPARATOR = "\t"
+
+_NAN_PATTERN = re.compile(r"(?<![A-Za-z])nan(?![A-Za-z])")
+
+
+def decimal_mark(settings):
+    """
+    Decimal mark selected by the 'Export Number Separator' setting
+
+    Parameters:
+        settings: Settings dictionary
+
+    Returns:
+        ',' for 'Comma', otherwise '.'
+    """
+    return ',' if settings.get('export', {}).get('separator') == 'Comma' else '.'
+
+
+def include_header(settings):
+    """Whether copied tables start with a header line ('Copy Header' setting)"""
+    return settings.get('export', {}).get('copy_header', 'Yes') != 'No'
+
+
+def format_numbers(values, fmt, decimal='.', separator=COLUMN_SEPARATOR, template=None):
+    """
+    Format a numeric column or matrix into one string per row
+
+    The whole array is formatted with one %-format per row and the decimal mark is
+    replaced on the joined text, which is several times faster than formatting
+    cell by cell. NaN values become empty cells.
+
+    Parameters:
+        values: (N,) or (N, K) array
+        fmt: %-format of a single value, e.g. '%.6f'
+        decimal: Decimal mark
+        separator: Separator between the K values of a row
+        template: Optional %-format of a whole row (overrides fmt/separator), e.g. '(%.4f, %.4f, %.4f)'
+
+    Returns:
+        List of N strings
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    if len(values) == 0:
+        return []
+
+    row_format = template if template is not None else separator.join([fmt] * values.shape[1])
+    text = "\n".join(row_format % tuple(row) for row in values.tolist())
+    if decimal != '.':
+        text = text.replace('.', decimal)
+    if np.isnan(values).any():
+        text = _NAN_PATTERN.sub('', text)
+    return text.split("\n")
+
+
+def triplet_template(fmt, decimal='.'):
+    """Row format of an (a, b, c) triplet, the items are split by ';' when the decimal mark is a comma"""
+    item_separator = '; ' if decimal == ',' else ', '
+    return '(' + item_separator.join([fmt] * 3) + ')'
+
+
+def rgb_gamma_values(rgb_gamma, rgb_format):
+    """
+    Gamma-corrected sRGB values in the display range
+
+    Parameters:
+        rgb_gamma: (N, 3) values in range 0..1
+        rgb_format: '0 ... 255' for integer values, otherwise unchanged
+
+    Returns:
+        (array, single value %-format)
+    """
+    if rgb_format == '0 ... 255':
+        # Truncate like int(), values above 255 are clamped
+        return np.minimum(np.trunc(np.asarray(rgb_gamma) * 255), 255), '%d'
+    return np.asarray(rgb_gamma), '%.4f'
+
+
+def results_columns(block, order=None, rgb_format='0 ... 1', decimal='.'):
+    """
+    Text columns of the color results
+
+    Parameters:
+        block: Results block from spectral_data.build_results_block
+        order: Optional row order (block rows), defaults to the block order
+        rgb_format: Display range of the gamma-corrected sRGB values
+        decimal: Decimal mark
+
+    Returns:
+        Dictionary {header: list of strings} with File Name, x, y, sRGB Linear, sRGB Gamma and Hex Color
+    """
+    order = np.arange(len(block['names'])) if order is None else np.asarray(order)
+    names = block['names']
+    colors = block['colors']
+    rgb_gamma, gamma_format = rgb_gamma_values(block['rgb_gamma'][order], rgb_format)
+    return {
+        'File Name': [names[i] for i in order],
+        'x': format_numbers(block['xy'][order, 0], '%.6f', decimal),
+        'y': format_numbers(block['xy'][order, 1], '%.6f', decimal),
+        'sRGB Linear': format_numbers(block['rgb_linear'][order], '%.4f', decimal,
+                                      template=triplet_template('%.4f', decimal)),
+        'sRGB Gamma': format_numbers(rgb_gamma, gamma_format, decimal,
+                                     template=triplet_template(gamma_format, decimal)),
+        'Hex Color': [colors[i] for i in order]
+    }
+
+
+def join_table(headers, columns, header=True, separator=COLUMN_SEPARATOR):
+    """
+    Join text columns into tab-separated table text
+
+    A column may hold several table columns already joined by the separator
+    (as returned by format_numbers for a matrix).
+
+    Parameters:
+        headers: Header cells
+        columns: List of columns, each a list of strings of equal length
+        header: Whether to start with the header line
+        separator: Column separator
+
+    Returns:
+        Table text, every line terminated by a newline
+    """
+    lines = [separator.join(headers)] if header else []
+    lines.extend(separator.join(cells) for cells in zip(*columns))
+    return "\n".join(lines) + "\n" if lines else ""
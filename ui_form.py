@@ -120,18 +120,10 @@ class Ui_MainWindow(object):
         self.tableLayout.setObjectName("tableLayout")
         
         # 添加表格视图 - 设置合理的最大高度
-        self.table_results = QtWidgets.QTableWidget(self.tableGroup)
+        self.table_results = QtWidgets.QTableView(self.tableGroup)
         self.table_results.setObjectName("table_results")
-        self.table_results.setColumnCount(6)
-        self.table_results.setRowCount(0)
         self.table_results.setMaximumHeight(280)  # 减小表格最大高度
         
-        headers = ["CLR", "File Name", "x", "y", "sRGB Linear", "sRGB Gamma"]
-        for i, header in enumerate(headers):
-            item = QtWidgets.QTableWidgetItem()
-            item.setText(header)
-            self.table_results.setHorizontalHeaderItem(i, item)
-        
         self.table_results.horizontalHeader().setCascadingSectionResizes(False)
         self.table_results.horizontalHeader().setDefaultSectionSize(85)  # 减小默认列宽
         self.table_results.horizontalHeader().setMinimumSectionSize(20)